@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Object AST vs. flat arena: retained bytes per node and a full tree walk.
+
+Usage:
+    python benchmarks/bench_arena.py [size_mb]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.arena import Arena, NodeKind
+from src.tiny_interpreter.parser import SExpression
+from src.tiny_interpreter.reader import read
+
+
+def retained(build):
+    """Return (result, bytes still allocated after `build`)."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def count_symbols_nodes(nodes) -> int:
+    """Count symbol nodes by walking AST objects."""
+    count = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, SExpression):
+            stack.extend(node.elements)
+        elif hasattr(node, 'name'):
+            count += 1
+    return count
+
+
+def count_symbols_arena(arena) -> int:
+    """Count symbol nodes by walking the arena with index arithmetic."""
+    kinds, first_child, child_count = arena.kinds, arena.first_child, arena.child_count
+    sexpression, symbol = int(NodeKind.SEXPRESSION), int(NodeKind.SYMBOL)
+    count = 0
+    stack = list(arena.roots)
+    while stack:
+        index = stack.pop()
+        kind = kinds[index]
+        if kind == sexpression:
+            first = first_child[index]
+            stack.extend(range(first, first + child_count[index]))
+        elif kind == symbol:
+            count += 1
+    return count
+
+
+def count_symbols_column(arena) -> int:
+    """Count symbol nodes with a single scan of the kinds column."""
+    return arena.kinds.count(NodeKind.SYMBOL)
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    source = generate_program(int(size_mb * 1e6))
+    print(f"source: {len(source) / 1e6:.1f} MB")
+
+    nodes, node_bytes = retained(lambda: read(source))
+    arena, arena_bytes = retained(lambda: Arena.from_source(source))
+    count = len(arena)
+    print(f"  objects  {node_bytes / count:6.1f} bytes/node")
+    print(f"  arena    {arena_bytes / count:6.1f} bytes/node  ({count} nodes)")
+
+    for name, walk, tree in (("objects", count_symbols_nodes, nodes),
+                             ("arena", count_symbols_arena, arena),
+                             ("column", count_symbols_column, arena)):
+        start = time.perf_counter()
+        symbols = walk(tree)
+        elapsed = time.perf_counter() - start
+        print(f"  count symbols, {name:8s} {elapsed * 1000:8.1f} ms  ({symbols})")
+
+
+if __name__ == "__main__":
+    main()
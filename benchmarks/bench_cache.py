@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Cold parse vs. warm load from the on-disk AST cache.
+
+Usage:
+    python benchmarks/bench_cache.py [size_mb]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter import cache
+from src.tiny_interpreter.main import parse_file
+
+
+def timed(func) -> float:
+    """Return the seconds one call of `func` takes."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, "generated.lisp")
+    with open(filename, 'w') as f:
+        f.write(generate_program(int(size_mb * 1e6)))
+
+    try:
+        parse_only = timed(lambda: parse_file(filename))
+        cold = timed(lambda: cache.load_or_parse(filename, lambda: parse_file(filename)))
+        load = timed(lambda: cache.load(filename))
+        warm = timed(lambda: list(cache.load_or_parse(filename, lambda: parse_file(filename))))
+
+        print(f"source: {os.path.getsize(filename) / 1e6:.1f} MB, "
+              f"cache file: {os.path.getsize(cache.cache_path(filename)) / 1e6:.1f} MB")
+        print(f"  parse, no cache           {parse_only:7.3f} s")
+        print(f"  cold: parse + write cache {cold:7.3f} s")
+        print(f"  warm: load arena          {load:7.3f} s")
+        print(f"  warm: load + rebuild AST  {warm:7.3f} s  ({parse_only / warm:.1f}x faster than parsing)")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
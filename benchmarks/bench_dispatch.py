@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Time how long the tree walker takes to dispatch one expression.
+
+Each expression does next to no work once dispatched, so the time per
+evaluation is mostly the cost of finding how to evaluate it: a built-in
+special form, a registered one, a call to a built-in function, and a
+variable, a number and an empty list for comparison.
+
+Usage:
+    python benchmarks/bench_dispatch.py [rounds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.evaluator import Evaluator
+from src.tiny_interpreter.parser import parse
+
+EXPRESSIONS = {
+    "special form (quote 1)": "(quote 1)",
+    "registered form (nop)": "(nop)",
+    "application (none)": "(none)",
+    "variable none": "none",
+    "number 1": "1",
+    "empty list ()": "()",
+}
+
+# Evaluations timed per round
+CALLS = 100000
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    evaluator = Evaluator()
+    evaluator.global_env.define('none', lambda: None)
+    evaluator.register_special_form('nop', lambda args, env: None)
+    env = evaluator.global_env
+    nodes = {name: parse(source)[0] for name, source in EXPRESSIONS.items()}
+    best = {}
+    # Interleave the rounds so that machine noise hits every expression alike
+    for _ in range(rounds):
+        for name, node in nodes.items():
+            eval = evaluator.eval
+            start = time.perf_counter()
+            for _ in range(CALLS):
+                eval(node, env)
+            elapsed = time.perf_counter() - start
+            best[name] = min(best.get(name, elapsed), elapsed)
+
+    for name, elapsed in best.items():
+        print(f"{name:24s} {elapsed / CALLS * 1e9:7.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Time the same programs on each evaluation engine.
+
+Usage:
+    python benchmarks/bench_engines.py [rounds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.evaluator import ENGINES, Evaluator
+
+WORKLOADS = {
+    "fib 15": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 15)",
+    ),
+    "tak 12 8 4": (
+        "(define tak (lambda (x y z) (if (< y x) "
+        "(tak (tak (- x 1) y z) (tak (- y 1) z x) (tak (- z 1) x y)) z)))",
+        "(tak 12 8 4)",
+    ),
+    # examples/factorial.lisp, many times over
+    "factorial 20 x 40": (
+        "(define factorial (lambda (n) (if (= n 0) 1 (* n (factorial (- n 1))))))\n"
+        "(define repeat (lambda (k) (if (= k 0) 0 (begin (factorial 20) (repeat (- k 1))))))",
+        "(repeat 40)",
+    ),
+    "arithmetic": (
+        "(define poly (lambda (x) (- (+ (* x x) (* 3 x)) (/ (+ x 7) 2))))\n"
+        "(define sum (lambda (i acc) (if (= i 0) acc (sum (- i 1) (+ acc (poly i) (- i (+ 1 2)))))))",
+        "(sum 120 0)",
+    ),
+    "closures": (
+        "(define make-adder (lambda (x) (lambda (y) (+ x y))))\n"
+        "(define count (lambda (k acc) (if (= k 0) acc (count (- k 1) ((make-adder k) acc)))))",
+        "(count 100 0)",
+    ),
+}
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, (setup, call) in WORKLOADS.items():
+        evaluators = {engine: Evaluator(engine=engine) for engine in ENGINES}
+        best = {}
+        for evaluator in evaluators.values():
+            evaluator.run(setup)
+        # Interleave the rounds so that machine noise hits every engine alike
+        for _ in range(rounds):
+            for engine, evaluator in evaluators.items():
+                start = time.perf_counter()
+                evaluator.run(call)
+                elapsed = time.perf_counter() - start
+                best[engine] = min(best.get(engine, elapsed), elapsed)
+
+        print(name)
+        baseline = best["tree"]
+        for engine, elapsed in best.items():
+            print(f"  {engine:8s} {elapsed * 1000:8.1f} ms  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
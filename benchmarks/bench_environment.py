@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Environment.get from the leaf of chains 1-64 frames deep.
+
+Compares the previous recursive lookup, the iterative one, and the
+iterative one with the lookup cache. As in a closure call, each lookup
+comes from a fresh frame whose parent is the long-lived chain.
+
+Usage:
+    python benchmarks/bench_environment.py [lookups]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.environment import Environment
+
+DEPTHS = [1, 2, 4, 8, 16, 32, 64]
+
+
+def recursive_get(env, name):
+    """The lookup Environment.get did before it was iterative."""
+    if name in env.bindings:
+        return env.bindings[name]
+    if env.parent is not None:
+        return recursive_get(env.parent, name)
+    raise NameError(f"Undefined variable: {name}")
+
+
+def timed(depth, lookups, get, lookup_cache=False) -> float:
+    """Return nanoseconds per lookup of a root variable."""
+    root = Environment(lookup_cache=lookup_cache)
+    root.define('x', 1)
+    env = root
+    for _ in range(depth - 1):
+        env = Environment(env)
+    frame = Environment(env)
+
+    start = time.perf_counter()
+    for _ in range(lookups):
+        get(frame, 'x')
+    return (time.perf_counter() - start) / lookups * 1e9
+
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{'depth':>5}  {'recursive':>10}  {'iterative':>10}  {'cached':>10}   (ns/lookup)")
+    for depth in DEPTHS:
+        recursive = timed(depth, lookups, recursive_get)
+        iterative = timed(depth, lookups, Environment.get)
+        cached = timed(depth, lookups, Environment.get, lookup_cache=True)
+        print(f"{depth:>5}  {recursive:>10.0f}  {iterative:>10.0f}  {cached:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Frame allocations and time of recursive programs, with and without frame pools.
+
+Frames are counted as they are first initialized; a pooled frame that
+is rebound for another call isn't counted again.
+
+Usage:
+    python benchmarks/bench_frame_pool.py [rounds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.environment import SMALL_ENVIRONMENTS
+from src.tiny_interpreter.evaluator import Evaluator
+
+WORKLOADS = {
+    "fib 15": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 15)",
+    ),
+    "tak 12 8 4": (
+        "(define tak (lambda (x y z) (if (< y x) "
+        "(tak (tak (- x 1) y z) (tak (- y 1) z x) (tak (- z 1) x y)) z)))",
+        "(tak 12 8 4)",
+    ),
+    "ackermann 2 9": (
+        "(define ack (lambda (m n) (if (= m 0) (+ n 1) "
+        "(if (= n 0) (ack (- m 1) 1) (ack (- m 1) (ack m (- n 1)))))))",
+        "(ack 2 9)",
+    ),
+}
+
+
+def count_frames(evaluator, call) -> int:
+    """Number of small frames allocated while running a call."""
+    created = 0
+    originals = {cls: cls.__init__ for cls in SMALL_ENVIRONMENTS.values()}
+
+    def counting_init(frame, parent, names, values):
+        nonlocal created
+        # A new frame's slots are still empty; a reused one has a parent
+        if not hasattr(frame, 'parent'):
+            created += 1
+        originals[type(frame)](frame, parent, names, values)
+
+    for cls in originals:
+        cls.__init__ = counting_init
+    try:
+        evaluator.run(call)
+    finally:
+        for cls, init in originals.items():
+            cls.__init__ = init
+    return created
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, (setup, call) in WORKLOADS.items():
+        evaluators = {"no pools": Evaluator(frame_pools=False),
+                      "frame pools": Evaluator()}
+        for evaluator in evaluators.values():
+            evaluator.run(setup)
+        frames = {label: count_frames(evaluator, call)
+                  for label, evaluator in evaluators.items()}
+        best = {}
+        # Interleave the rounds so that machine noise hits both alike
+        for _ in range(rounds):
+            for label, evaluator in evaluators.items():
+                start = time.perf_counter()
+                evaluator.run(call)
+                elapsed = time.perf_counter() - start
+                best[label] = min(best.get(label, elapsed), elapsed)
+
+        print(name)
+        baseline = best["no pools"]
+        for label, elapsed in best.items():
+            print(f"  {label:12s} {frames[label]:8d} frames  "
+                  f"{elapsed * 1000:8.1f} ms  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Call-heavy programs with dict Environment frames vs. small frames.
+
+Usage:
+    python benchmarks/bench_frames.py [rounds]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.evaluator import Evaluator
+
+WORKLOADS = {
+    "fib 15": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 15)",
+    ),
+    "tak 12 8 4": (
+        "(define tak (lambda (x y z) (if (< y x) "
+        "(tak (tak (- x 1) y z) (tak (- y 1) z x) (tak (- z 1) x y)) z)))",
+        "(tak 12 8 4)",
+    ),
+}
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, (setup, call) in WORKLOADS.items():
+        evaluators = {"dict frames": Evaluator(small_frames=False),
+                      "small frames": Evaluator()}
+        best = {}
+        for evaluator in evaluators.values():
+            evaluator.run(setup)
+        # Interleave the rounds so that machine noise hits both alike
+        for _ in range(rounds):
+            for label, evaluator in evaluators.items():
+                start = time.perf_counter()
+                evaluator.run(call)
+                elapsed = time.perf_counter() - start
+                best[label] = min(best.get(label, elapsed), elapsed)
+
+        print(name)
+        baseline = best["dict frames"]
+        for label, elapsed in best.items():
+            print(f"  {label:13s} {elapsed * 1000:8.1f} ms  ({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
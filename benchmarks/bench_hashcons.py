@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Retained AST memory with and without hash-consing on the corpus.
+
+Usage:
+    python benchmarks/bench_hashcons.py [size_mb]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.hashcons import HashConser, hash_cons
+from src.tiny_interpreter.reader import read
+
+
+def retained(build):
+    """Return (result, bytes still allocated after `build`)."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    source = generate_program(int(size_mb * 1e6))
+    print(f"source: {len(source) / 1e6:.1f} MB")
+
+    _, tree = retained(lambda: read(source))
+    # The HashConser and its table are dropped; only the DAG is retained
+    _, dag = retained(lambda: hash_cons(read(source)))
+
+    nodes = read(source)
+    conser = HashConser()
+    start = time.perf_counter()
+    conser.share(nodes)
+    elapsed = time.perf_counter() - start
+    side_table = len(conser.offsets) * conser.offsets.itemsize
+
+    print(f"  tree         {tree / 1e6:7.1f} MB  ({len(conser.offsets)} nodes)")
+    print(f"  shared DAG   {dag / 1e6:7.1f} MB  ({len(conser)} distinct subtrees, {1 - dag / tree:.0%} less)")
+    print(f"  offsets      {side_table / 1e6:7.1f} MB  (side table, if kept)")
+    print(f"  sharing pass {elapsed * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
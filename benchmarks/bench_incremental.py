@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Latency of incremental re-parsing vs. a full re-parse.
+
+Usage:
+    python benchmarks/bench_incremental.py [forms]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.incremental import Document
+from src.tiny_interpreter.lexer import RegexLexer
+from src.tiny_interpreter.parser import Parser
+
+
+def time_edits(doc, text, bursts, burst_length, rng):
+    """Type `text` repeatedly at random spots; return mean milliseconds per edit.
+
+    Each burst picks a spot right after a "(+" (so every edit really
+    changes a form) and types `burst_length` times there, like a user
+    typing a word.
+    """
+    total = 0.0
+    for _ in range(bursts):
+        offset = doc.source.index('(+ ', rng.randrange(len(doc.source) // 2)) + 2
+        for _ in range(burst_length):
+            start = time.perf_counter()
+            doc.edit(offset, offset, text)
+            total += time.perf_counter() - start
+            offset += len(text)
+    return total / (bursts * burst_length) * 1e3
+
+
+def main():
+    forms = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    source = generate_program(forms * 60)
+    doc = Document(source)
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    Parser(RegexLexer(source).iter_tokens()).parse()
+    full = (time.perf_counter() - start) * 1e3
+
+    typing = time_edits(doc, '+', 20, 10, rng)
+    newlines = time_edits(doc, '\n', 20, 10, rng)
+    jumping = time_edits(doc, '+', 200, 1, rng)
+    start = time.perf_counter()
+    doc.ast
+    flush = (time.perf_counter() - start) * 1e3
+
+    print(f"{len(doc.ast)} forms, {len(source) / 1e3:.0f} KB")
+    print(f"  full re-parse          {full:8.3f} ms")
+    print(f"  typing, same line      {typing:8.3f} ms/edit")
+    print(f"  typing newlines        {newlines:8.3f} ms/edit")
+    print(f"  each edit elsewhere    {jumping:8.3f} ms/edit")
+    print(f"  reading ast after the edits above  {flush:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
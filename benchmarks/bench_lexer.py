@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Lexer throughput benchmark.
+
+Usage:
+    python benchmarks/bench_lexer.py [size_mb]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import Lexer, RegexLexer
+
+
+def measure(lexer_class, source: str) -> float:
+    """Return throughput of `lexer_class` over `source` in MB/s."""
+    start = time.perf_counter()
+    lexer_class(source).tokenize()
+    elapsed = time.perf_counter() - start
+    return len(source) / elapsed / 1e6
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    source = generate_program(int(size_mb * 1e6))
+    assert Lexer(source).tokenize() == RegexLexer(source).tokenize()
+
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    for lexer_class in (Lexer, RegexLexer):
+        print(f"  {lexer_class.__name__:12s} {measure(lexer_class, source):8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
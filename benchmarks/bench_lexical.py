@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Evaluator with name lookup vs. lexical addressing.
+
+The "closures" workload reads variables bound several lambdas out from
+a loop in the innermost one, where name lookup walks the most dicts.
+
+Usage:
+    python benchmarks/bench_lexical.py [repeat]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.evaluator import Evaluator
+
+DEPTH = 8
+NESTED = "".join(f"(lambda (a{i}) " for i in range(DEPTH))
+
+WORKLOADS = {
+    "fib 18": (
+        "(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))",
+        "(fib 18)",
+    ),
+    f"closures, depth {DEPTH}": (
+        f"(define f {NESTED}"
+        "(begin (define loop (lambda (n acc) (if (= n 0) acc "
+        f"(loop (- n 1) (+ acc {' '.join(f'a{i}' for i in range(DEPTH))})))))"
+        " (loop 100 0))" + ")" * DEPTH + ")",
+        "(" * (DEPTH - 1) + "(f 0)" + "".join(f" {i})" for i in range(1, DEPTH)),
+    ),
+}
+
+
+def timed(evaluator, setup, call, repeat) -> float:
+    """Return milliseconds per call."""
+    evaluator.run(setup)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        evaluator.run(call)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, (setup, call) in WORKLOADS.items():
+        by_name = timed(Evaluator(), setup, call, repeat)
+        lexical = timed(Evaluator(lexical_addressing=True), setup, call, repeat)
+        print(f"{name}")
+        print(f"  name lookup         {by_name:8.1f} ms")
+        print(f"  lexical addressing  {lexical:8.1f} ms  ({by_name / lexical:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
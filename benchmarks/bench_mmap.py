@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Parse a large file through str and mmap'd-bytes paths; report MB/s and peak RSS.
+
+Each path runs in a fresh subprocess so peak RSS is not shared.
+
+Usage:
+    python benchmarks/bench_mmap.py [size_mb]
+"""
+
+import mmap
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import BytesLexer, RegexLexer
+from src.tiny_interpreter.main import parse_file_mmap
+from src.tiny_interpreter.parser import Parser, parse
+
+
+def read_text(filename):
+    with open(filename, 'r') as f:
+        return f.read()
+
+
+def lex_mmap(filename):
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            tokens = BytesLexer(data).iter_tokens()
+            for _ in tokens:
+                pass
+
+
+PATHS = {
+    "parse: read + Lexer": lambda filename: parse(read_text(filename)),
+    "parse: read + Regex": lambda filename: Parser(RegexLexer(read_text(filename)).iter_tokens()).parse(),
+    "parse: mmap + Bytes": parse_file_mmap,
+    "lex:   read + Regex": lambda filename: all(RegexLexer(read_text(filename)).iter_tokens()),
+    "lex:   mmap + Bytes": lex_mmap,
+}
+
+
+def child(name, filename):
+    """Parse `filename` with one path and print seconds and peak RSS (KB)."""
+    start = time.perf_counter()
+    PATHS[name](filename)
+    elapsed = time.perf_counter() - start
+    print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.NamedTemporaryFile('w', suffix='.lisp', delete=False) as f:
+        f.write(generate_program(int(size_mb * 1e6)))
+        filename = f.name
+
+    try:
+        size = os.path.getsize(filename)
+        print(f"source: {size / 1e6:.1f} MB")
+        for name in PATHS:
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', name, filename],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            elapsed, rss_kb = float(output[0]), int(output[1])
+            print(f"  {name:20s} {size / elapsed / 1e6:6.2f} MB/s  peak RSS {rss_kb / 1024:7.1f} MB")
+    finally:
+        os.unlink(filename)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
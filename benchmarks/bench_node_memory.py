@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Bytes per AST node: dict-backed dataclasses vs. the slotted nodes.
+
+The "dict" row rebuilds the AST with plain dataclass twins of the node
+classes, the layout the parser used before nodes were slotted.
+
+Usage:
+    python benchmarks/bench_node_memory.py [size_mb]
+"""
+
+import os
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter import parser
+
+
+@dataclass
+class Number:
+    value: int
+    offset: int
+
+
+@dataclass
+class Boolean:
+    value: bool
+    offset: int
+
+
+@dataclass
+class Symbol:
+    name: str
+    offset: int
+
+
+@dataclass
+class SExpression:
+    elements: List[Any]
+    offset: int
+
+
+DICT_NODES = {"Number": Number, "Boolean": Boolean, "Symbol": Symbol, "SExpression": SExpression}
+
+
+def retained(source: str):
+    """Parse `source`; return (bytes still allocated, node count)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = parser.parse(source)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    count = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, parser.SExpression):
+            stack.extend(node.elements)
+    return size, count
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    source = generate_program(int(size_mb * 1e6))
+    print(f"source: {len(source) / 1e6:.1f} MB")
+
+    slotted = {name: getattr(parser, name) for name in DICT_NODES}
+    try:
+        # The parser looks the node classes up as module globals
+        for name, cls in DICT_NODES.items():
+            setattr(parser, name, cls)
+        results = {"dict": retained(source)}
+    finally:
+        for name, cls in slotted.items():
+            setattr(parser, name, cls)
+    results["slots"] = retained(source)
+
+    for name, (size, count) in results.items():
+        print(f"  {name:6s} {count} nodes  {size / 1e6:7.1f} MB  {size / count:6.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Sequential vs. multi-process parsing of one large source.
+
+Usage:
+    python benchmarks/bench_parallel.py [size_mb] [workers...]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import RegexLexer
+from src.tiny_interpreter.parallel import parse_parallel, split_forms
+from src.tiny_interpreter.parser import Parser
+
+
+def timed(func, *args, **kwargs):
+    """Return (result, seconds) of one call."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    counts = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4]
+    source = generate_program(int(size_mb * 1e6))
+
+    print(f"source: {len(source) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+    _, elapsed = timed(split_forms, source, len(source) // 64)
+    print(f"  boundary scan            {elapsed * 1000:8.1f} ms")
+    nodes, base = timed(lambda: Parser(RegexLexer(source).iter_tokens()).parse())
+    print(f"  sequential               {base:8.3f} s")
+
+    for workers in counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Warm the pool so process start-up isn't timed
+            list(pool.map(abs, range(workers)))
+            chunk_size = len(source) // (workers * 4) + 1
+            result, elapsed = timed(parse_parallel, source, chunk_size=chunk_size, executor=pool)
+        assert len(result) == len(nodes)
+        print(f"  {workers} workers                {elapsed:8.3f} s  ({base / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Evaluator.run on recurring snippets, with and without a ParseCache.
+
+Usage:
+    python benchmarks/bench_parse_cache.py [calls]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.cache import ParseCache
+from src.tiny_interpreter.evaluator import Evaluator
+
+SNIPPETS = [
+    "(+ 1 (* 2 3))",
+    "(if (< 3 4) (list 1 2 3) (list))",
+    "((lambda (x y) (if (> x y) (- x y) (- y x))) 17 42)",
+    "(car (cdr (list 1 2 3 4)))",
+    "(begin (define t (+ 40 2)) (* t t))",
+]
+
+
+def timed(evaluator, calls) -> float:
+    """Return microseconds per run over a fixed random snippet mix."""
+    rng = random.Random(0)
+    sources = [rng.choice(SNIPPETS) for _ in range(calls)]
+    start = time.perf_counter()
+    for source in sources:
+        evaluator.run(source)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    plain = timed(Evaluator(), calls)
+    parse_cache = ParseCache(capacity=64)
+    cached = timed(Evaluator(parse_cache=parse_cache), calls)
+
+    print(f"{calls} calls over {len(SNIPPETS)} snippets")
+    print(f"  no cache    {plain:7.1f} us/run")
+    print(f"  ParseCache  {cached:7.1f} us/run  ({plain / cached:.1f}x)  {parse_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
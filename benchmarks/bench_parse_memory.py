@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Peak parse memory: materialized token list vs. lazy token stream.
+
+Usage:
+    python benchmarks/bench_parse_memory.py [size_mb]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import RegexLexer
+from src.tiny_interpreter.parser import Parser
+
+
+def peak_memory(build) -> int:
+    """Return peak traced bytes while calling `build`."""
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    source = generate_program(int(size_mb * 1e6))
+
+    listed = peak_memory(lambda: Parser(RegexLexer(source).tokenize()).parse())
+    streamed = peak_memory(lambda: Parser(RegexLexer(source).iter_tokens()).parse())
+
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    print(f"  token list    peak {listed / 1e6:8.1f} MB")
+    print(f"  token stream  peak {streamed / 1e6:8.1f} MB  ({streamed / listed:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Recursive vs. explicit-stack parser over pre-lexed tokens.
+
+Usage:
+    python benchmarks/bench_parser.py [size_mb]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import RegexLexer
+from src.tiny_interpreter.parser import IterativeParser, Parser
+
+
+def best_of(parser_class, tokens, repeat: int = 3) -> float:
+    """Return the best parse time of `parser_class` over `tokens` in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser_class(tokens).parse()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    source = generate_program(int(size_mb * 1e6))
+    tokens = RegexLexer(source).tokenize()
+    print(f"source: {len(source) / 1e6:.1f} MB, {len(tokens)} tokens")
+    base = None
+    for parser_class in (Parser, IterativeParser):
+        elapsed = best_of(parser_class, tokens)
+        base = base or elapsed
+        print(f"  {parser_class.__name__:16s} {elapsed * 1000:8.1f} ms  ({base / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
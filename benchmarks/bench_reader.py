@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Token pipeline vs. fused reader: parse time and peak memory.
+
+Usage:
+    python benchmarks/bench_reader.py [size_mb]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import RegexLexer
+from src.tiny_interpreter.parser import Parser
+from src.tiny_interpreter.reader import read
+
+PATHS = {
+    "Regex + Parser": lambda source: Parser(RegexLexer(source).iter_tokens()).parse(),
+    "fused reader": read,
+}
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    source = generate_program(int(size_mb * 1e6))
+
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    for name, build in PATHS.items():
+        start = time.perf_counter()
+        build(source)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        build(source)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:16s} {len(source) / elapsed / 1e6:6.2f} MB/s  peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
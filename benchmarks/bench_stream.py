@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Peak memory of whole-file vs. streaming evaluation as scripts grow.
+
+Each run is in a fresh subprocess; peak is measured with tracemalloc.
+Two programs are used: the corpus, which binds a new global closure per
+definition, so its own state grows with its length, and a program of
+plain expressions, which keeps no state at all.
+
+Usage:
+    python benchmarks/bench_stream.py [size_mb...]
+"""
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from corpus import generate_program
+from src.tiny_interpreter.evaluator import Evaluator
+
+
+def expressions_program(size: int) -> str:
+    """Return a program of roughly `size` characters with no definitions."""
+    rng = random.Random(0)
+    parts = []
+    total = 0
+    while total < size:
+        a, b, c = rng.randint(0, 999), rng.randint(0, 999), rng.randint(1, 99)
+        text = f"(if (< {a} {b}) (+ {a} (* {b} {c})) (list {c} #t))\n"
+        parts.append(text)
+        total += len(text)
+    return ''.join(parts)
+
+
+PROGRAMS = {"corpus": generate_program, "expressions": expressions_program}
+
+
+def run_whole(filename):
+    with open(filename) as f:
+        Evaluator().run(f.read())
+
+
+def run_stream(filename):
+    with open(filename) as f:
+        for _ in Evaluator().run_stream(f):
+            pass
+
+
+PATHS = {"run (whole file)": run_whole, "run_stream": run_stream}
+
+
+def child(name, filename):
+    """Run one path and print seconds and peak traced bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    PATHS[name](filename)
+    elapsed = time.perf_counter() - start
+    print(elapsed, tracemalloc.get_traced_memory()[1])
+
+
+def main():
+    sizes = [float(arg) for arg in sys.argv[1:]] or [0.5, 1, 2]
+    for program, size_mb in ((program, size) for program in PROGRAMS for size in sizes):
+        with tempfile.NamedTemporaryFile('w', suffix='.lisp', delete=False) as f:
+            f.write(PROGRAMS[program](int(size_mb * 1e6)))
+            filename = f.name
+        try:
+            print(f"{program}: {size_mb:.1f} MB")
+            for name in PATHS:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', name, filename],
+                    capture_output=True, text=True, check=True
+                ).stdout.split()
+                elapsed, peak = float(output[0]), int(output[1])
+                print(f"  {name:18s} {elapsed:6.2f} s  peak {peak / 1e6:7.1f} MB")
+        finally:
+            os.unlink(filename)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
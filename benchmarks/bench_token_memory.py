@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Memory held by a materialized token list, measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_token_memory.py [size_mb]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from corpus import generate_program
+from src.tiny_interpreter.lexer import Lexer, RegexLexer
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    source = generate_program(int(size_mb * 1e6))
+
+    print(f"source: {len(source) / 1e6:.1f} MB")
+    for lexer_class in (Lexer, RegexLexer):
+        tracemalloc.start()
+        tokens = lexer_class(source).tokenize()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {lexer_class.__name__:12s} {len(tokens):8d} tokens "
+              f"{current / 1e6:7.1f} MB  {current / len(tokens):6.1f} B/token")
+        del tokens
+
+
+if __name__ == "__main__":
+    main()
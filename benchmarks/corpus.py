@@ -0,0 +1,35 @@
+"""Synthetic source generator shared by the benchmarks.
+
+Produces machine-generated style programs: many small top-level
+definitions, nested arithmetic, comments and booleans.
+"""
+
+import random
+
+_TEMPLATES = [
+    "(define {name} (lambda (n) (if (= n 0) {a} (+ n ({name} (- n 1))))))\n",
+    "; generated helper {name}\n(define {name} (* {a} (- {b} {c})))\n",
+    "(define {name} (list {a} {b} -{c} #t #f))\n",
+    "(if (< {a} {b}) (+ {a} (* {b} {c})) (- {c} {a}))\n",
+    "(define {name}\n  (lambda (x y)\n    (begin (define t (+ x y)) (* t {a}))))\n",
+]
+
+
+def generate_program(size: int, seed: int = 0) -> str:
+    """Return a program of roughly `size` characters."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    index = 0
+    while total < size:
+        template = rng.choice(_TEMPLATES)
+        text = template.format(
+            name=f"fn-{index}",
+            a=rng.randint(0, 999),
+            b=rng.randint(0, 99999),
+            c=rng.randint(1, 99),
+        )
+        parts.append(text)
+        total += len(text)
+        index += 1
+    return ''.join(parts)
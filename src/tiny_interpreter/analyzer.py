@@ -0,0 +1,275 @@
+"""Closure compiler for Tiny Interpreter.
+
+The analyzer turns an AST node, once, into a Python function of the
+environment that computes the node's value, like the analyzing
+evaluator of SICP 4.1.7. Special forms are recognized and checked while
+compiling, each function captures the compiled functions of its
+children, and running a program is then nothing but calling them.
+
+Variables are placed while compiling as well. A name can only be bound
+in a call frame by its lambda's parameters or by a define in its body,
+so a reference to a parameter kept in a small frame becomes an
+attribute read, a reference to no enclosing lambda's name a read of
+the global bindings, and only names that a define may bind at run time
+are looked up through the environment.
+"""
+
+from operator import attrgetter
+from typing import Any, Callable, List, Optional
+
+from .environment import Environment, SmallEnvironment
+from .evaluator import Closure, EvaluatorError
+from .parser import ASTNode, Number, Boolean, Symbol, SExpression
+from .resolver import defined_names
+
+# A compiled node: computes the node's value in an environment
+Code = Callable[[Environment], Any]
+
+
+class Scope:
+    """What the compiler knows of the call frames of one lambda."""
+
+    __slots__ = ('params', 'defined', 'small', 'parent')
+
+    def __init__(self, params: List[str], defined: List[str], small: bool,
+                 parent: Optional['Scope']):
+        """Create a scope.
+
+        Args:
+            params: Parameter names.
+            defined: Names that defines in the body may bind.
+            small: Whether the frames are SmallEnvironments.
+            parent: Scope of the lambda this one is nested in.
+        """
+        self.params = params
+        self.defined = defined
+        self.small = small
+        self.parent = parent
+
+
+class Analyzer:
+    """Compiles top-level forms for an Evaluator with engine='closure'.
+
+    Compiled forms run in the evaluator's global environment, and behave
+    exactly like the tree-walking evaluator, errors included: a
+    malformed special form compiles to a function that raises the same
+    error once it runs.
+    """
+
+    def __init__(self, evaluator):
+        """Create an analyzer.
+
+        Args:
+            evaluator: The Evaluator whose global environment, frame
+                classes and frame pools compiled code uses.
+        """
+        self.evaluator = evaluator
+
+    def analyze(self, node: ASTNode, scope: Optional[Scope] = None) -> Code:
+        """Compile a node, in the scope of the lambdas around it."""
+        if isinstance(node, (Number, Boolean)):
+            return constant(node.value)
+
+        if isinstance(node, Symbol):
+            return self.analyze_variable(node.name, scope)
+
+        if isinstance(node, SExpression):
+            elements = node.elements
+            if not elements:
+                return lambda env: []
+
+            first = elements[0]
+            if isinstance(first, Symbol):
+                if first.name == 'define':
+                    return self.analyze_define(elements[1:], scope)
+                if first.name == 'lambda':
+                    return self.analyze_lambda(elements[1:], scope)
+                if first.name == 'if':
+                    return self.analyze_if(elements[1:], scope)
+                if first.name == 'quote':
+                    return self.analyze_quote(elements[1:])
+                if first.name == 'begin':
+                    return self.analyze_sequence(elements[1:], scope)
+
+            return self.analyze_application(elements, scope)
+
+        return error(f"Unknown node type: {type(node)}")
+
+    def analyze_variable(self, name: str, scope: Optional[Scope]) -> Code:
+        """Compile a variable reference."""
+        path = []
+        while scope is not None:
+            if scope.small:
+                if name in scope.params:
+                    # The last of repeated parameters wins, as in a lookup
+                    index = len(scope.params) - 1 - scope.params[::-1].index(name)
+                    path.append(f'value{index}')
+                    return attrgetter('.'.join(path))
+            elif name in scope.params or name in scope.defined:
+                return lambda env: env.get(name)
+            path.append('parent')
+            scope = scope.parent
+
+        bindings = self.evaluator.global_env.bindings
+
+        def global_variable(env):
+            try:
+                return bindings[name]
+            except KeyError:
+                raise NameError(f"Undefined variable: {name}") from None
+        return global_variable
+
+    def analyze_define(self, args: List[ASTNode], scope: Optional[Scope]) -> Code:
+        """Compile (define name value)."""
+        if len(args) != 2:
+            return error(f"define expects 2 arguments, got {len(args)}")
+        if not isinstance(args[0], Symbol):
+            return error("define expects a symbol as first argument")
+
+        name = args[0].name
+        value = self.analyze(args[1], scope)
+
+        def define(env):
+            env.define(name, value(env))
+        return define
+
+    def analyze_lambda(self, args: List[ASTNode], scope: Optional[Scope]) -> Code:
+        """Compile (lambda (params...) body...)."""
+        if len(args) < 2:
+            return error("lambda expects at least 2 arguments")
+        if not isinstance(args[0], SExpression):
+            return error("lambda expects a list of parameters")
+        if not all(isinstance(param, Symbol) for param in args[0].elements):
+            return error("lambda parameters must be symbols")
+
+        params = [param.name for param in args[0].elements]
+        body = args[1:]
+        # Frame layout is the same for every closure of this lambda
+        layout = Closure(params, body, None)
+        frame_class = self.evaluator.frame_class(layout)
+        layout.frame_class = frame_class
+        frame_pool = self.evaluator.frame_pool(layout)
+        inner = Scope(params, defined_names(body),
+                      issubclass(frame_class, SmallEnvironment), scope)
+        code = self.analyze_sequence(body, inner)
+
+        def make_closure(env):
+            closure = Closure(params, body, env)
+            closure.code = code
+            closure.frame_class = frame_class
+            closure.frame_pool = frame_pool
+            return closure
+        return make_closure
+
+    def analyze_if(self, args: List[ASTNode], scope: Optional[Scope]) -> Code:
+        """Compile (if condition then-expr else-expr)."""
+        if len(args) != 3:
+            return error(f"if expects 3 arguments, got {len(args)}")
+
+        condition, consequent, alternative = (self.analyze(arg, scope) for arg in args)
+
+        def if_(env):
+            if condition(env):
+                return consequent(env)
+            return alternative(env)
+        return if_
+
+    def analyze_quote(self, args: List[ASTNode]) -> Code:
+        """Compile (quote expr)."""
+        if len(args) != 1:
+            return error(f"quote expects 1 argument, got {len(args)}")
+
+        datum = args[0]
+        if isinstance(datum, SExpression):
+            # A new list each time, as the tree walker builds one
+            ast_to_value = self.evaluator.ast_to_value
+            return lambda env: ast_to_value(datum)
+        return constant(self.evaluator.ast_to_value(datum))
+
+    def analyze_sequence(self, exprs: List[ASTNode], scope: Optional[Scope]) -> Code:
+        """Compile expressions run in order, whose value is the last one's."""
+        codes = [self.analyze(expr, scope) for expr in exprs]
+        if not codes:
+            return constant(None)
+        if len(codes) == 1:
+            return codes[0]
+
+        def sequence(env):
+            result = None
+            for code in codes:
+                result = code(env)
+            return result
+        return sequence
+
+    def analyze_application(self, elements: List[ASTNode], scope: Optional[Scope]) -> Code:
+        """Compile (func arg1 arg2 ...).
+
+        Calls with up to three arguments build the argument list
+        directly instead of looping over the compiled arguments.
+        """
+        operator = self.analyze(elements[0], scope)
+        operands = [self.analyze(arg, scope) for arg in elements[1:]]
+
+        if len(operands) == 0:
+            def application(env):
+                return apply(operator(env), [])
+        elif len(operands) == 1:
+            a, = operands
+
+            def application(env):
+                return apply(operator(env), [a(env)])
+        elif len(operands) == 2:
+            a, b = operands
+
+            def application(env):
+                return apply(operator(env), [a(env), b(env)])
+        elif len(operands) == 3:
+            a, b, c = operands
+
+            def application(env):
+                return apply(operator(env), [a(env), b(env), c(env)])
+        else:
+            def application(env):
+                return apply(operator(env), [operand(env) for operand in operands])
+        return application
+
+
+def apply(func: Any, args: List[Any]) -> Any:
+    """Call a built-in function or a compiled closure."""
+    if isinstance(func, Closure):
+        if len(args) != len(func.params):
+            raise EvaluatorError(
+                f"Function expects {len(func.params)} arguments, got {len(args)}"
+            )
+
+        frame_class = func.frame_class
+        if frame_class is Environment:
+            frame = Environment(func.env)
+            for param, arg in zip(func.params, args):
+                frame.define(param, arg)
+            return func.code(frame)
+
+        pool = func.frame_pool
+        if pool is None:
+            return func.code(frame_class(func.env, func.params, args))
+        frame = pool.acquire(func.env, func.params, args)
+        result = func.code(frame)
+        pool.release(frame)
+        return result
+
+    if callable(func):
+        return func(*args)
+
+    raise EvaluatorError(f"Not a function: {func}")
+
+
+def constant(value: Any) -> Code:
+    """Compiled code of a constant."""
+    return lambda env: value
+
+
+def error(message: str) -> Code:
+    """Compiled code of a malformed form, which raises when it runs."""
+    def raise_error(env):
+        raise EvaluatorError(message)
+    return raise_error
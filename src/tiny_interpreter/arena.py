@@ -0,0 +1,234 @@
+"""Flat AST arena for Tiny Interpreter.
+
+An Arena stores an AST as parallel array.array columns instead of one
+Python object per node. Node i is described by kinds[i], payloads[i],
+first_child[i], child_count[i] and offsets[i]; the children of a list
+are stored contiguously, so walking the tree is index arithmetic.
+Offsets follow the AST nodes: a root's is its offset in the source, any
+other node's is relative to its root.
+
+Payloads index into the constants table (numbers) or the symbols table
+(symbol names); a boolean's payload is 0 or 1. Lists have no payload.
+"""
+
+import sys
+from array import array
+from collections import deque
+from enum import IntEnum
+from typing import Dict, Iterator, List
+
+from .lexer import LexerError, TOKEN_PATTERN
+from .parser import ASTNode, Boolean, Number, ParserError, SExpression, Symbol
+from .source_map import SourceMap
+
+
+class NodeKind(IntEnum):
+    """Kinds of arena nodes."""
+    NUMBER = 0
+    BOOLEAN = 1
+    SYMBOL = 2
+    SEXPRESSION = 3
+
+
+_NODE_CLASSES = {Number: NodeKind.NUMBER, Boolean: NodeKind.BOOLEAN,
+                 Symbol: NodeKind.SYMBOL, SExpression: NodeKind.SEXPRESSION}
+
+
+class Arena:
+    """An AST stored as parallel arrays."""
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.payloads = array('i')
+        self.first_child = array('i')
+        self.child_count = array('i')
+        self.offsets = array('i')
+        self.roots = array('i')
+        self.constants: List[int] = []
+        self.symbols: List[str] = []
+        self._constant_index: Dict[int, int] = {}
+        self._symbol_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def constant(self, value: int) -> int:
+        """Index of a number in the constants table, adding it if new."""
+        index = self._constant_index.get(value)
+        if index is None:
+            index = self._constant_index[value] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def symbol(self, name: str) -> int:
+        """Index of a name in the symbols table, adding it if new."""
+        index = self._symbol_index.get(name)
+        if index is None:
+            index = self._symbol_index[name] = len(self.symbols)
+            self.symbols.append(name)
+        return index
+
+    def reserve(self, count: int) -> int:
+        """Append `count` blank nodes and return the index of the first."""
+        first = len(self.kinds)
+        zeros = [0] * count
+        for column in (self.kinds, self.payloads, self.first_child, self.child_count,
+                       self.offsets):
+            column.extend(zeros)
+        return first
+
+    def children(self, index: int) -> range:
+        """Indices of a list node's children."""
+        first = self.first_child[index]
+        return range(first, first + self.child_count[index])
+
+    def value(self, index: int):
+        """The number, boolean or symbol name of an atom node."""
+        kind = self.kinds[index]
+        if kind == NodeKind.NUMBER:
+            return self.constants[self.payloads[index]]
+        if kind == NodeKind.BOOLEAN:
+            return bool(self.payloads[index])
+        if kind == NodeKind.SYMBOL:
+            return self.symbols[self.payloads[index]]
+        raise ValueError(f"Node {index} is a list, not an atom")
+
+    @classmethod
+    def from_nodes(cls, nodes: List[ASTNode]) -> 'Arena':
+        """Convert an AST into an arena."""
+        arena = cls()
+        first = arena.reserve(len(nodes))
+        arena.roots.extend(range(first, first + len(nodes)))
+        queue = deque(zip(arena.roots, nodes))
+
+        while queue:
+            index, node = queue.popleft()
+            kind = _NODE_CLASSES[type(node)]
+            arena.kinds[index] = kind
+            arena.offsets[index] = node.offset
+            if kind == NodeKind.SEXPRESSION:
+                count = len(node.elements)
+                first = arena.reserve(count)
+                arena.first_child[index] = first
+                arena.child_count[index] = count
+                queue.extend(zip(range(first, first + count), node.elements))
+            elif kind == NodeKind.NUMBER:
+                arena.payloads[index] = arena.constant(node.value)
+            elif kind == NodeKind.BOOLEAN:
+                arena.payloads[index] = node.value
+            else:
+                arena.payloads[index] = arena.symbol(node.name)
+
+        return arena
+
+    @classmethod
+    def from_source(cls, source: str) -> 'Arena':
+        """Read source code straight into an arena.
+
+        No AST objects are created. Accepts the same language, and
+        raises the same errors, as parse().
+        """
+        arena = cls()
+        position = SourceMap(source).position
+        intern = sys.intern
+        # Finished nodes of the innermost open list, as column tuples;
+        # a list's children are only written once it closes, so they
+        # end up contiguous
+        pending: List[tuple] = []
+        # Enclosing pending lists, each with its open paren's offset
+        stack = []
+        # Offset of the current top-level form
+        form = 0
+
+        for match in TOKEN_PATTERN.finditer(source):
+            kind = match.lastgroup
+            start = match.start(kind)
+            if stack:
+                offset = start - form
+            else:
+                offset = form = start
+
+            if kind == 'SYMBOL':
+                name = arena.symbol(intern(match.group(kind)))
+                pending.append((NodeKind.SYMBOL, name, 0, 0, offset))
+            elif kind == 'LPAREN':
+                stack.append((pending, offset))
+                pending = []
+            elif kind == 'RPAREN':
+                if not stack:
+                    raise ParserError("Unexpected token: RPAREN", *position(start))
+                first = arena._append(pending)
+                count = len(pending)
+                pending, offset = stack.pop()
+                pending.append((NodeKind.SEXPRESSION, 0, first, count, offset))
+            elif kind == 'NUMBER':
+                constant = arena.constant(int(match.group(kind)))
+                pending.append((NodeKind.NUMBER, constant, 0, 0, offset))
+            elif kind == 'BOOLEAN':
+                value = int(match.group(kind) == '#t')
+                pending.append((NodeKind.BOOLEAN, value, 0, 0, offset))
+            elif kind == 'EOF':
+                if stack:
+                    raise ParserError("Unexpected EOF, expected ')'", *position(start))
+                first = arena._append(pending)
+                arena.roots.extend(range(first, first + len(pending)))
+                return arena
+            elif kind == 'HASH':
+                char = source[start + 1] if start + 1 < len(source) else None
+                raise LexerError(f"Invalid boolean: #{char}", *position(start))
+            else:
+                raise LexerError(f"Unexpected character: {match.group(kind)!r}", *position(start))
+
+        return arena
+
+    def _append(self, records: List[tuple]) -> int:
+        """Append nodes given as column tuples; return the first index."""
+        first = len(self.kinds)
+        if records:
+            kinds, payloads, firsts, counts, offsets = zip(*records)
+            self.kinds.extend(kinds)
+            self.payloads.extend(payloads)
+            self.first_child.extend(firsts)
+            self.child_count.extend(counts)
+            self.offsets.extend(offsets)
+        return first
+
+    def to_node(self, index: int) -> ASTNode:
+        """Build the AST for the subtree rooted at a node."""
+        kinds, payloads = self.kinds, self.payloads
+        first_child, child_count = self.first_child, self.child_count
+        offsets = self.offsets
+        constants, symbols = self.constants, self.symbols
+
+        result: List[ASTNode] = []
+        # Element lists to fill, each with the range of nodes that fill it
+        stack = [(result, index, index + 1)]
+        while stack:
+            elements, start, end = stack.pop()
+            for child in range(start, end):
+                kind = kinds[child]
+                if kind == NodeKind.SYMBOL:
+                    element = Symbol(symbols[payloads[child]], offsets[child])
+                elif kind == NodeKind.SEXPRESSION:
+                    element = SExpression([], offsets[child])
+                    first = first_child[child]
+                    stack.append((element.elements, first, first + child_count[child]))
+                elif kind == NodeKind.NUMBER:
+                    element = Number(constants[payloads[child]], offsets[child])
+                else:
+                    element = Boolean(bool(payloads[child]), offsets[child])
+                elements.append(element)
+        return result[0]
+
+    def iter_nodes(self) -> Iterator[ASTNode]:
+        """Build the AST one top-level form at a time.
+
+        Lets consumers of ASTNode, such as Evaluator.run_ast, run an
+        arena while only one form is materialized at once.
+        """
+        for index in self.roots:
+            yield self.to_node(index)
+
+    def to_nodes(self) -> List[ASTNode]:
+        """Build the whole AST."""
+        return list(self.iter_nodes())
@@ -0,0 +1,368 @@
+"""AST caches for Tiny Interpreter.
+
+Like __pycache__, the parsed form of a script is saved next to it, in
+a __tlcache__ directory, so that later runs skip lexing and parsing.
+ParseCache is the in-memory counterpart for snippets that are run over
+and over.
+
+A cache file starts with a fixed header: magic, format version, the
+layout of the stored arrays, the source's mtime, size and content hash,
+and the length of the body. It is used only if all three still match
+the source. The body is a sequence of marshal records, each an Arena
+holding a batch of consecutive top-level forms, so that the cache can
+be written while a program is streamed and read back a batch at a time.
+A record that turns out to be unreadable makes the file a miss too.
+"""
+
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .arena import Arena
+from .parser import ASTNode, SExpression, parse as parse_source
+
+CACHE_DIR = "__tlcache__"
+MAGIC = b"TLAC"
+# Bump whenever the body layout or the node model changes
+FORMAT_VERSION = 3
+# Top-level forms per body record
+BATCH_SIZE = 256
+
+# magic, version, array item size, byte order, mtime (ns), size, digest, body length
+_HEADER = struct.Struct("<4sHBcqq16sq")
+_BYTE_ORDER = sys.byteorder[0].encode()
+_ITEM_SIZE = array('i').itemsize
+_COLUMNS = ('kinds', 'payloads', 'first_child', 'child_count', 'offsets', 'roots')
+_READ_SIZE = 1 << 20
+
+# (mtime in ns, size, content digest) of a source file
+SourceKey = Tuple[int, int, bytes]
+
+
+class CacheError(Exception):
+    """Raised while iterating a cache file whose body turns out to be unreadable."""
+    pass
+
+
+def cache_path(filename: str) -> str:
+    """Path of the cache file for a source file."""
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, CACHE_DIR, name + ".tlc")
+
+
+def source_key(filename: str) -> SourceKey:
+    """Read a source file's mtime, size and content digest."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        for block in iter(lambda: f.read(_READ_SIZE), b''):
+            digest.update(block)
+    return stat.st_mtime_ns, stat.st_size, digest.digest()
+
+
+def _header(key: SourceKey, body_length: int) -> bytes:
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, _ITEM_SIZE, _BYTE_ORDER, *key, body_length)
+
+
+def _dump_arena(arena: Arena) -> tuple:
+    """An arena as a marshal-able record."""
+    return [getattr(arena, name).tobytes() for name in _COLUMNS], arena.constants, arena.symbols
+
+
+def _load_arena(record: tuple) -> Arena:
+    """Rebuild an arena from a record made by _dump_arena."""
+    columns, constants, symbols = record
+    arena = Arena()
+    for name, raw in zip(_COLUMNS, columns):
+        getattr(arena, name).frombytes(raw)
+    arena.constants = constants
+    arena.symbols = [sys.intern(name) for name in symbols]
+    arena._constant_index = {value: index for index, value in enumerate(constants)}
+    arena._symbol_index = {name: index for index, name in enumerate(arena.symbols)}
+    return arena
+
+
+def load(filename: str, key: Optional[SourceKey] = None) -> Optional[Iterator[ASTNode]]:
+    """Open the cached AST of a source file if it is fresh.
+
+    Returns:
+        The cached top-level forms, rebuilt a batch at a time as they are
+        iterated, or None if there is no fresh, complete cache file.
+        Only the header is checked here: a body record that can't be
+        read raises CacheError during iteration, after the file has
+        been removed.
+    """
+    try:
+        f = open(cache_path(filename), 'rb')
+    except OSError:
+        return None
+
+    try:
+        header = f.read(_HEADER.size)
+        if len(header) == _HEADER.size:
+            magic, version, item_size, byte_order, *stored_key, body_length = _HEADER.unpack(header)
+            if ((magic, version, item_size, byte_order) == (MAGIC, FORMAT_VERSION, _ITEM_SIZE, _BYTE_ORDER)
+                    and os.fstat(f.fileno()).st_size == _HEADER.size + body_length
+                    and tuple(stored_key) == (key or source_key(filename))):
+                return _iter_records(f, body_length)
+    except BaseException:
+        f.close()
+        raise
+    f.close()
+    return None
+
+
+def _iter_records(f, body_length: int) -> Iterator[ASTNode]:
+    """Yield the forms of each body record, then close the file.
+
+    Raises:
+        CacheError: If a record is corrupt; the cache file is removed.
+    """
+    with f:
+        while f.tell() < _HEADER.size + body_length:
+            try:
+                # A whole batch at once, so that a damaged record fails
+                # before any of its forms is handed out
+                nodes = list(_load_arena(marshal.load(f)).iter_nodes())
+            except Exception as e:
+                f.close()
+                try:
+                    os.remove(f.name)
+                except OSError:
+                    pass
+                raise CacheError(f"Unreadable cache file: {f.name}") from e
+            yield from nodes
+
+
+class CacheWriter:
+    """Writes a source file's forms to its cache file as they come.
+
+    Forms are buffered into batches, and the file only replaces the old
+    cache once commit() is called after the last form. Failing to
+    write, e.g. in a read-only directory, is not an error: the cache is
+    just not written.
+    """
+
+    def __init__(self, filename: str, key: SourceKey, batch_size: int = BATCH_SIZE):
+        self.path = cache_path(filename)
+        self.key = key
+        self.batch_size = batch_size
+        self._batch: List[ASTNode] = []
+        self._file = None
+        self._temp = None
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, self._temp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            self._file = os.fdopen(fd, 'wb')
+            self._file.write(_header(key, 0))
+        except OSError:
+            self.discard()
+
+    def add(self, node: ASTNode):
+        """Add the next top-level form."""
+        if self._file is not None:
+            self._batch.append(node)
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+
+    def _flush(self):
+        if self._batch:
+            batch = self._batch
+            self._batch = []
+            try:
+                # An offset past the arena's 32-bit columns, in a script
+                # over 2 GiB, overflows: such a script is not cached
+                marshal.dump(_dump_arena(Arena.from_nodes(batch)), self._file)
+            except (OSError, OverflowError, ValueError):
+                self.discard()
+
+    def commit(self) -> bool:
+        """Finish the cache file and move it into place.
+
+        Returns:
+            Whether the cache file was written.
+        """
+        if self._file is None:
+            return False
+        self._flush()
+        if self._file is None:
+            # The last batch could not be written
+            return False
+        try:
+            body_length = self._file.tell() - _HEADER.size
+            self._file.seek(0)
+            self._file.write(_header(self.key, body_length))
+            self._file.close()
+            self._file = None
+            os.replace(self._temp, self.path)
+        except OSError:
+            self.discard()
+            return False
+        return True
+
+    def discard(self):
+        """Drop the partly written cache file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._temp is not None:
+            try:
+                os.unlink(self._temp)
+            except OSError:
+                pass
+            self._temp = None
+
+
+def clear(filename: str) -> bool:
+    """Remove the cached AST of a source file.
+
+    Returns:
+        Whether there was a cache file to remove.
+    """
+    try:
+        os.remove(cache_path(filename))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def load_or_parse(filename: str, parse: Callable[[], Iterable[ASTNode]]) -> Iterator[ASTNode]:
+    """Stream a source file's AST from the cache, or parse and cache it.
+
+    Args:
+        filename: Path of the source file.
+        parse: Parses the file when the cache is missing or stale; may
+            return its forms lazily.
+
+    Yields:
+        The top-level forms. Parsed forms are written to the cache as
+        they pass through, and the cache file is kept only if every
+        form is consumed. If the cache file turns out to be corrupt
+        partway, the file is parsed instead, and the forms already
+        yielded are skipped.
+    """
+    key = source_key(filename)
+    cached = load(filename, key)
+    done = 0
+    if cached is not None:
+        try:
+            for node in cached:
+                yield node
+                done += 1
+            return
+        except CacheError:
+            pass
+
+    writer = CacheWriter(filename, key)
+    try:
+        for index, node in enumerate(parse()):
+            writer.add(node)
+            if index >= done:
+                yield node
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+
+
+class ParseCache:
+    """Bounded LRU cache from source text to its parsed AST.
+
+    Entries are evicted, least recently used first, once there are more
+    than `capacity` of them or their estimated size exceeds `max_bytes`.
+    Long sources are keyed by a digest, so the cache doesn't keep their
+    text alive.
+
+    Cached ASTs are shared by every caller that parses the same source.
+    That is safe because the evaluator never mutates nodes; the forms
+    are handed out as a tuple so the sequence can't be changed either.
+    """
+
+    # Sources longer than this are keyed by digest
+    DIGEST_THRESHOLD = 256
+
+    def __init__(self, capacity: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 parse: Callable[[str], List[ASTNode]] = parse_source):
+        """Create a parse cache.
+
+        Args:
+            capacity: Maximum number of cached sources.
+            max_bytes: Maximum estimated size of the cached ASTs.
+            parse: Parses a source on a miss.
+        """
+        if capacity < 1 or max_bytes < 1:
+            raise ValueError("ParseCache capacity and max_bytes must be positive")
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self._parse = parse
+        # key -> (forms, estimated bytes), least recently used first
+        self._entries: 'OrderedDict[Union[str, bytes], Tuple[Tuple[ASTNode, ...], int]]' = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, source: str) -> Union[str, bytes]:
+        if len(source) <= self.DIGEST_THRESHOLD:
+            return source
+        return hashlib.blake2b(source.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def parse(self, source: str) -> Tuple[ASTNode, ...]:
+        """Return the parsed forms of a source, parsing it on a miss.
+
+        Raises:
+            LexerError, ParserError: If the source does not parse. Errors
+                are not cached.
+        """
+        key = self._key(source)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        forms = tuple(self._parse(source))
+        size = sys.getsizeof(key) + _ast_size(forms)
+        if size <= self.max_bytes:
+            self._entries[key] = (forms, size)
+            self.size += size
+            while len(self._entries) > self.capacity or self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return forms
+
+    def clear(self):
+        """Drop every entry; the counters are kept."""
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        """The counters and current usage, e.g. for metrics export."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "bytes": self.size}
+
+
+def _ast_size(forms: Tuple[ASTNode, ...]) -> int:
+    """Estimate the bytes held by an AST: its nodes, lists and tuple."""
+    getsizeof = sys.getsizeof
+    size = getsizeof(forms)
+    stack = list(forms)
+    while stack:
+        node = stack.pop()
+        size += getsizeof(node)
+        if isinstance(node, SExpression):
+            size += getsizeof(node.elements)
+            stack.extend(node.elements)
+    return size
+
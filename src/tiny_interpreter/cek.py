@@ -0,0 +1,213 @@
+"""Explicit-stack evaluator for Tiny Interpreter.
+
+The CEK machine evaluates the AST directly, like Evaluator.eval, but
+never recurses in Python. Its state is the expression being evaluated
+(Control), the Environment, and a list of continuation frames (Kont)
+that say what to do with each value once it is known. Evaluating a
+subexpression pushes a frame instead of calling eval, so Lisp recursion
+depth is limited by memory rather than by Python's recursion limit.
+
+A continuation frame is a tuple whose first item is its kind:
+
+    (IF, elements, env)               choose a branch of (if c a b)
+    (BEGIN, exprs, index, env)        go on with exprs[index]
+    (DEFINE, name, env)               bind the value
+    (ARGS, elements, env, values)     collect the values of an application
+
+Expressions in tail position are evaluated without pushing a frame, so
+tail calls run in constant space. Operands that are numbers, booleans
+or symbols are evaluated on the spot rather than through the stack,
+which keeps the per-step cost close to the tree walker's.
+
+Special forms are looked up in the evaluator's registry. if, define
+and begin go through the stack; the others, including forms an
+embedder registers, are left to their handlers, which evaluate
+operands with the tree walker.
+"""
+
+from typing import Any, List
+
+from .environment import Environment
+from .evaluator import Closure, EvaluatorError
+from .parser import ASTNode, Number, Boolean, Symbol, SExpression
+
+# Kinds of continuation frames
+IF = 0
+BEGIN = 1
+DEFINE = 2
+ARGS = 3
+
+
+class CEKMachine:
+    """Runs top-level forms for an Evaluator with engine='cek'.
+
+    Closures, frames and errors are the tree walker's: a closure's frame
+    class is chosen by Evaluator.frame_class, though frames are not
+    pooled, and every error is raised with the same message.
+    """
+
+    def __init__(self, evaluator):
+        """Create a machine.
+
+        Args:
+            evaluator: The Evaluator whose special-form helpers and frame
+                classes the machine uses.
+        """
+        self.evaluator = evaluator
+
+    def execute(self, node: ASTNode, env: Environment) -> Any:
+        """Evaluate a node in an environment.
+
+        Args:
+            node: AST node to evaluate.
+            env: Environment for variable lookups.
+
+        Returns:
+            The result of evaluation.
+        """
+        evaluator = self.evaluator
+        special_forms = evaluator.special_forms
+        stack: List[tuple] = []
+        value: Any = None
+
+        while True:
+            if node is not None:
+                # Evaluate `node`: to a value, or by descending into a part
+                if isinstance(node, (Number, Boolean)):
+                    value = node.value
+                    node = None
+                    continue
+
+                if isinstance(node, Symbol):
+                    value = env.get(node.name)
+                    node = None
+                    continue
+
+                if not isinstance(node, SExpression):
+                    raise EvaluatorError(f"Unknown node type: {type(node)}")
+
+                elements = node.elements
+                if not elements:
+                    value = []  # Empty list
+                    node = None
+                    continue
+
+                first = elements[0]
+                form = special_forms.get(first.name) if type(first) is Symbol else None
+                if form is not None:
+                    name = first.name
+                    if name == 'if':
+                        if len(elements) != 4:
+                            raise EvaluatorError(f"if expects 3 arguments, got {len(elements) - 1}")
+                        stack.append((IF, elements, env))
+                        node = elements[1]
+                        continue
+
+                    if name == 'define':
+                        if len(elements) != 3:
+                            raise EvaluatorError(f"define expects 2 arguments, got {len(elements) - 1}")
+                        if not isinstance(elements[1], Symbol):
+                            raise EvaluatorError("define expects a symbol as first argument")
+                        stack.append((DEFINE, elements[1].name, env))
+                        node = elements[2]
+                        continue
+
+                    if name == 'begin':
+                        if len(elements) == 1:
+                            value = None
+                            node = None
+                            continue
+                        if len(elements) > 2:
+                            stack.append((BEGIN, elements, 2, env))
+                        node = elements[1]
+                        continue
+
+                    # lambda, quote and registered forms: a tail form's
+                    # expression goes on in place of the form
+                    handler, tail = form
+                    value = handler(elements[1:], env)
+                    if tail:
+                        node = value
+                        value = None
+                    else:
+                        node = None
+                    continue
+
+                # Function application
+                values: List[Any] = []
+
+            else:
+                # Apply the innermost continuation to `value`
+                if not stack:
+                    return value
+
+                frame = stack.pop()
+                kind = frame[0]
+                if kind == ARGS:
+                    _, elements, env, values = frame
+                    values.append(value)
+
+                elif kind == IF:
+                    _, elements, env = frame
+                    node = elements[2] if value else elements[3]
+                    continue
+
+                elif kind == BEGIN:
+                    _, exprs, index, env = frame
+                    if index + 1 < len(exprs):
+                        stack.append((BEGIN, exprs, index + 1, env))
+                    node = exprs[index]
+                    continue
+
+                else:
+                    frame[2].define(frame[1], value)
+                    value = None
+                    continue
+
+            # Collect the values of the operator and operands, in order
+            count = len(elements)
+            index = len(values)
+            while index < count:
+                element = elements[index]
+                if isinstance(element, Symbol):
+                    values.append(env.get(element.name))
+                elif isinstance(element, (Number, Boolean)):
+                    values.append(element.value)
+                else:
+                    break
+                index += 1
+            if index < count:
+                stack.append((ARGS, elements, env, values))
+                node = elements[index]
+                continue
+
+            func = values[0]
+            if isinstance(func, Closure):
+                args = values[1:]
+                if len(args) != len(func.params):
+                    raise EvaluatorError(
+                        f"Function expects {len(func.params)} arguments, got {len(args)}"
+                    )
+                frame_class = func.frame_class
+                if frame_class is None:
+                    frame_class = func.frame_class = evaluator.frame_class(func)
+                if frame_class is Environment:
+                    env = Environment(func.env)
+                    for param, arg in zip(func.params, args):
+                        env.define(param, arg)
+                else:
+                    env = frame_class(func.env, func.params, args)
+
+                # The body's last expression is in tail position
+                body = func.body
+                if len(body) > 1:
+                    stack.append((BEGIN, body, 1, env))
+                node = body[0]
+                continue
+
+            if callable(func):
+                value = func(*values[1:])
+                node = None
+                continue
+
+            raise EvaluatorError(f"Not a function: {func}")
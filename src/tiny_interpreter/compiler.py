@@ -0,0 +1,283 @@
+"""Bytecode compiler for Tiny Interpreter.
+
+The compiler turns a top-level form into a CodeObject for the virtual
+machine in vm.py: an array of integer opcodes, each followed by its
+operands, and a pool of constants the operands index.
+
+Variables are addressed as the resolver lays them out: a lambda's frame
+has a slot for each parameter and each name its body defines, and
+references to them load a slot by frame depth and index. A slot for a
+defined name can still be UNBOUND when it is read, so those loads check
+and fall back to a lookup by name. Every other name is a global, read
+through a global slot: an index into a table of names the compiler
+shares with the VM, which keeps each name's Cell.
+
+Malformed special forms compile to a RAISE of the error the tree
+walker would raise, so that they fail when, and only when, they run.
+"""
+
+from array import array
+from typing import Any, Dict, List, Optional
+
+from .parser import ASTNode, Number, Boolean, Symbol, SExpression
+from .resolver import GlobalRef, Lambda, LocalDefine, LocalRef, Resolver
+
+# Opcodes, and the operands that follow each in the instruction array
+CONST = 0          # index: push constants[index]
+LOAD_LOCAL = 1     # index: push a parameter of the current frame
+LOAD_OUTER = 2     # depth index: push a parameter of an enclosing frame
+LOAD_BOUND = 3     # depth index name: push a defined slot, or look name up if unbound
+LOAD_GLOBAL = 4    # slot: push a global variable
+DEFINE_LOCAL = 5   # index: pop into a slot of the current frame, push None
+DEFINE_GLOBAL = 6  # slot: pop into a global variable, push None
+MAKE_CLOSURE = 7   # index: push a closure of the CodeObject constants[index]
+QUOTE = 8          # index: push the value of the quoted AST constants[index]
+POP = 9            # discard the top of the stack
+JUMP = 10          # target: continue at target
+JUMP_IF_FALSE = 11  # target: pop, and continue at target if false
+CALL = 12          # count: call the function below `count` arguments
+RETURN = 13        # return the top of the stack to the caller
+RAISE = 14         # index: raise EvaluatorError(constants[index])
+
+OPNAMES = ['CONST', 'LOAD_LOCAL', 'LOAD_OUTER', 'LOAD_BOUND', 'LOAD_GLOBAL',
+           'DEFINE_LOCAL', 'DEFINE_GLOBAL', 'MAKE_CLOSURE', 'QUOTE', 'POP', 'JUMP',
+           'JUMP_IF_FALSE', 'CALL', 'RETURN', 'RAISE']
+
+# Number of operands of each opcode
+OPERANDS = [1, 1, 2, 3, 1, 1, 1, 1, 1, 0, 1, 1, 1, 0, 1]
+
+
+class CodeObject:
+    """Compiled code of a lambda body or a top-level form."""
+
+    __slots__ = ('name', 'code', 'constants', 'constant_indices', 'params', 'slots', 'size')
+
+    def __init__(self, name: str, params: List[str], slots: Dict[str, int], size: int):
+        """Create an empty code object.
+
+        Args:
+            name: Label for disassembly.
+            params: Parameter names.
+            slots: Slot index of each parameter and defined name.
+            size: Number of slots in a frame.
+        """
+        self.name = name
+        self.code = array('l')
+        self.constants: List[Any] = []
+        # Index of each constant, by the key Compiler.constant looks it up by
+        self.constant_indices: Dict[Any, int] = {}
+        self.params = params
+        self.slots = slots
+        self.size = size
+
+    def __repr__(self):
+        return f"<code {self.name}>"
+
+
+class Compiler:
+    """Compiles top-level forms to CodeObjects.
+
+    Global slots are numbered per compiler, in the order names are first
+    seen, and stay valid for every form it compiles.
+    """
+
+    def __init__(self):
+        self.resolver = Resolver()
+        # Name of each global slot
+        self.globals: List[str] = []
+        self.global_slots: Dict[str, int] = {}
+
+    def compile(self, node: ASTNode) -> CodeObject:
+        """Compile a top-level form."""
+        code = CodeObject("<form>", [], {}, 0)
+        self.compile_node(self.resolver.resolve(node), code, [])
+        self.emit(code, RETURN)
+        return code
+
+    def compile_node(self, node, code: CodeObject, lambdas: List[Lambda]):
+        """Emit the instructions that push a resolved node's value.
+
+        Args:
+            node: A node of the resolved AST.
+            code: Code object to emit into.
+            lambdas: The enclosing lambdas, innermost last.
+        """
+        if isinstance(node, (Number, Boolean)):
+            self.emit(code, CONST, self.constant(code, node.value))
+
+        elif isinstance(node, LocalRef):
+            params = lambdas[-1 - node.depth].params
+            if node.index >= len(params):
+                self.emit(code, LOAD_BOUND, node.depth, node.index,
+                          self.constant(code, node.name))
+            elif node.depth == 0:
+                self.emit(code, LOAD_LOCAL, node.index)
+            else:
+                self.emit(code, LOAD_OUTER, node.depth, node.index)
+
+        elif isinstance(node, (GlobalRef, Symbol)):
+            self.emit(code, LOAD_GLOBAL, self.global_slot(node.name))
+
+        elif isinstance(node, LocalDefine):
+            self.compile_node(node.value, code, lambdas)
+            self.emit(code, DEFINE_LOCAL, node.index)
+
+        elif isinstance(node, Lambda):
+            body = CodeObject(f"<lambda {node.params}>", node.params, node.slots, node.size)
+            self.compile_body(node.body, body, lambdas + [node])
+            self.emit(code, MAKE_CLOSURE, self.constant(code, body))
+
+        elif isinstance(node, SExpression):
+            self.compile_expression(node, code, lambdas)
+
+        else:
+            self.error(code, f"Unknown node type: {type(node)}")
+
+    def compile_expression(self, node: SExpression, code: CodeObject, lambdas: List[Lambda]):
+        """Emit the instructions of a special form or an application."""
+        elements = node.elements
+        if not elements:
+            self.emit(code, QUOTE, self.constant(code, node))
+            return
+
+        first = elements[0]
+        args = elements[1:]
+        if isinstance(first, Symbol):
+            # A well-formed define inside a lambda, or lambda, was
+            # resolved to a LocalDefine or Lambda
+            if first.name == 'define':
+                if len(args) != 2:
+                    self.error(code, f"define expects 2 arguments, got {len(args)}")
+                elif not isinstance(args[0], Symbol):
+                    self.error(code, "define expects a symbol as first argument")
+                else:
+                    self.compile_node(args[1], code, lambdas)
+                    self.emit(code, DEFINE_GLOBAL, self.global_slot(args[0].name))
+                return
+
+            if first.name == 'lambda':
+                if len(args) < 2:
+                    self.error(code, "lambda expects at least 2 arguments")
+                elif not isinstance(args[0], SExpression):
+                    self.error(code, "lambda expects a list of parameters")
+                else:
+                    self.error(code, "lambda parameters must be symbols")
+                return
+
+            if first.name == 'if':
+                if len(args) != 3:
+                    self.error(code, f"if expects 3 arguments, got {len(args)}")
+                    return
+                self.compile_node(args[0], code, lambdas)
+                self.emit(code, JUMP_IF_FALSE, 0)
+                to_alternative = len(code.code) - 1
+                self.compile_node(args[1], code, lambdas)
+                self.emit(code, JUMP, 0)
+                to_end = len(code.code) - 1
+                code.code[to_alternative] = len(code.code)
+                self.compile_node(args[2], code, lambdas)
+                code.code[to_end] = len(code.code)
+                return
+
+            if first.name == 'quote':
+                if len(args) != 1:
+                    self.error(code, f"quote expects 1 argument, got {len(args)}")
+                elif isinstance(args[0], SExpression):
+                    # A new list each time, as the tree walker builds one
+                    self.emit(code, QUOTE, self.constant(code, args[0]))
+                else:
+                    value = args[0].name if isinstance(args[0], Symbol) else args[0].value
+                    self.emit(code, CONST, self.constant(code, value))
+                return
+
+            if first.name == 'begin':
+                self.compile_sequence(args, code, lambdas)
+                return
+
+        for element in elements:
+            self.compile_node(element, code, lambdas)
+        self.emit(code, CALL, len(args))
+
+    def compile_sequence(self, exprs: List[Any], code: CodeObject, lambdas: List[Lambda]):
+        """Emit expressions in order, leaving only the last one's value."""
+        if not exprs:
+            self.emit(code, CONST, self.constant(code, None))
+            return
+        for i, expr in enumerate(exprs):
+            if i:
+                self.emit(code, POP)
+            self.compile_node(expr, code, lambdas)
+
+    def compile_body(self, body: List[Any], code: CodeObject, lambdas: List[Lambda]):
+        """Emit a lambda body, which returns its last expression's value."""
+        self.compile_sequence(body, code, lambdas)
+        self.emit(code, RETURN)
+
+    def emit(self, code: CodeObject, opcode: int, *operands: int):
+        """Append an instruction."""
+        code.code.append(opcode)
+        code.code.extend(operands)
+
+    def error(self, code: CodeObject, message: str):
+        """Emit the instruction that raises a malformed form's error."""
+        self.emit(code, RAISE, self.constant(code, message))
+
+    def constant(self, code: CodeObject, value: Any) -> int:
+        """Index of a value in a code object's constants, adding it if new."""
+        # Numbers, booleans and names by value, with the type so that 1
+        # and #t differ; AST nodes, code objects and None by identity,
+        # which the constants list keeps valid
+        if isinstance(value, (int, str)):
+            key = (type(value), value)
+        else:
+            key = id(value)
+        index = code.constant_indices.get(key)
+        if index is None:
+            index = code.constant_indices[key] = len(code.constants)
+            code.constants.append(value)
+        return index
+
+    def global_slot(self, name: str) -> int:
+        """Slot of a global variable, adding it if new."""
+        slot = self.global_slots.get(name)
+        if slot is None:
+            slot = self.global_slots[name] = len(self.globals)
+            self.globals.append(name)
+        return slot
+
+
+def disassemble(code: CodeObject, globals: Optional[List[str]] = None) -> str:
+    """A listing of a code object's instructions, and of the code objects it contains.
+
+    Args:
+        code: Code object to list.
+        globals: Names of the global slots, to show with LOAD_GLOBAL and
+            DEFINE_GLOBAL (see Compiler.globals).
+    """
+    lines = [f"{code.name}:"]
+    nested = []
+    pc = 0
+    instructions = code.code
+    while pc < len(instructions):
+        opcode = instructions[pc]
+        operands = list(instructions[pc + 1:pc + 1 + OPERANDS[opcode]])
+        note = ""
+        if opcode in (CONST, QUOTE, RAISE, MAKE_CLOSURE):
+            constant = code.constants[operands[0]]
+            note = repr(constant)
+            if opcode == MAKE_CLOSURE:
+                nested.append(constant)
+        elif opcode == LOAD_BOUND:
+            note = code.constants[operands[2]]
+        elif opcode in (LOAD_GLOBAL, DEFINE_GLOBAL) and globals is not None:
+            note = globals[operands[0]]
+        elif opcode == LOAD_LOCAL or opcode == DEFINE_LOCAL:
+            note = next((name for name, index in code.slots.items() if index == operands[0]), "")
+        text = f"  {pc:4d} {OPNAMES[opcode]:14s} {' '.join(map(str, operands)):10s}"
+        lines.append(f"{text} ({note})".rstrip() if note != "" else text.rstrip())
+        pc += 1 + OPERANDS[opcode]
+
+    for inner in nested:
+        lines.append("")
+        lines.append(disassemble(inner, globals))
+    return "\n".join(lines)
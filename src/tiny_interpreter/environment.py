@@ -3,23 +3,54 @@
 The environment manages variable bindings and supports lexical scoping.
 """
 
-from typing import Dict, Optional, Any
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 
 class Environment:
     """Environment for storing variable bindings.
 
     Supports lexical scoping through parent environment references.
+
+    With `lookup_cache`, an environment remembers which ancestor last
+    resolved each name looked up through it, so that the frames of a
+    closure, which all share its environment as parent, skip the walk up
+    the chain. A define that adds a name to an environment with children
+    may shadow a remembered ancestor, so it invalidates every cache at
+    once by bumping a global epoch.
     """
 
-    def __init__(self, parent: Optional['Environment'] = None):
+    # Bumped by every define that could shadow a cached lookup
+    _epoch = 0
+    # Set once an environment has been the parent of another
+    _has_children = False
+    lookup_cache = False
+    # name -> (environment that binds it, epoch), created on first use
+    _owners: Optional[Dict[str, Tuple['Environment', int]]] = None
+
+    def __init__(self, parent: Optional['Environment'] = None,
+                 lookup_cache: Optional[bool] = None):
         """Create a new environment.
 
         Args:
             parent: Parent environment for lexical scoping.
+            lookup_cache: Cache where names resolve (default: as the parent does).
         """
         self.bindings: Dict[str, Any] = {}
         self.parent = parent
+        # Not a SmallEnvironment: what small frames check, faster than
+        # isinstance, before walking up from here
+        self._small = False
+        if parent is not None:
+            if not parent._has_children:
+                parent._has_children = True
+            if lookup_cache is None:
+                # Small frames never cache; inherit from the nearest dict frame
+                env = parent
+                while isinstance(env, SmallEnvironment):
+                    env = env.parent
+                lookup_cache = env.lookup_cache
+        if lookup_cache:
+            self.lookup_cache = True
 
     def define(self, name: str, value: Any):
         """Define a new variable in this environment.
@@ -28,6 +59,8 @@ class Environment:
             name: Variable name.
             value: Variable value.
         """
+        if self._has_children and name not in self.bindings:
+            Environment._epoch += 1
         self.bindings[name] = value
 
     def get(self, name: str) -> Any:
@@ -42,14 +75,37 @@ class Environment:
         Raises:
             NameError: If the variable is not defined.
         """
-        if name in self.bindings:
-            return self.bindings[name]
+        bindings = self.bindings
+        if name in bindings:
+            return bindings[name]
 
-        if self.parent is not None:
-            return self.parent.get(name)
+        env = self.parent
+        if env is not None and env.lookup_cache:
+            return env._owner(name).bindings[name]
+        while env is not None:
+            if name in env.bindings:
+                return env.bindings[name]
+            env = env.parent
 
         raise NameError(f"Undefined variable: {name}")
 
+    def _owner(self, name: str) -> 'Environment':
+        """This environment or the nearest ancestor that binds a name."""
+        owners = self._owners
+        if owners is None:
+            owners = self._owners = {}
+        entry = owners.get(name)
+        if entry is not None and entry[1] == Environment._epoch:
+            return entry[0]
+
+        env = self
+        while name not in env.bindings:
+            env = env.parent
+            if env is None:
+                raise NameError(f"Undefined variable: {name}")
+        owners[name] = (env, Environment._epoch)
+        return env
+
     def set(self, name: str, value: Any):
         """Set an existing variable's value.
 
@@ -60,15 +116,358 @@ class Environment:
         Raises:
             NameError: If the variable is not defined.
         """
-        if name in self.bindings:
-            self.bindings[name] = value
-            return
+        _set_from(self, name, value)
+
+    def __repr__(self):
+        return f"Environment({list(self.bindings.keys())})"
+
+
+class SmallEnvironment:
+    """Dict-free call frame for a closure with one to three parameters.
+
+    Parameter names and values are kept in slots, so a call allocates
+    one small object instead of an Environment and its dict. Only
+    closures whose body never defines anything get one, since a frame
+    can't grow: see Env1, Env2, Env3 and SMALL_ENVIRONMENTS.
+
+    Lookups compare the later parameters first, so a repeated parameter
+    is bound to its last argument, as define would leave it. A name
+    that isn't a parameter is looked up further out by a loop over the
+    chain, not by a call per frame, so deeply nested closures can't
+    exhaust the Python stack.
+    """
+
+    __slots__ = ('parent',)
+
+    # Never gains names, so it can't shadow anything a lookup cache holds
+    _has_children = True
+    lookup_cache = False
+    _small = True
+
+    @property
+    def bindings(self) -> Dict[str, Any]:
+        """The parameters as a dict, for environments that walk through this frame.
+
+        Built from a subclass's slots, which pair each name with its value.
+        """
+        slots = type(self).__slots__
+        return {getattr(self, slots[i]): getattr(self, slots[i + 1])
+                for i in range(0, len(slots) - 1, 2)}
+
+    def set(self, name: str, value: Any):
+        """Set an existing variable's value.
+
+        Raises:
+            NameError: If the variable is not defined.
+        """
+        _set_from(self, name, value)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self.bindings.keys())})"
+
+
+class Env1(SmallEnvironment):
+    """Frame of a one-parameter closure."""
+
+    __slots__ = ('name0', 'value0')
+
+    def __init__(self, parent: Environment, names: List[str], values: List[Any]):
+        self.parent = parent
+        self.name0, = names
+        self.value0, = values
+
+    def get(self, name: str) -> Any:
+        """Look up a variable value."""
+        if name == self.name0:
+            return self.value0
+        parent = self.parent
+        if parent._small:
+            return _get_from(parent, name)
+        return parent.get(name)
+
+    def lookup(self, name: str, default: Any) -> Any:
+        """This frame's value for a name, or default if it isn't a parameter."""
+        if name == self.name0:
+            return self.value0
+        return default
+
+    def assign(self, name: str, value: Any) -> bool:
+        """Set a parameter, if the name is one; return whether it was."""
+        if name == self.name0:
+            self.value0 = value
+        else:
+            return False
+        return True
+
+
+class Env2(SmallEnvironment):
+    """Frame of a two-parameter closure."""
+
+    __slots__ = ('name0', 'value0', 'name1', 'value1')
+
+    def __init__(self, parent: Environment, names: List[str], values: List[Any]):
+        self.parent = parent
+        self.name0, self.name1 = names
+        self.value0, self.value1 = values
+
+    def get(self, name: str) -> Any:
+        """Look up a variable value."""
+        if name == self.name1:
+            return self.value1
+        if name == self.name0:
+            return self.value0
+        parent = self.parent
+        if parent._small:
+            return _get_from(parent, name)
+        return parent.get(name)
+
+    def lookup(self, name: str, default: Any) -> Any:
+        """This frame's value for a name, or default if it isn't a parameter."""
+        if name == self.name1:
+            return self.value1
+        if name == self.name0:
+            return self.value0
+        return default
+
+    def assign(self, name: str, value: Any) -> bool:
+        """Set a parameter, if the name is one; return whether it was."""
+        if name == self.name1:
+            self.value1 = value
+        elif name == self.name0:
+            self.value0 = value
+        else:
+            return False
+        return True
+
+
+class Env3(SmallEnvironment):
+    """Frame of a three-parameter closure."""
+
+    __slots__ = ('name0', 'value0', 'name1', 'value1', 'name2', 'value2')
+
+    def __init__(self, parent: Environment, names: List[str], values: List[Any]):
+        self.parent = parent
+        self.name0, self.name1, self.name2 = names
+        self.value0, self.value1, self.value2 = values
+
+    def get(self, name: str) -> Any:
+        """Look up a variable value."""
+        if name == self.name2:
+            return self.value2
+        if name == self.name1:
+            return self.value1
+        if name == self.name0:
+            return self.value0
+        parent = self.parent
+        if parent._small:
+            return _get_from(parent, name)
+        return parent.get(name)
+
+    def lookup(self, name: str, default: Any) -> Any:
+        """This frame's value for a name, or default if it isn't a parameter."""
+        if name == self.name2:
+            return self.value2
+        if name == self.name1:
+            return self.value1
+        if name == self.name0:
+            return self.value0
+        return default
+
+    def assign(self, name: str, value: Any) -> bool:
+        """Set a parameter, if the name is one; return whether it was."""
+        if name == self.name2:
+            self.value2 = value
+        elif name == self.name1:
+            self.value1 = value
+        elif name == self.name0:
+            self.value0 = value
+        else:
+            return False
+        return True
+
+
+# Small frame class by number of parameters
+SMALL_ENVIRONMENTS = {1: Env1, 2: Env2, 3: Env3}
+
+# Marks a name missing from a small frame
+_MISSING = object()
+
+
+def _get_from(env: Union[Environment, SmallEnvironment], name: str) -> Any:
+    """Look up a name from env outwards, stepping through small frames in a loop."""
+    while env._small:
+        value = env.lookup(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        env = env.parent
+    return env.get(name)
+
+
+def _set_from(env: Union[Environment, SmallEnvironment, None], name: str, value: Any):
+    """Set an existing variable, walking from env outwards in a loop.
 
-        if self.parent is not None:
-            self.parent.set(name, value)
+    Raises:
+        NameError: If the variable is not defined.
+    """
+    # The global environment's own set also updates the variable's Cell
+    while env is not None and not isinstance(env, GlobalEnvironment):
+        if isinstance(env, SmallEnvironment):
+            if env.assign(name, value):
+                return
+        elif name in env.bindings:
+            env.bindings[name] = value
             return
+        env = env.parent
 
+    if env is None:
         raise NameError(f"Undefined variable: {name}")
+    env.set(name, value)
+
+
+class FramePool:
+    """Free list of small frames, for closures whose frames can't escape.
+
+    A frame escapes when something outlives the call while still
+    referring to it, which takes a closure created during the call. For
+    a lambda with no inner lambda the frame is dead once the call
+    returns, so it is released here and rebound by a later call instead
+    of allocating a new one. The free list holds at most `limit`
+    frames, enough for the deepest recursion seen recently.
+    """
+
+    __slots__ = ('frame_class', 'free', 'limit')
+
+    def __init__(self, frame_class: type, limit: int = 256):
+        self.frame_class = frame_class
+        self.free: List[SmallEnvironment] = []
+        self.limit = limit
+
+    def acquire(self, parent: Environment, names: List[str], values: List[Any]) -> SmallEnvironment:
+        """A frame bound to the given parameters."""
+        free = self.free
+        if free:
+            frame = free.pop()
+            frame.__init__(parent, names, values)
+            return frame
+        return self.frame_class(parent, names, values)
+
+    def release(self, frame: SmallEnvironment):
+        """Return a frame that nothing refers to any more."""
+        if len(self.free) < self.limit:
+            self.free.append(frame)
+
+
+class Cell:
+    """A mutable box holding the value of a global variable."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
 
     def __repr__(self):
-        return f"Environment({list(self.bindings.keys())})"
+        return f"Cell({self.value!r})"
+
+
+class GlobalEnvironment(Environment):
+    """The top-level environment, which also keeps each variable in a Cell.
+
+    A resolved reference to a global caches its cell after the first
+    lookup. define and set update the cell in place, so a redefinition
+    is seen by every reference that cached it.
+    """
+
+    def __init__(self, lookup_cache: Optional[bool] = None):
+        """Create a global environment.
+
+        Args:
+            lookup_cache: Cache where names resolve, in this environment's
+                descendants.
+        """
+        super().__init__(None, lookup_cache)
+        self.cells: Dict[str, Cell] = {}
+
+    def define(self, name: str, value: Any):
+        """Define a new variable, or update the cell of an existing one."""
+        super().define(name, value)
+        cell = self.cells.get(name)
+        if cell is None:
+            self.cells[name] = Cell(value)
+        else:
+            cell.value = value
+
+    def set(self, name: str, value: Any):
+        """Set an existing variable's value.
+
+        Raises:
+            NameError: If the variable is not defined.
+        """
+        if name not in self.bindings:
+            raise NameError(f"Undefined variable: {name}")
+        self.bindings[name] = value
+        self.cells[name].value = value
+
+    def cell(self, name: str) -> Cell:
+        """The cell of a variable.
+
+        Raises:
+            NameError: If the variable is not defined.
+        """
+        cell = self.cells.get(name)
+        if cell is None:
+            raise NameError(f"Undefined variable: {name}")
+        return cell
+
+
+class _Unbound:
+    """Marker for a frame slot that no define has bound yet."""
+
+    def __repr__(self):
+        return "UNBOUND"
+
+
+UNBOUND = _Unbound()
+
+
+class Frame:
+    """Call frame of a lexically addressed closure.
+
+    Values live in a fixed-size list: the parameters, then every name the
+    body defines, at the indices the resolver assigned. Slots for defined
+    names start out UNBOUND; until a define binds one, the name is looked
+    up further out, as with an Environment that lacks it.
+    """
+
+    __slots__ = ('values', 'slots', 'parent')
+
+    def __init__(self, values: List[Any], slots: Dict[str, int],
+                 parent: Union['Frame', Environment]):
+        """Create a frame.
+
+        Args:
+            values: Slot values.
+            slots: Index of each name's slot, shared by all frames of a lambda.
+            parent: Frame or environment the closure was created in.
+        """
+        self.values = values
+        self.slots = slots
+        self.parent = parent
+
+    def get(self, name: str) -> Any:
+        """Look up a variable value by name.
+
+        Raises:
+            NameError: If the variable is not defined.
+        """
+        env = self
+        while isinstance(env, Frame):
+            index = env.slots.get(name)
+            if index is not None:
+                value = env.values[index]
+                if value is not UNBOUND:
+                    return value
+            env = env.parent
+        return env.get(name)
+
+    def __repr__(self):
+        return f"Frame({list(self.slots.keys())})"
@@ -3,9 +3,27 @@
 The evaluator executes AST nodes in an environment.
 """
 
-from typing import Any, List, Callable
+import math
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Callable, Optional, Set, TextIO, Tuple, Union
 from .parser import ASTNode, Number, Boolean, Symbol, SExpression
-from .environment import Environment
+from .cache import ParseCache
+from .environment import Environment, Frame, FramePool, GlobalEnvironment, SMALL_ENVIRONMENTS, UNBOUND
+from .resolver import (
+    GlobalRef, Lambda, LocalDefine, LocalRef, Resolver, creates_closures, defined_names, uses_forms)
+
+
+# Characters read from a file at a time by run_stream
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Ways an Evaluator can run top-level forms: walking the AST, compiling
+# each form to Python closures first (see analyzer), compiling it to
+# bytecode for the stack machine (see compiler and vm), or walking the
+# AST with an explicit continuation stack (see cek)
+ENGINES = ('tree', 'closure', 'vm', 'cek')
+
+# Names of the built-in special forms
+SPECIAL_FORMS = ('define', 'lambda', 'if', 'quote', 'begin')
 
 
 class EvaluatorError(Exception):
@@ -14,31 +32,165 @@ class EvaluatorError(Exception):
 
 
 class Closure:
-    """A closure captures a function and its defining environment."""
-
-    def __init__(self, params: List[str], body: List[ASTNode], env: Environment):
+    """A closure captures a function and its defining environment.
+
+    Closures of resolved lambdas also carry their frame layout, and are
+    called with a Frame instead of an Environment. Other closures pick
+    the class of their call frames on the first call (`frame_class`),
+    and a FramePool to take them from if the frames can't escape.
+    Closures made by the closure engine carry their compiled body
+    (`code`) and frame class from the start; those made by the vm
+    engine carry their CodeObject in `code`.
+    """
+
+    def __init__(self, params: List[str], body: List[ASTNode], env: Environment,
+                 slots: Optional[Dict[str, int]] = None, size: int = 0):
         self.params = params
         self.body = body
         self.env = env
+        self.slots = slots
+        self.size = size
+        self.frame_class: Optional[type] = None
+        self.frame_pool: Optional[FramePool] = None
+        self.code: Any = None
 
     def __repr__(self):
         return f"<closure {self.params}>"
 
 
+class TailCall:
+    """An expression left to evaluate in tail position, in a new frame.
+
+    eval_application returns one for a closure call instead of
+    evaluating the body's last expression itself; eval's loop picks it
+    up, so the call doesn't nest a Python frame.
+    """
+
+    __slots__ = ('node', 'env', 'pool')
+
+    def __init__(self, node: ASTNode, env: Environment, pool: Optional[FramePool]):
+        """Create a tail call.
+
+        Args:
+            node: Expression to evaluate.
+            env: The callee's frame.
+            pool: Pool to release the frame to once the expression is
+                done, if the frame can't escape.
+        """
+        self.node = node
+        self.env = env
+        self.pool = pool
+
+
 class Evaluator:
-    """Evaluator for executing AST nodes."""
+    """Evaluator for executing AST nodes.
+
+    AST nodes are only ever read, never modified, so an AST may share
+    subtrees between forms (see hashcons).
+    """
 
-    def __init__(self):
+    def __init__(self, parse_cache: Union[ParseCache, bool, None] = None,
+                 lexical_addressing: bool = False, lookup_cache: bool = False,
+                 small_frames: bool = True, frame_pools: bool = True,
+                 engine: str = 'tree'):
+        """Create an evaluator.
+
+        Args:
+            parse_cache: A ParseCache for run() to look sources up in, or
+                True for a new one with default limits. A cache can be
+                shared by several evaluators.
+            lexical_addressing: Resolve each top-level form before it
+                runs, so variables are found by frame depth and slot
+                index instead of by name (see resolver).
+            lookup_cache: Have environments remember which ancestor
+                resolves a name, for deeply nested closures.
+            small_frames: Call closures with one to three parameters, whose
+                body has no define, in a dict-free frame (see
+                SmallEnvironment). With False, every call frame is an
+                Environment.
+            frame_pools: Reuse the small frames of closures that create
+                no closures themselves, so their frames can't outlive
+                the call (see FramePool).
+            engine: 'tree' to evaluate the AST directly, 'closure' to
+                compile each top-level form into Python closures before
+                running it (see analyzer), 'vm' to compile it to
+                bytecode for a stack machine (see compiler and vm), or
+                'cek' to evaluate the AST keeping continuations on a
+                list instead of the Python stack, so that recursion
+                depth is only limited by memory (see cek). Only the
+                tree engine runs resolved ASTs, so the others can't be
+                combined with lexical_addressing.
+
+        Raises:
+            ValueError: For an unknown engine, or another engine than
+                'tree' with lexical_addressing.
+        """
+        self.lookup_cache = lookup_cache
+        self.small_frames = small_frames
+        self.frame_pools = ({cls: FramePool(cls) for cls in SMALL_ENVIRONMENTS.values()}
+                            if frame_pools else None)
         self.global_env = self.create_global_environment()
+        if parse_cache is True:
+            parse_cache = ParseCache()
+        elif parse_cache is False:
+            parse_cache = None
+        self.parse_cache = parse_cache
+        # Handler of each special form, and whether it returns an
+        # expression in tail position instead of a value (see
+        # register_special_form)
+        self.special_forms: Dict[str, Tuple[Callable, bool]] = {
+            'define': (self.eval_define, False),
+            'lambda': (self.eval_lambda, False),
+            'if': (self.eval_if, True),
+            'quote': (self.eval_quote, False),
+            'begin': (self.eval_begin, True),
+        }
+        # How eval evaluates each type of node but SExpression
+        self.node_evaluators: Dict[type, Callable[[Any, Environment], Any]] = {
+            Number: self.eval_constant,
+            Boolean: self.eval_constant,
+            Symbol: self.eval_symbol,
+            LocalRef: self.eval_local,
+            GlobalRef: self.eval_global,
+            LocalDefine: self.eval_local_define,
+            Lambda: self.eval_resolved_lambda,
+        }
+        # Names of the forms added by register_special_form
+        self.registered_forms: Set[str] = set()
+        self.resolver = Resolver(self.registered_forms) if lexical_addressing else None
+
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine != 'tree' and lexical_addressing:
+            raise ValueError("lexical_addressing only applies to the tree engine")
+        self.engine = engine
+        self.analyzer = None
+        self.compiler = None
+        self.vm = None
+        self.machine = None
+        if engine == 'closure':
+            from .analyzer import Analyzer
+
+            self.analyzer = Analyzer(self)
+        elif engine == 'vm':
+            from .compiler import Compiler
+            from .vm import VM
+
+            self.compiler = Compiler()
+            self.vm = VM(self.global_env, self.compiler.globals, self.ast_to_value)
+        elif engine == 'cek':
+            from .cek import CEKMachine
+
+            self.machine = CEKMachine(self)
 
     def create_global_environment(self) -> Environment:
         """Create the global environment with built-in functions."""
-        env = Environment()
+        env = GlobalEnvironment(lookup_cache=self.lookup_cache)
 
         # Arithmetic operations
         env.define('+', lambda *args: sum(args))
         env.define('-', lambda a, b: a - b)
-        env.define('*', lambda *args: eval('*'.join(map(str, args))) if args else 1)
+        env.define('*', lambda *args: math.prod(args))
         env.define('/', lambda a, b: a // b)  # Integer division
 
         # Comparison operations
@@ -65,6 +217,16 @@ class Evaluator:
     def eval(self, node: ASTNode, env: Environment) -> Any:
         """Evaluate an AST node in an environment.
 
+        An S-expression is a special form if its first element names one
+        in special_forms, and a function call otherwise; every other node
+        is evaluated by its type's entry in node_evaluators.
+
+        Expressions in tail position, the branch an if takes, the last
+        expression of a begin and the last expression of a closure's
+        body, are not evaluated by a nested call: eval_if, eval_begin
+        and eval_application hand them back, and this loop goes on with
+        them, so a chain of tail calls runs in constant Python stack.
+
         Args:
             node: AST node to evaluate.
             env: Environment for variable lookups.
@@ -72,50 +234,129 @@ class Evaluator:
         Returns:
             The result of evaluation.
         """
-        # Self-evaluating expressions
-        if isinstance(node, Number):
-            return node.value
-
-        if isinstance(node, Boolean):
-            return node.value
-
-        # Variable lookup
-        if isinstance(node, Symbol):
-            return env.get(node.name)
-
-        # S-expressions (function calls and special forms)
-        if isinstance(node, SExpression):
-            if len(node.elements) == 0:
-                return []  # Empty list
-
-            first = node.elements[0]
-
-            # Special forms
-            if isinstance(first, Symbol):
-                # define
-                if first.name == 'define':
-                    return self.eval_define(node.elements[1:], env)
-
-                # lambda
-                if first.name == 'lambda':
-                    return self.eval_lambda(node.elements[1:], env)
-
-                # if
-                if first.name == 'if':
-                    return self.eval_if(node.elements[1:], env)
+        # Pool of the frame `env`, when this loop entered it for a tail
+        # call whose frame can't escape (see FramePool)
+        pool = None
+        special_forms = self.special_forms
+        while True:
+            # S-expressions (function calls and special forms)
+            if type(node) is SExpression:
+                elements = node.elements
+                if not elements:
+                    value = []  # Empty list
+                else:
+                    first = elements[0]
+                    form = special_forms.get(first.name) if type(first) is Symbol else None
+
+                    # Function application
+                    if form is None:
+                        value = self.eval_application(elements, env)
+                        if type(value) is TailCall:
+                            # The current frame is done with: its body's
+                            # last expression was this call
+                            if pool is not None:
+                                pool.release(env)
+                            node, env, pool = value.node, value.env, value.pool
+                            continue
+
+                    # Special forms
+                    else:
+                        handler, tail = form
+                        value = handler(elements[1:], env)
+                        if tail:
+                            if value is not None:
+                                node = value
+                                continue
+
+            # Every other kind of node
+            else:
+                evaluate = self.node_evaluators.get(type(node))
+                if evaluate is None:
+                    raise EvaluatorError(f"Unknown node type: {type(node)}")
+                value = evaluate(node, env)
+
+            # Only reached without an exception, whose traceback could
+            # still hold the frame
+            if pool is not None:
+                pool.release(env)
+            return value
+
+    def register_special_form(self, name: str, handler: Callable[[List[ASTNode], Environment], Any],
+                              tail: bool = False):
+        """Make a name evaluate as a special form instead of a function call.
+
+        A form's handler is called with its unevaluated operands and the
+        environment, and evaluates whichever operands it needs with
+        eval. A tail form's handler returns an expression instead of a
+        value, which is evaluated in the form's place without a nested
+        call, so that calls in it are tail calls (None gives the value
+        None). Registering a name again replaces its handler.
+
+        The environment is always an Environment, or the global
+        environment at top level, so a handler can get, set and define
+        names in it, and keep it past the call. A closure whose body
+        uses a registered form gets Environment frames that are never
+        pooled, and with lexical_addressing, a top-level form that uses
+        one is evaluated unresolved. Forms should be registered before
+        the code that uses them runs.
+
+        Only the engines that walk the AST, 'tree' and 'cek', see new
+        forms.
 
-                # quote
-                if first.name == 'quote':
-                    return self.eval_quote(node.elements[1:])
-
-                # begin (sequence of expressions)
-                if first.name == 'begin':
-                    return self.eval_begin(node.elements[1:], env)
+        Args:
+            name: Name the form starts with.
+            handler: Called as handler(operands, env).
+            tail: Whether the handler returns an expression in tail position.
 
-            # Function application
-            return self.eval_application(node.elements, env)
+        Raises:
+            ValueError: For a built-in special form, or an engine that
+                compiles forms before running them.
+        """
+        if name in SPECIAL_FORMS:
+            raise ValueError(f"Cannot redefine special form: {name}")
+        if self.engine not in ('tree', 'cek'):
+            raise ValueError(f"The {self.engine} engine can't add special forms")
+        self.special_forms[name] = (handler, tail)
+        self.registered_forms.add(name)
+
+    def eval_constant(self, node: Union[Number, Boolean], env: Environment) -> Any:
+        """Evaluate a self-evaluating number or boolean."""
+        return node.value
+
+    def eval_symbol(self, node: Symbol, env: Environment) -> Any:
+        """Evaluate a variable reference."""
+        return env.get(node.name)
+
+    def eval_global(self, node: GlobalRef, env: Frame) -> Any:
+        """Evaluate a resolved reference to a global variable."""
+        cell = node.cell
+        if cell is None:
+            cell = node.cell = self.global_env.cell(node.name)
+        return cell.value
+
+    def eval_local_define(self, node: LocalDefine, env: Frame) -> None:
+        """Evaluate a define that binds a slot of the current frame."""
+        env.values[node.index] = self.eval(node.value, env)
+        return None
 
-        raise EvaluatorError(f"Unknown node type: {type(node)}")
+    def eval_resolved_lambda(self, node: Lambda, env: Frame) -> Closure:
+        """Evaluate a resolved lambda to a closure that calls with a Frame."""
+        return Closure(node.params, node.body, env, node.slots, node.size)
+
+    def eval_local(self, node: LocalRef, env: Frame) -> Any:
+        """Evaluate a reference to a slot of the current or an enclosing frame."""
+        if node.depth == 0:
+            value = env.values[node.index]
+            if value is not UNBOUND:
+                return value
+        frame = env
+        for _ in range(node.depth):
+            frame = frame.parent
+        value = frame.values[node.index]
+        if value is UNBOUND:
+            # Not defined yet in that frame: look further out by name
+            return frame.parent.get(node.name)
+        return value
 
     def eval_define(self, args: List[ASTNode], env: Environment) -> None:
         """Evaluate a define expression.
@@ -154,21 +395,24 @@ class Evaluator:
         body = args[1:]
         return Closure(params, body, env)
 
-    def eval_if(self, args: List[ASTNode], env: Environment) -> Any:
-        """Evaluate an if expression.
+    def eval_if(self, args: List[ASTNode], env: Environment) -> ASTNode:
+        """Evaluate an if expression's condition.
 
         (if condition then-expr else-expr)
+
+        Returns:
+            The branch to evaluate, in tail position.
         """
         if len(args) != 3:
             raise EvaluatorError(f"if expects 3 arguments, got {len(args)}")
 
         condition = self.eval(args[0], env)
         if condition:
-            return self.eval(args[1], env)
+            return args[1]
         else:
-            return self.eval(args[2], env)
+            return args[2]
 
-    def eval_quote(self, args: List[ASTNode]) -> Any:
+    def eval_quote(self, args: List[ASTNode], env: Optional[Environment] = None) -> Any:
         """Evaluate a quote expression.
 
         (quote expr)
@@ -178,20 +422,29 @@ class Evaluator:
 
         return self.ast_to_value(args[0])
 
-    def eval_begin(self, args: List[ASTNode], env: Environment) -> Any:
-        """Evaluate a begin expression (sequence).
+    def eval_begin(self, args: List[ASTNode], env: Environment) -> Optional[ASTNode]:
+        """Evaluate a begin expression (sequence), but for its last expression.
 
         (begin expr1 expr2 ... exprN)
+
+        Returns:
+            The last expression, to evaluate in tail position, or None
+            for an empty begin, whose value is None.
         """
-        result = None
-        for expr in args:
-            result = self.eval(expr, env)
-        return result
+        if not args:
+            return None
+        for expr in args[:-1]:
+            self.eval(expr, env)
+        return args[-1]
 
     def eval_application(self, elements: List[ASTNode], env: Environment) -> Any:
         """Evaluate a function application.
 
         (func arg1 arg2 ...)
+
+        Returns:
+            A built-in function's result, or for a closure, a TailCall
+            of the last expression of its body in its new frame.
         """
         func = self.eval(elements[0], env)
         args = [self.eval(arg, env) for arg in elements[1:]]
@@ -208,18 +461,63 @@ class Evaluator:
                 )
 
             # Create new environment for function execution
-            func_env = Environment(func.env)
-            for param, arg in zip(func.params, args):
-                func_env.define(param, arg)
-
-            # Evaluate function body
-            result = None
-            for expr in func.body:
-                result = self.eval(expr, func_env)
-            return result
+            pool = None
+            if func.slots is not None:
+                if func.size > len(args):
+                    args.extend([UNBOUND] * (func.size - len(args)))
+                func_env = Frame(args, func.slots, func.env)
+            else:
+                frame_class = func.frame_class
+                if frame_class is None:
+                    frame_class = func.frame_class = self.frame_class(func)
+                    func.frame_pool = self.frame_pool(func)
+                if frame_class is Environment:
+                    func_env = Environment(func.env)
+                    for param, arg in zip(func.params, args):
+                        func_env.define(param, arg)
+                else:
+                    pool = func.frame_pool
+                    if pool is None:
+                        func_env = frame_class(func.env, func.params, args)
+                    else:
+                        func_env = pool.acquire(func.env, func.params, args)
+
+            # Evaluate function body; eval releases the frame to its pool
+            # once the last expression is done
+            body = func.body
+            if len(body) > 1:
+                for expr in body[:-1]:
+                    self.eval(expr, func_env)
+            return TailCall(body[-1], func_env, pool)
 
         raise EvaluatorError(f"Not a function: {func}")
 
+    def frame_class(self, func: Closure) -> type:
+        """Class of a closure's call frames.
+
+        A small frame holds only the parameters, so a body that may
+        define a new name gets a full Environment. So does a body that
+        uses a registered special form, whose handler may define names.
+        """
+        frame_class = SMALL_ENVIRONMENTS.get(len(func.params))
+        if (frame_class is None or not self.small_frames or defined_names(func.body)
+                or uses_forms(func.body, self.registered_forms)):
+            return Environment
+        return frame_class
+
+    def frame_pool(self, func: Closure) -> Optional[FramePool]:
+        """Pool of reusable frames for a closure, if its frames can't escape.
+
+        Only a closure created during a call can keep its frame alive
+        afterwards, so a body without a lambda never lets it escape,
+        unless it uses a registered special form, whose handler may
+        keep the frame.
+        """
+        if (self.frame_pools is None or creates_closures(func.body)
+                or uses_forms(func.body, self.registered_forms)):
+            return None
+        return self.frame_pools.get(func.frame_class)
+
     def ast_to_value(self, node: ASTNode) -> Any:
         """Convert an AST node to a value (for quote)."""
         if isinstance(node, Number):
@@ -241,10 +539,82 @@ class Evaluator:
         Returns:
             The result of the last expression.
         """
+        if self.parse_cache is not None:
+            return self.run_ast(self.parse_cache.parse(source))
+
         from .parser import parse
 
-        ast_nodes = parse(source)
+        return self.run_ast(parse(source))
+
+    def run_ast(self, nodes: Iterable[ASTNode]) -> Any:
+        """Evaluate already parsed top-level expressions.
+
+        Args:
+            nodes: AST nodes, in program order.
+
+        Returns:
+            The result of the last expression.
+        """
         result = None
-        for node in ast_nodes:
-            result = self.eval(node, self.global_env)
+        for result in self.eval_forms(nodes):
+            pass
         return result
+
+    def eval_forms(self, nodes: Iterable[ASTNode]) -> Iterator[Any]:
+        """Lazily evaluate top-level expressions, yielding each result.
+
+        Each node is taken from `nodes` only when the previous one has
+        been evaluated, and is not kept afterwards.
+        """
+        env = self.global_env
+        resolver = self.resolver
+        analyzer = self.analyzer
+        compiler = self.compiler
+        for node in nodes:
+            if analyzer is not None:
+                yield analyzer.analyze(node)(env)
+                continue
+            if compiler is not None:
+                yield self.vm.run(compiler.compile(node))
+                continue
+            if self.machine is not None:
+                yield self.machine.execute(node, env)
+                continue
+            if resolver is not None:
+                node = resolver.resolve(node)
+            yield self.eval(node, env)
+
+    def run_stream(self, source: Union[str, TextIO, Iterable[str]]) -> Iterator[Any]:
+        """Read, parse and evaluate one top-level form at a time.
+
+        Only the form being evaluated and the text of the next,
+        incomplete one are held in memory, however long the program.
+        Forms run as they are read: those before a syntax error have
+        already been evaluated when it is raised.
+
+        Args:
+            source: A text file, a source string, or an iterable of
+                chunks of source text.
+
+        Yields:
+            The result of each top-level expression.
+        """
+        from .reader import read_stream
+
+        if isinstance(source, str):
+            chunks: Iterable[str] = (source,)
+        elif hasattr(source, 'read'):
+            chunks = iter(partial(source.read, STREAM_CHUNK_SIZE), '')
+        else:
+            chunks = source
+        return self.eval_forms(read_stream(chunks))
+
+    def run_arena(self, arena) -> Any:
+        """Evaluate the top-level forms of an Arena.
+
+        Forms are turned back into AST nodes one at a time, as they run.
+
+        Returns:
+            The result of the last expression.
+        """
+        return self.run_ast(arena.iter_nodes())
@@ -0,0 +1,99 @@
+"""Hash-consing of AST subtrees for Tiny Interpreter.
+
+Generated code repeats the same subexpressions, such as (- n 1), many
+times over. A HashConser rebuilds an AST so that structurally identical
+subtrees are one shared node, turning the tree into a DAG.
+
+A shared node can only carry the offset of its first occurrence, so
+the source offset of every occurrence is kept in a side table instead,
+indexed by the occurrence's number in a pre-order walk of the original
+tree. A top-level form's offset is absolute while a nested node's is
+relative to its form, so top-level forms are only shared with each
+other, never with nested subtrees.
+
+Sharing is only safe because nothing mutates nodes after parsing: the
+evaluator never does. Don't hash-cons the nodes of an incremental
+Document, which rebases the offsets of top-level forms in place.
+"""
+
+from array import array
+from typing import Dict, List
+
+from .parser import ASTNode, SExpression
+
+
+class HashConser:
+    """Shares structurally identical subtrees across the ASTs it is given.
+
+    The table persists between calls to share(), so forms parsed
+    separately share subtrees too.
+    """
+
+    def __init__(self):
+        # Structural key -> canonical node. Keys of lists hold the ids of
+        # their canonical children, which the table keeps alive.
+        self._table: Dict[tuple, ASTNode] = {}
+        # Source offset of each occurrence, in pre-order
+        self.offsets = array('i')
+
+    def __len__(self) -> int:
+        """Number of distinct subtrees."""
+        return len(self._table)
+
+    def offset(self, occurrence: int) -> int:
+        """The source offset of an occurrence, by pre-order number.
+
+        Resolve it to a line and column with a SourceMap of the source.
+        """
+        return self.offsets[occurrence]
+
+    def share(self, nodes: List[ASTNode]) -> List[ASTNode]:
+        """Return the forms with identical subtrees shared.
+
+        The given nodes are not modified; a list node is rebuilt only
+        when one of its children was replaced by a shared node.
+        """
+        table = self._table
+        offsets = self.offsets
+        shared: List[ASTNode] = []
+        # (node, canonical children so far, or None before its children)
+        stack = [(node, None) for node in reversed(nodes)]
+        # Canonical nodes of the finished children of each open list
+        results = [shared]
+        # Offset of the current top-level form
+        form = 0
+
+        while stack:
+            node, children = stack.pop()
+            if children is None:
+                top = len(results) == 1
+                if top:
+                    offsets.append(node.offset)
+                    form = node.offset
+                else:
+                    offsets.append(form + node.offset)
+                if isinstance(node, SExpression):
+                    stack.append((node, []))
+                    stack.extend((child, None) for child in reversed(node.elements))
+                    results.append([])
+                    continue
+                key = (top, type(node), node.value if hasattr(node, 'value') else node.name)
+            else:
+                children = results.pop()
+                top = len(results) == 1
+                key = (top, SExpression) + tuple(map(id, children))
+
+            canonical = table.get(key)
+            if canonical is None:
+                if children is not None and any(
+                        new is not old for new, old in zip(children, node.elements)):
+                    node = SExpression(children, node.offset)
+                canonical = table[key] = node
+            results[-1].append(canonical)
+
+        return shared
+
+
+def hash_cons(nodes: List[ASTNode]) -> List[ASTNode]:
+    """Convenience function to share identical subtrees of an AST."""
+    return HashConser().share(nodes)
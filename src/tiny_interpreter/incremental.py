@@ -0,0 +1,200 @@
+"""Incremental re-parsing for Tiny Interpreter.
+
+A Document keeps the parsed top-level forms of a source buffer. After an
+edit, only the forms the edit touches are lexed and parsed again; every
+other form keeps its existing AST.
+
+Each form owns the span from its first token up to the next form's first
+token, so the spans tile the buffer. Re-parsing starts at the first
+touched form and stops as soon as a form begins exactly where an
+untouched form used to begin: from that point on the text, and therefore
+the tokens and the AST, are unchanged.
+"""
+
+from bisect import bisect_left
+from typing import List
+
+from .lexer import RegexLexer, TokenType
+from .parser import ASTNode, Parser
+
+
+class Document:
+    """A source buffer that re-parses only the forms an edit touches.
+
+    Edits shift the offsets and start lines of every form after them.
+    Rather than touching all of those forms, the shift is kept pending
+    for the whole suffix starting at `_pending`, and folded into stored
+    values only when a later edit lands elsewhere. Nodes inside a form
+    store offsets relative to the form, so they never change; a form's
+    own offset is brought up to date when the AST is read through `ast`.
+    """
+
+    def __init__(self, source: str = ""):
+        """Create a document and parse its initial source.
+
+        Raises:
+            LexerError, ParserError: If the source does not parse.
+        """
+        self.source = ""
+        self._starts: List[int] = []
+        self._nodes: List[ASTNode] = []
+        # Line each form starts on, for positions in parse errors
+        self._lines: List[int] = []
+        # Forms from index _pending on are shifted by these amounts
+        self._pending = 0
+        self._pending_offset = 0
+        self._pending_lines = 0
+        # Set by an edit that failed to parse: the text after the last
+        # kept form has no forms, and must be parsed again through EOF
+        self._broken = False
+        if source:
+            self.edit(0, 0, source)
+
+    @property
+    def ast(self) -> List[ASTNode]:
+        """The top-level forms, with offsets up to date."""
+        self._materialize(self._pending, len(self._starts))
+        self._pending = len(self._starts)
+        self._pending_offset = self._pending_lines = 0
+        for start, node in zip(self._starts, self._nodes):
+            node.offset = start
+        return list(self._nodes)
+
+    def edit(self, start: int, end: int, text: str) -> List[ASTNode]:
+        """Replace source[start:end] with text and re-parse what it touches.
+
+        Args:
+            start: Offset where the replaced range begins.
+            end: Offset where the replaced range ends.
+            text: Replacement text.
+
+        Returns:
+            The newly parsed forms that replaced the touched ones.
+
+        Raises:
+            LexerError, ParserError: The error parse() would raise for the
+                new source. The document keeps the forms before it, and
+                the next edit re-parses from there through EOF, so it
+                raises too unless it repairs the source.
+        """
+        old = self.source
+        if not 0 <= start <= end <= len(old):
+            raise ValueError(f"Invalid edit range: {start}..{end}")
+
+        # Re-parse from the form whose span holds `start`, or the one
+        # ending right there, since an inserted character may extend its
+        # last token.
+        first = self._bisect(start) - 1
+        if first < 0:
+            first, region, line, column = 0, 0, 1, 1
+        else:
+            region = self._start(first)
+            line = self._line(first)
+            column = region - old.rfind('\n', 0, region)
+
+        # Forms starting at or after `end` are candidates for reuse,
+        # unless unparsed text follows them
+        tail = len(self._starts) if self._broken else self._bisect(end)
+        self.source = old[:start] + text + old[end:]
+
+        delta = len(text) - (end - start)
+        new_starts: List[int] = []
+        new_lines: List[int] = []
+        new_nodes: List[ASTNode] = []
+        try:
+            resync = self._reparse(region, line, column, tail, delta,
+                                   new_starts, new_lines, new_nodes)
+        except Exception:
+            self._splice(first, len(self._starts), new_starts, new_lines, new_nodes, 0, 0)
+            self._broken = True
+            raise
+        self._broken = False
+
+        line_delta = text.count('\n') - old.count('\n', start, end)
+        self._splice(first, resync, new_starts, new_lines, new_nodes, delta, line_delta)
+        return new_nodes
+
+    def _start(self, index: int) -> int:
+        """Current start offset of a form."""
+        if index >= self._pending:
+            return self._starts[index] + self._pending_offset
+        return self._starts[index]
+
+    def _line(self, index: int) -> int:
+        """Current start line of a form."""
+        if index >= self._pending:
+            return self._lines[index] + self._pending_lines
+        return self._lines[index]
+
+    def _bisect(self, offset: int) -> int:
+        """Index of the first form starting at or after `offset`."""
+        pending = self._pending
+        index = bisect_left(self._starts, offset, 0, pending)
+        if index < pending:
+            return index
+        return bisect_left(self._starts, offset - self._pending_offset, pending)
+
+    def _reparse(self, region: int, line: int, column: int, tail: int, delta: int,
+                 new_starts: List[int], new_lines: List[int],
+                 new_nodes: List[ASTNode]) -> int:
+        """Parse forms from `region` until they line up with an old form.
+
+        Returns:
+            Index of the first old form that is reused unchanged.
+        """
+        count = len(self._starts)
+        parser = Parser(RegexLexer(self.source, region, line, column).iter_tokens())
+        resync = tail
+
+        while True:
+            token = parser.current_token()
+            if token.type == TokenType.EOF:
+                return count
+
+            offset = token.offset
+            while resync < count and self._start(resync) + delta < offset:
+                resync += 1
+            if resync < count and self._start(resync) + delta == offset:
+                return resync
+
+            # Parse first, so that a form that fails leaves no start behind
+            node = parser.parse_form()
+            new_starts.append(offset)
+            new_lines.append(token.line)
+            new_nodes.append(node)
+
+    def _splice(self, first: int, resync: int, new_starts: List[int], new_lines: List[int],
+                new_nodes: List[ASTNode], delta: int, line_delta: int):
+        """Replace forms first..resync-1 and shift the forms after them."""
+        pending = self._pending
+        if not (self._pending_offset or self._pending_lines):
+            pending = resync
+        elif pending < first:
+            # Forms before the edit leave the shifted suffix
+            self._materialize(pending, first)
+            pending = resync
+        elif pending > resync:
+            # Forms between the edit and the suffix only get this edit's shift
+            self._shift(resync, pending, delta, line_delta)
+        pending = max(pending, resync)
+
+        self._starts[first:resync] = new_starts
+        self._lines[first:resync] = new_lines
+        self._nodes[first:resync] = new_nodes
+        self._pending = pending - (resync - first) + len(new_nodes)
+        if self._pending < len(self._starts):
+            self._pending_offset += delta
+            self._pending_lines += line_delta
+        else:
+            self._pending_offset = self._pending_lines = 0
+
+    def _materialize(self, low: int, high: int):
+        """Fold the pending shift into stored values for forms low..high-1."""
+        self._shift(low, high, self._pending_offset, self._pending_lines)
+
+    def _shift(self, low: int, high: int, delta: int, line_delta: int):
+        """Add to the stored offsets and start lines of forms low..high-1."""
+        if delta:
+            self._starts[low:high] = [s + delta for s in self._starts[low:high]]
+        if line_delta:
+            self._lines[low:high] = [s + line_delta for s in self._lines[low:high]]
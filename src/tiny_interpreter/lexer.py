@@ -3,12 +3,15 @@
 The lexer converts a string of source code into a sequence of tokens.
 """
 
-from dataclasses import dataclass
-from enum import Enum, auto
-from typing import List, Optional
+import re
+import sys
+from enum import IntEnum, auto
+from typing import Any, Iterator, List, Optional, Tuple
 
+from .source_map import SourceMap
 
-class TokenType(Enum):
+
+class TokenType(IntEnum):
     """Token types for the Tiny Interpreter."""
     LPAREN = auto()      # (
     RPAREN = auto()      # )
@@ -18,13 +21,43 @@ class TokenType(Enum):
     EOF = auto()         # End of file
 
 
-@dataclass
 class Token:
-    """A token with type, value, and position information."""
-    type: TokenType
-    value: any
-    line: int
-    column: int
+    """A token with type, value, and position information.
+
+    Only the start offset is stored; line and column are resolved
+    through the shared source map when they are asked for.
+    """
+
+    __slots__ = ('type', 'value', 'offset', 'source_map')
+
+    def __init__(self, type: TokenType, value: Any, offset: int, source_map: SourceMap):
+        self.type = type
+        self.value = value
+        self.offset = offset
+        self.source_map = source_map
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The 1-based (line, column) of the token."""
+        return self.source_map.position(self.offset)
+
+    @property
+    def line(self) -> int:
+        """Line of the token."""
+        return self.position[0]
+
+    @property
+    def column(self) -> int:
+        """Column of the token."""
+        return self.position[1]
+
+    def __eq__(self, other):
+        if not isinstance(other, Token):
+            return NotImplemented
+        return (self.type == other.type and self.value == other.value
+                and self.position == other.position)
+
+    __hash__ = None
 
     def __repr__(self):
         return f"Token({self.type.name}, {self.value!r}, {self.line}:{self.column})"
@@ -38,15 +71,40 @@ class LexerError(Exception):
         self.column = column
         super().__init__(f"{message} at line {line}, column {column}")
 
+    def __reduce__(self):
+        # Rebuild from the original arguments, e.g. when sent between processes
+        return (self.__class__, (self.message, self.line, self.column))
+
 
 class Lexer:
     """Lexer for tokenizing Lisp-style source code."""
 
-    def __init__(self, source: str):
+    def __init__(self, source: str, start: int = 0, line: int = 1, column: int = 1):
+        """Create a lexer.
+
+        Args:
+            source: Source code to tokenize.
+            start: Offset to start lexing at.
+            line: Line number reported for `start`.
+            column: Column number reported for `start`.
+        """
         self.source = source
-        self.pos = 0
-        self.line = 1
-        self.column = 1
+        self.source_map = SourceMap(source, start, line, column)
+        self.pos = start
+
+    @property
+    def line(self) -> int:
+        """Line of the current position."""
+        return self.source_map.position(self.pos)[0]
+
+    @property
+    def column(self) -> int:
+        """Column of the current position."""
+        return self.source_map.position(self.pos)[1]
+
+    def error(self, message: str, offset: int) -> LexerError:
+        """Build a LexerError positioned at a source offset."""
+        return LexerError(message, *self.source_map.position(offset))
 
     def current_char(self) -> Optional[str]:
         """Return the current character, or None if at end."""
@@ -66,11 +124,6 @@ class Lexer:
         char = self.current_char()
         if char is not None:
             self.pos += 1
-            if char == '\n':
-                self.line += 1
-                self.column = 1
-            else:
-                self.column += 1
         return char
 
     def skip_whitespace(self):
@@ -86,46 +139,43 @@ class Lexer:
 
     def read_number(self) -> Token:
         """Read a number token."""
-        start_line = self.line
-        start_column = self.column
-        num_str = ''
+        start = self.pos
 
         # Handle negative numbers
         if self.current_char() == '-':
-            num_str += self.advance()
+            self.advance()
 
         while self.current_char() and self.current_char().isdigit():
-            num_str += self.advance()
+            self.advance()
 
-        return Token(TokenType.NUMBER, int(num_str), start_line, start_column)
+        value = int(self.source[start:self.pos])
+        return Token(TokenType.NUMBER, value, start, self.source_map)
 
     def read_symbol(self) -> Token:
         """Read a symbol token."""
-        start_line = self.line
-        start_column = self.column
-        symbol = ''
+        start = self.pos
 
         while self.current_char() and self.is_symbol_char(self.current_char()):
-            symbol += self.advance()
+            self.advance()
 
-        return Token(TokenType.SYMBOL, symbol, start_line, start_column)
+        symbol = sys.intern(self.source[start:self.pos])
+        return Token(TokenType.SYMBOL, symbol, start, self.source_map)
 
     def read_boolean(self) -> Token:
         """Read a boolean token (#t or #f)."""
-        start_line = self.line
-        start_column = self.column
+        start = self.pos
 
         self.advance()  # Skip #
         char = self.current_char()
 
         if char == 't':
             self.advance()
-            return Token(TokenType.BOOLEAN, True, start_line, start_column)
+            return Token(TokenType.BOOLEAN, True, start, self.source_map)
         elif char == 'f':
             self.advance()
-            return Token(TokenType.BOOLEAN, False, start_line, start_column)
+            return Token(TokenType.BOOLEAN, False, start, self.source_map)
         else:
-            raise LexerError(f"Invalid boolean: #{char}", start_line, start_column)
+            raise self.error(f"Invalid boolean: #{char}", start)
 
     def is_symbol_char(self, char: str) -> bool:
         """Check if a character can be part of a symbol."""
@@ -144,16 +194,16 @@ class Lexer:
         char = self.current_char()
 
         if char is None:
-            return Token(TokenType.EOF, None, self.line, self.column)
+            return Token(TokenType.EOF, None, self.pos, self.source_map)
 
         # Parentheses
         if char == '(':
-            token = Token(TokenType.LPAREN, '(', self.line, self.column)
+            token = Token(TokenType.LPAREN, '(', self.pos, self.source_map)
             self.advance()
             return token
 
         if char == ')':
-            token = Token(TokenType.RPAREN, ')', self.line, self.column)
+            token = Token(TokenType.RPAREN, ')', self.pos, self.source_map)
             self.advance()
             return token
 
@@ -169,14 +219,202 @@ class Lexer:
         if self.is_symbol_char(char):
             return self.read_symbol()
 
-        raise LexerError(f"Unexpected character: {char!r}", self.line, self.column)
+        raise self.error(f"Unexpected character: {char!r}", self.pos)
 
-    def tokenize(self) -> List[Token]:
-        """Tokenize the entire source code."""
-        tokens = []
+    def iter_tokens(self) -> Iterator[Token]:
+        """Lazily generate tokens, ending with the EOF token."""
         while True:
             token = self.next_token()
-            tokens.append(token)
+            yield token
+            if token.type == TokenType.EOF:
+                return
+
+    def tokenize(self) -> List[Token]:
+        """Tokenize the entire source code."""
+        return list(self.iter_tokens())
+
+
+# A comment, from ';' to the end of its line
+COMMENT_PATTERN = re.compile(r";[^\n]*")
+
+
+def paren_depth(source: str, start: int, end: int, depth: int = 0) -> int:
+    """Paren depth at `end`, given the depth at `start`.
+
+    `start` must not be inside a comment. Parens are counted with
+    str.count between comments, so only comments cost a Python-level
+    step; this is far cheaper than tokenizing.
+    """
+    position = start
+    count = source.count
+    for match in COMMENT_PATTERN.finditer(source, start, end):
+        depth += count('(', position, match.start()) - count(')', position, match.start())
+        position = match.end()
+    return depth + count('(', position, end) - count(')', position, end)
+
+
+# Master pattern for RegexLexer. Each match skips any whitespace and
+# comments, then captures exactly one token. Alternatives are tried in
+# order, so numbers win over symbols ("-5" is a number, "-" alone is a
+# symbol) and the catch-all groups turn into the errors Lexer raises.
+TOKEN_PATTERN = re.compile(r"""
+    (?:\s+|;[^\n]*)*
+    (?:
+        (?P<LPAREN>\()
+      | (?P<RPAREN>\))
+      | (?P<NUMBER>-?\d+)
+      | (?P<SYMBOL>[\w+\-*/=<>!?]+)
+      | (?P<BOOLEAN>\#[tf])
+      | (?P<HASH>\#)
+      | (?P<INVALID>.)
+      | (?P<EOF>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+
+class RegexLexer(Lexer):
+    """Lexer driven by a single compiled regular expression.
+
+    Produces exactly the same tokens and errors as Lexer, but lets the
+    regex engine consume whole runs of characters instead of stepping
+    through the source one character at a time.
+    """
+
+    def __init__(self, source: str, start: int = 0, line: int = 1, column: int = 1):
+        super().__init__(source, start, line, column)
+        self._scanner = self._scan()
+
+    def _scan(self) -> Iterator[Token]:
+        """Generate tokens from the master pattern, ending with EOF."""
+        source = self.source
+        source_map = self.source_map
+        intern = sys.intern
+
+        for match in TOKEN_PATTERN.finditer(source, self.pos):
+            kind = match.lastgroup
+            start = match.start(kind)
+
+            if kind == 'LPAREN':
+                yield Token(TokenType.LPAREN, '(', start, source_map)
+            elif kind == 'RPAREN':
+                yield Token(TokenType.RPAREN, ')', start, source_map)
+            elif kind == 'SYMBOL':
+                yield Token(TokenType.SYMBOL, intern(match.group(kind)), start, source_map)
+            elif kind == 'NUMBER':
+                yield Token(TokenType.NUMBER, int(match.group(kind)), start, source_map)
+            elif kind == 'BOOLEAN':
+                yield Token(TokenType.BOOLEAN, match.group(kind) == '#t', start, source_map)
+            elif kind == 'EOF':
+                self.pos = start
+                yield Token(TokenType.EOF, None, start, source_map)
+                return
+            elif kind == 'HASH':
+                char = source[start + 1] if start + 1 < len(source) else None
+                raise self.error(f"Invalid boolean: #{char}", start)
+            else:
+                raise self.error(f"Unexpected character: {match.group(kind)!r}", start)
+
+    def next_token(self) -> Token:
+        """Read and return the next token."""
+        try:
+            return next(self._scanner)
+        except StopIteration:
+            return Token(TokenType.EOF, None, len(self.source), self.source_map)
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """Lazily generate tokens, ending with the EOF token."""
+        return self._scanner
+
+
+# Byte-level counterpart of TOKEN_PATTERN for UTF-8 input. Bytes classes
+# are ASCII-only, so any run of symbol characters that contains a
+# non-ASCII byte is matched as a SYMBOL and re-scanned as text; numbers
+# refuse to stop right before such a byte so the run stays whole.
+BYTES_TOKEN_PATTERN = re.compile(rb"""
+    (?:[\t\n\v\f\r\x1c-\x1f ]+|;[^\n]*)*
+    (?:
+        (?P<LPAREN>\()
+      | (?P<RPAREN>\))
+      | (?P<NUMBER>-?[0-9]+)(?![0-9\x80-\xff])
+      | (?P<SYMBOL>[\w+\-*/=<>!?\x80-\xff]+)
+      | (?P<BOOLEAN>\#[tf])
+      | (?P<HASH>\#)
+      | (?P<INVALID>.)
+      | (?P<EOF>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+
+class BytesLexer(RegexLexer):
+    """Lexer over UTF-8 bytes, such as a memory-mapped file.
+
+    The source is never decoded as a whole: offsets are byte offsets,
+    and symbol text is decoded only when its token is emitted. Tokens,
+    errors and reported line/column positions match what the other
+    lexers produce for the decoded text.
+    """
+
+    def _scan(self) -> Iterator[Token]:
+        """Generate tokens from the byte pattern, ending with EOF."""
+        source = self.source
+        source_map = self.source_map
+        intern = sys.intern
+
+        for match in BYTES_TOKEN_PATTERN.finditer(source, self.pos):
+            kind = match.lastgroup
+            start = match.start(kind)
+
+            if kind == 'LPAREN':
+                yield Token(TokenType.LPAREN, '(', start, source_map)
+            elif kind == 'RPAREN':
+                yield Token(TokenType.RPAREN, ')', start, source_map)
+            elif kind == 'SYMBOL':
+                text = match.group(kind)
+                if text.isascii():
+                    yield Token(TokenType.SYMBOL, intern(text.decode('ascii')), start, source_map)
+                else:
+                    yield from self._scan_text(text.decode('utf-8'), start)
+            elif kind == 'NUMBER':
+                yield Token(TokenType.NUMBER, int(match.group(kind)), start, source_map)
+            elif kind == 'BOOLEAN':
+                yield Token(TokenType.BOOLEAN, match.group(kind) == b'#t', start, source_map)
+            elif kind == 'EOF':
+                self.pos = start
+                yield Token(TokenType.EOF, None, start, source_map)
+                return
+            elif kind == 'HASH':
+                following = source[start + 1:start + 5].decode('utf-8', 'ignore')
+                char = following[0] if following else None
+                raise self.error(f"Invalid boolean: #{char}", start)
+            else:
+                char = match.group(kind).decode('latin-1')
+                raise self.error(f"Unexpected character: {char!r}", start)
+
+    def _scan_text(self, text: str, base: int) -> Iterator[Token]:
+        """Lex a decoded non-ASCII run with the text rules."""
+        run = _DecodedRunLexer(text, base, self)
+        for token in run.iter_tokens():
             if token.type == TokenType.EOF:
-                break
-        return tokens
+                return
+            token.offset = run.byte_offset(token.offset)
+            token.source_map = self.source_map
+            yield token
+
+
+class _DecodedRunLexer(RegexLexer):
+    """RegexLexer over one decoded run of a BytesLexer source.
+
+    Offsets and errors are translated back into the enclosing source.
+    """
+
+    def __init__(self, text: str, base: int, outer: BytesLexer):
+        super().__init__(text)
+        self.base = base
+        self.outer = outer
+
+    def byte_offset(self, offset: int) -> int:
+        """Translate a character offset in the run to a source offset."""
+        return self.base + len(self.source[:offset].encode('utf-8'))
+
+    def error(self, message: str, offset: int) -> LexerError:
+        return self.outer.error(message, self.byte_offset(offset))
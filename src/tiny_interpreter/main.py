@@ -1,12 +1,23 @@
 """Main entry point for Tiny Interpreter."""
 
+import argparse
+import mmap
+import os
 import sys
-from .evaluator import Evaluator
+from functools import partial
+from typing import List, Optional
 
+from . import cache
+from .evaluator import ENGINES, Evaluator, STREAM_CHUNK_SIZE
+from .lexer import BytesLexer
+from .parallel import parse_parallel
+from .parser import ASTNode, Parser, parse
+from .reader import read_stream
 
-def repl():
+
+def repl(engine: str = 'tree'):
     """Run the Read-Eval-Print Loop."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     print("Tiny Interpreter v0.1.0")
     print("Type (exit) to quit")
     print()
@@ -31,15 +42,76 @@ def repl():
             print(f"Error: {e}")
 
 
-def run_file(filename: str):
-    """Run a file."""
-    evaluator = Evaluator()
+def parse_file_mmap(filename: str) -> List[ASTNode]:
+    """Parse a file through a read-only memory map.
+
+    The file is lexed as UTF-8 bytes and never decoded as a whole.
+    """
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            tokens = BytesLexer(data).iter_tokens()
+            try:
+                return Parser(tokens).parse()
+            finally:
+                # The scanner holds a buffer export; the map can't close until it goes
+                tokens.close()
+
+
+def parse_file(filename: str, use_mmap: bool = False, jobs: Optional[int] = None) -> List[ASTNode]:
+    """Lex and parse a file.
+
+    Args:
+        filename: Path of the source file.
+        use_mmap: Lex the file from a memory map instead of reading it
+            into a string.
+        jobs: Parse the file across this many worker processes.
+    """
+    if use_mmap:
+        return parse_file_mmap(filename)
+
+    with open(filename, 'r') as f:
+        source = f.read()
+
+    if jobs:
+        return parse_parallel(source, workers=jobs)
+    return parse(source)
+
+
+def run_file(filename: str, use_mmap: bool = False, jobs: Optional[int] = None,
+             use_cache: bool = True, engine: str = 'tree'):
+    """Run a file.
+
+    By default the file is streamed: each top-level form is read, parsed
+    and evaluated before the next, so memory stays flat however long the
+    script is.
+
+    Args:
+        filename: Path of the source file.
+        use_mmap: Lex the file from a memory map instead of reading it
+            into a string.
+        jobs: Parse the file across this many worker processes.
+        use_cache: Load the AST from the file's __tlcache__ entry when it
+            is fresh, and write it there after parsing otherwise.
+        engine: How the evaluator runs forms (see Evaluator).
+    """
+    evaluator = Evaluator(engine=engine)
 
     try:
         with open(filename, 'r') as f:
-            source = f.read()
+            if use_mmap or jobs:
+                def parse_forms():
+                    return parse_file(filename, use_mmap, jobs)
+            else:
+                def parse_forms():
+                    return read_stream(iter(partial(f.read, STREAM_CHUNK_SIZE), ''))
+
+            forms = cache.load_or_parse(filename, parse_forms) if use_cache else parse_forms()
+            result = None
+            for result in evaluator.eval_forms(forms):
+                pass
 
-        result = evaluator.run(source)
         if result is not None:
             print(result)
 
@@ -53,13 +125,49 @@ def run_file(filename: str):
 
 def main():
     """Main entry point."""
-    if len(sys.argv) == 1:
-        repl()
-    elif len(sys.argv) == 2:
-        run_file(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        prog="python -m tiny_interpreter",
+        description="Tiny Interpreter - A minimal Lisp-style interpreter."
+    )
+    parser.add_argument("file", nargs="?", help="source file to run; starts the REPL if omitted")
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="lex the file from a memory map as bytes (for very large scripts)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        metavar="N",
+        help="parse the file across N worker processes (for very large scripts)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="neither read nor write the parsed AST in __tlcache__"
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="delete the file's cached AST, then run without the cache"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="tree",
+        help="walk the AST (tree, the default), compile each form to closures first "
+             "(closure), compile it to bytecode for a stack machine (vm), or walk the "
+             "AST with an explicit continuation stack, for unbounded recursion (cek)"
+    )
+    args = parser.parse_args()
+
+    if args.file is None:
+        repl(args.engine)
     else:
-        print("Usage: python -m tiny_interpreter [file]")
-        sys.exit(1)
+        if args.clear_cache:
+            cache.clear(args.file)
+        run_file(args.file, use_mmap=args.mmap, jobs=args.jobs,
+                 use_cache=not (args.no_cache or args.clear_cache), engine=args.engine)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+"""Parallel parsing for Tiny Interpreter.
+
+A large source is cut into chunks at top-level form boundaries, and the
+chunks are lexed and parsed in worker processes. Each chunk's lexer is
+given the chunk's line and column in the whole source, so errors carry
+the same messages as a sequential parse(), and the offsets of a chunk's
+forms are shifted by the chunk's start when the AST is stitched back.
+"""
+
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from .lexer import RegexLexer, paren_depth
+from .parser import ASTNode, Parser
+
+# Parens and comments, for the scan that looks for a boundary
+_PAREN_PATTERN = re.compile(r"[()]|;[^\n]*")
+
+# Sources smaller than this are parsed in-process
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+def split_forms(source: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[int]:
+    """Find offsets that split a source into chunks of whole top-level forms.
+
+    Each boundary lies between two top-level forms, roughly every
+    `chunk_size` characters. Splitting stops at the first unbalanced
+    ')', so the chunk holding it parses to the same error as the whole
+    source would.
+
+    Returns:
+        Boundary offsets, starting with 0; the last chunk runs to the end.
+    """
+    boundaries = [0]
+    position = depth = 0
+    target = chunk_size
+
+    while target < len(source):
+        # Count parens up to a point that can't be inside a comment: the
+        # last line start before the target, or the target itself when no
+        # comment starts on the way
+        line_start = source.rfind('\n', position, target) + 1
+        at_line_start = line_start > position
+        if at_line_start:
+            end = line_start
+        elif source.find(';', position, target) < 0:
+            end = target
+        else:
+            end = position
+        depth = paren_depth(source, position, end, depth)
+        position = end
+        if depth < 0:
+            break
+
+        if depth or not at_line_start:
+            # Run on to the ')' that closes the current top-level form
+            for match in _PAREN_PATTERN.finditer(source, position):
+                char = match.group()
+                if char == '(':
+                    depth += 1
+                elif char == ')':
+                    depth -= 1
+                    if depth <= 0:
+                        break
+            else:
+                break
+            if depth < 0:
+                break
+            position = match.end()
+
+        if position >= len(source):
+            break
+        boundaries.append(position)
+        target = position + chunk_size
+
+    return boundaries
+
+
+def _chunks(source: str, boundaries: List[int]) -> List[Tuple[str, int, int]]:
+    """Cut a source at boundaries into (text, line, column) chunks."""
+    chunks = []
+    line = 1
+    previous = 0
+    ends = boundaries[1:] + [len(source)]
+    for start, end in zip(boundaries, ends):
+        line += source.count('\n', previous, start)
+        column = start - (source.rfind('\n', 0, start) + 1) + 1
+        chunks.append((source[start:end], line, column))
+        previous = start
+    return chunks
+
+
+def _parse_chunk(chunk: Tuple[str, int, int]) -> List[ASTNode]:
+    """Parse one chunk, with errors positioned in the whole source."""
+    text, line, column = chunk
+    return Parser(RegexLexer(text, 0, line, column).iter_tokens()).parse()
+
+
+def parse_parallel(source: str, workers: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   executor: Optional[Executor] = None) -> List[ASTNode]:
+    """Lex and parse a source across worker processes.
+
+    Args:
+        source: The source code to parse.
+        workers: Number of worker processes (default: one per CPU).
+        chunk_size: Approximate characters per chunk.
+        executor: An existing executor to submit chunks to, instead of
+            starting a new process pool.
+
+    Returns:
+        The same top-level forms parse() returns.
+
+    Raises:
+        LexerError, ParserError: The error parse() would raise.
+    """
+    boundaries = split_forms(source, chunk_size)
+    chunks = _chunks(source, boundaries)
+    if len(chunks) == 1:
+        return _parse_chunk(chunks[0])
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return parse_parallel(source, chunk_size=chunk_size, executor=pool)
+
+    nodes: List[ASTNode] = []
+    # Results arrive in order, so the first error raised is the first in the source
+    for start, chunk_nodes in zip(boundaries, executor.map(_parse_chunk, chunks)):
+        for node in chunk_nodes:
+            node.offset += start
+        nodes.extend(chunk_nodes)
+    return nodes
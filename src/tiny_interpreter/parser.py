@@ -1,20 +1,29 @@
 """Parser for Tiny Interpreter.
 
 The parser converts a sequence of tokens into an Abstract Syntax Tree (AST).
+
+Nodes store a single source offset instead of a line and column. A
+top-level form stores its offset in the source; every node inside it
+stores its offset from the start of that form, which is small enough to
+be a cached int. Line and column are resolved through a SourceMap only
+when a tool asks for them, see node_positions().
 """
 
 from dataclasses import dataclass
-from typing import List, Union
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 from .lexer import Token, TokenType, Lexer
+from .source_map import SourceMap
 
 
-# AST Node Types
+# AST Node Types. Nodes are slotted: a large AST holds millions of them,
+# and a per-instance __dict__ would dominate its memory.
 @dataclass
 class Number:
     """AST node for numbers."""
+    __slots__ = ('value', 'offset')
+
     value: int
-    line: int
-    column: int
+    offset: int
 
     def __repr__(self):
         return f"Number({self.value})"
@@ -23,9 +32,10 @@ class Number:
 @dataclass
 class Boolean:
     """AST node for booleans."""
+    __slots__ = ('value', 'offset')
+
     value: bool
-    line: int
-    column: int
+    offset: int
 
     def __repr__(self):
         return f"Boolean({self.value})"
@@ -34,9 +44,10 @@ class Boolean:
 @dataclass
 class Symbol:
     """AST node for symbols."""
+    __slots__ = ('name', 'offset')
+
     name: str
-    line: int
-    column: int
+    offset: int
 
     def __repr__(self):
         return f"Symbol({self.name!r})"
@@ -45,9 +56,10 @@ class Symbol:
 @dataclass
 class SExpression:
     """AST node for S-expressions (lists)."""
+    __slots__ = ('elements', 'offset')
+
     elements: List['ASTNode']
-    line: int
-    column: int
+    offset: int
 
     def __repr__(self):
         return f"SExpression({self.elements})"
@@ -65,25 +77,35 @@ class ParserError(Exception):
         self.column = column
         super().__init__(f"{message} at line {line}, column {column}")
 
+    def __reduce__(self):
+        # Rebuild from the original arguments, e.g. when sent between processes
+        return (self.__class__, (self.message, self.line, self.column))
+
 
 class Parser:
-    """Parser for converting tokens to AST."""
+    """Parser for converting tokens to AST.
 
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.pos = 0
+    Tokens are consumed from any iterable with one token of lookahead,
+    so a lazy source such as Lexer.iter_tokens() is never materialized
+    as a list.
+    """
+
+    def __init__(self, tokens: Iterable[Token]):
+        self.tokens = iter(tokens)
+        self.lookahead = next(self.tokens)
+        # Offset of the top-level form being parsed
+        self.form_start = 0
 
     def current_token(self) -> Token:
         """Return the current token."""
-        if self.pos >= len(self.tokens):
-            return self.tokens[-1]  # Return EOF token
-        return self.tokens[self.pos]
+        return self.lookahead
 
     def advance(self) -> Token:
         """Consume and return the current token."""
-        token = self.current_token()
-        if self.pos < len(self.tokens) - 1:
-            self.pos += 1
+        token = self.lookahead
+        if token.type != TokenType.EOF:
+            # Stay on the last token if the stream ends without EOF
+            self.lookahead = next(self.tokens, token)
         return token
 
     def expect(self, token_type: TokenType) -> Token:
@@ -92,8 +114,7 @@ class Parser:
         if token.type != token_type:
             raise ParserError(
                 f"Expected {token_type.name}, got {token.type.name}",
-                token.line,
-                token.column
+                *token.position
             )
         return self.advance()
 
@@ -103,20 +124,19 @@ class Parser:
 
         if token.type == TokenType.NUMBER:
             self.advance()
-            return Number(token.value, token.line, token.column)
+            return Number(token.value, token.offset - self.form_start)
 
         if token.type == TokenType.BOOLEAN:
             self.advance()
-            return Boolean(token.value, token.line, token.column)
+            return Boolean(token.value, token.offset - self.form_start)
 
         if token.type == TokenType.SYMBOL:
             self.advance()
-            return Symbol(token.value, token.line, token.column)
+            return Symbol(token.value, token.offset - self.form_start)
 
         raise ParserError(
             f"Unexpected token: {token.type.name}",
-            token.line,
-            token.column
+            *token.position
         )
 
     def parse_sexp(self) -> SExpression:
@@ -128,13 +148,12 @@ class Parser:
             if self.current_token().type == TokenType.EOF:
                 raise ParserError(
                     "Unexpected EOF, expected ')'",
-                    self.current_token().line,
-                    self.current_token().column
+                    *self.current_token().position
                 )
             elements.append(self.parse_expr())
 
         self.expect(TokenType.RPAREN)
-        return SExpression(elements, lparen.line, lparen.column)
+        return SExpression(elements, lparen.offset - self.form_start)
 
     def parse_expr(self) -> ASTNode:
         """Parse an expression."""
@@ -145,19 +164,128 @@ class Parser:
         else:
             return self.parse_atom()
 
+    def parse_form(self) -> ASTNode:
+        """Parse a top-level expression, which stores its source offset."""
+        self.form_start = self.lookahead.offset
+        node = self.parse_expr()
+        node.offset = self.form_start
+        return node
+
     def parse(self) -> List[ASTNode]:
         """Parse all expressions in the token stream."""
         expressions = []
 
         while self.current_token().type != TokenType.EOF:
-            expressions.append(self.parse_expr())
+            expressions.append(self.parse_form())
 
         return expressions
 
 
-def parse(source: str) -> List[ASTNode]:
-    """Convenience function to lex and parse source code."""
-    lexer = Lexer(source)
-    tokens = lexer.tokenize()
-    parser = Parser(tokens)
-    return parser.parse()
+class IterativeParser(Parser):
+    """Parser that keeps open lists on an explicit stack.
+
+    Builds the same AST and raises the same errors as Parser, but
+    nesting depth is bounded by memory rather than by Python's
+    recursion limit.
+    """
+
+    def parse_expr(self) -> ASTNode:
+        """Parse an expression."""
+        # Element lists of the open S-expressions, each with its '(' token
+        stack = []
+
+        while True:
+            token = self.lookahead
+            token_type = token.type
+
+            if token_type == TokenType.LPAREN:
+                self.advance()
+                stack.append(([], token))
+                continue
+
+            if not stack:
+                return self.parse_atom()
+
+            if token_type == TokenType.RPAREN:
+                self.advance()
+                elements, lparen = stack.pop()
+                node = SExpression(elements, lparen.offset - self.form_start)
+                if not stack:
+                    return node
+            elif token_type == TokenType.EOF:
+                raise ParserError(
+                    "Unexpected EOF, expected ')'",
+                    *token.position
+                )
+            else:
+                node = self.parse_atom()
+
+            stack[-1][0].append(node)
+
+
+def parse(source: str, mode: str = "tokens", hash_cons: bool = False) -> List[ASTNode]:
+    """Convenience function to lex and parse source code.
+
+    Args:
+        source: The source code to parse.
+        mode: "tokens" to run Lexer and Parser, "iterative" to run
+            Lexer and IterativeParser, or "fused" to build the AST in one
+            pass with the reader. All give the same AST and errors.
+        hash_cons: Share structurally identical subtrees. Shared nodes
+            keep the offset of their first occurrence, absolute for a
+            top-level form and relative to its form for a nested node
+            (the two are never shared), so node_positions is exact for
+            top-level forms only; use hashcons.HashConser for the offset
+            of every occurrence.
+    """
+    if mode == "fused":
+        from .reader import read
+        nodes = read(source)
+    elif mode in ("tokens", "iterative"):
+        parser_class = IterativeParser if mode == "iterative" else Parser
+        lexer = Lexer(source)
+        parser = parser_class(lexer.iter_tokens())
+        nodes = parser.parse()
+    else:
+        raise ValueError(f"Unknown parse mode: {mode!r}")
+
+    if hash_cons:
+        from .hashcons import HashConser
+        nodes = HashConser().share(nodes)
+    return nodes
+
+
+def source_offset(form: ASTNode, node: Optional[ASTNode] = None) -> int:
+    """Offset in the source of a node inside a top-level form.
+
+    Args:
+        form: The top-level form.
+        node: A node of the form (default: the form itself).
+    """
+    if node is None or node is form:
+        return form.offset
+    return form.offset + node.offset
+
+
+def node_positions(forms: Iterable[ASTNode],
+                   source_map: SourceMap) -> Iterator[Tuple[ASTNode, int, int]]:
+    """Resolve the positions of every node of some top-level forms.
+
+    Args:
+        forms: Top-level forms, as returned by parse().
+        source_map: Map of the source the forms were parsed from.
+
+    Yields:
+        (node, line, column) for each node, in pre-order.
+    """
+    position = source_map.position
+    for form in forms:
+        start = form.offset
+        yield (form,) + position(start)
+        if isinstance(form, SExpression):
+            stack = list(reversed(form.elements))
+            while stack:
+                node = stack.pop()
+                yield (node,) + position(start + node.offset)
+                if isinstance(node, SExpression):
+                    stack.extend(reversed(node.elements))
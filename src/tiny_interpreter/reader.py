@@ -0,0 +1,178 @@
+"""Fused reader for Tiny Interpreter.
+
+The reader goes straight from source text to AST in a single pass: each
+match of the lexer's master pattern becomes an AST node, or opens or
+closes a list, without an intermediate Token. It accepts exactly the
+language of Lexer + Parser and raises the same errors at the same
+positions.
+"""
+
+import re
+import sys
+from typing import Iterable, Iterator, List
+
+from .lexer import LexerError, TOKEN_PATTERN, paren_depth
+from .parser import ASTNode, Boolean, Number, ParserError, SExpression, Symbol
+from .source_map import SourceMap
+
+# Parens, for read_stream to find where a form on a long line ends
+_PARENS = re.compile(r"[()]")
+
+
+class Reader:
+    """Single-pass reader from source code to AST.
+
+    Open lists are kept on an explicit stack, so nesting depth is not
+    limited by Python's recursion limit.
+    """
+
+    def __init__(self, source: str, start: int = 0, line: int = 1, column: int = 1):
+        """Create a reader.
+
+        Args:
+            source: The source code to read.
+            start: Offset to start reading at.
+            line: Line number at `start`.
+            column: Column number at `start`.
+        """
+        self.source = source
+        self.pos = start
+        self.source_map = SourceMap(source, start, line, column)
+
+    def error(self, message: str, offset: int) -> LexerError:
+        """Build a LexerError positioned at a source offset."""
+        return LexerError(message, *self.source_map.position(offset))
+
+    def read(self) -> List[ASTNode]:
+        """Read all expressions in the source."""
+        return list(self.iter_forms())
+
+    def iter_forms(self) -> Iterator[ASTNode]:
+        """Lazily read top-level expressions, one at a time.
+
+        A form is yielded as soon as it is complete, before anything
+        after it is read, so a later error doesn't hold it back.
+        """
+        source = self.source
+        position = self.source_map.position
+        intern = sys.intern
+
+        forms: List[ASTNode] = []
+        # Elements of the innermost open list, or the top-level forms
+        elements = forms
+        # Enclosing element lists, each with its open paren's offset
+        stack = []
+        # Offset of the current top-level form; nodes store theirs relative to it
+        form = 0
+
+        for match in TOKEN_PATTERN.finditer(source, self.pos):
+            kind = match.lastgroup
+            start = match.start(kind)
+            if stack:
+                offset = start - form
+            else:
+                offset = form = start
+
+            if kind == 'SYMBOL':
+                elements.append(Symbol(intern(match.group(kind)), offset))
+            elif kind == 'LPAREN':
+                stack.append((elements, offset))
+                elements = []
+            elif kind == 'RPAREN':
+                if not stack:
+                    raise ParserError("Unexpected token: RPAREN", *position(start))
+                outer, offset = stack.pop()
+                outer.append(SExpression(elements, offset))
+                elements = outer
+            elif kind == 'NUMBER':
+                elements.append(Number(int(match.group(kind)), offset))
+            elif kind == 'BOOLEAN':
+                elements.append(Boolean(match.group(kind) == '#t', offset))
+            elif kind == 'EOF':
+                self.pos = start
+                if stack:
+                    raise ParserError("Unexpected EOF, expected ')'", *position(start))
+                return
+            elif kind == 'HASH':
+                char = source[start + 1] if start + 1 < len(source) else None
+                raise self.error(f"Invalid boolean: #{char}", start)
+            else:
+                raise self.error(f"Unexpected character: {match.group(kind)!r}", start)
+
+            # Only a form that just completed at the top level is here
+            if forms:
+                yield forms.pop()
+
+
+def read(source: str) -> List[ASTNode]:
+    """Convenience function to read source code into an AST."""
+    return Reader(source).read()
+
+
+def read_stream(chunks: Iterable[str]) -> Iterator[ASTNode]:
+    """Lazily read top-level forms from a stream of text chunks.
+
+    Only the text of forms that are not complete yet is buffered: each
+    time the buffer holds whole lines that close every open paren, or a
+    ')' that closes a top-level list, the text up to there is read and
+    dropped, so a script written on one long line streams too (unless
+    it is a long run of bare atoms). Offsets and errors are those of
+    the concatenated text.
+
+    Args:
+        chunks: Pieces of source text, such as blocks read from a file.
+    """
+    buffer = ""
+    # Offset, line and column of buffer[0] in the concatenated text
+    base = 0
+    line = column = 1
+    # Paren depth at buffer[scanned], which is never inside a comment
+    scanned = depth = 0
+
+    for chunk in chunks:
+        buffer += chunk
+        cut = 0
+        newline = buffer.find('\n', scanned)
+        while newline >= 0:
+            depth = paren_depth(buffer, scanned, newline, depth)
+            scanned = newline + 1
+            if depth <= 0:
+                # A negative depth is an unmatched ')': let the reader report it
+                cut = scanned
+            newline = buffer.find('\n', scanned)
+
+        # The unfinished last line, up to a comment that may go on in
+        # the next chunk: a ')' back at depth 0 ends a form too
+        end = buffer.find(';', scanned)
+        if end < 0:
+            end = len(buffer)
+        for match in _PARENS.finditer(buffer, scanned, end):
+            if match.group() == '(':
+                depth += 1
+            else:
+                depth -= 1
+                if depth <= 0:
+                    cut = match.end()
+        scanned = end
+
+        if cut:
+            yield from _rebased(Reader(buffer[:cut], 0, line, column).iter_forms(), base)
+            base += cut
+            newlines = buffer.count('\n', 0, cut)
+            if newlines:
+                line += newlines
+                column = cut - buffer.rfind('\n', 0, cut)
+            else:
+                column += cut
+            buffer = buffer[cut:]
+            scanned -= cut
+
+    if buffer:
+        yield from _rebased(Reader(buffer, 0, line, column).iter_forms(), base)
+
+
+def _rebased(forms: Iterable[ASTNode], base: int) -> Iterator[ASTNode]:
+    """Shift the offsets of top-level forms read from a piece of a larger text."""
+    for form in forms:
+        form.offset += base
+        yield form
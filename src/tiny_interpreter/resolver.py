@@ -0,0 +1,250 @@
+"""Lexical addressing for Tiny Interpreter.
+
+The resolver runs between parsing and evaluation. It rewrites each
+variable reference inside a lambda into a LocalRef that names the frame
+(how many lambdas out) and the slot the variable lives in, and every
+other reference into a GlobalRef, so the evaluator indexes lists instead
+of searching a chain of dicts by name.
+
+A lambda's frame has a slot for each parameter and for each name its
+body defines, wherever the define appears (inside if, begin or an
+argument), except in nested lambdas and quoted data. A define only
+binds its slot when it runs; until then the name resolves further out by
+name, exactly as the dict-based environment would find it.
+
+Malformed special forms are left as they are, so that evaluating them
+raises the same error as without resolution. The resolver builds new
+nodes and never modifies the AST it is given; the nodes it builds
+belong to one evaluator, which caches global cells in them.
+"""
+
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Sequence, Union
+
+from .environment import Cell
+from .parser import ASTNode, Symbol, SExpression
+
+
+@dataclass
+class LocalRef:
+    """Reference to a variable in a lambda's frame."""
+    __slots__ = ('name', 'depth', 'index', 'offset')
+
+    name: str
+    # Number of frames out from the current one
+    depth: int
+    index: int
+    offset: int
+
+
+@dataclass
+class GlobalRef:
+    """Reference to a variable that is not bound by any enclosing lambda.
+
+    The evaluator stores the variable's global Cell in `cell` the first
+    time the reference runs.
+    """
+    __slots__ = ('name', 'offset', 'cell')
+
+    name: str
+    offset: int
+    cell: Optional[Cell]
+
+
+@dataclass
+class LocalDefine:
+    """A define that binds a slot of the current frame."""
+    __slots__ = ('name', 'index', 'value', 'offset')
+
+    name: str
+    index: int
+    value: 'ResolvedNode'
+    offset: int
+
+
+@dataclass
+class Lambda:
+    """A lambda with its frame layout."""
+    __slots__ = ('params', 'slots', 'size', 'body', 'offset')
+
+    params: List[str]
+    # Slot index of each parameter and defined name
+    slots: Dict[str, int]
+    # Number of slots in a frame
+    size: int
+    body: List['ResolvedNode']
+    offset: int
+
+
+# Type alias for any node of a resolved AST
+ResolvedNode = Union[ASTNode, LocalRef, GlobalRef, LocalDefine, Lambda]
+
+
+class Resolver:
+    """Rewrites variable references to lexical addresses."""
+
+    def __init__(self, special_forms: Collection[str] = ()):
+        """Create a resolver.
+
+        Args:
+            special_forms: Names of special forms besides the built-in
+                ones. Their handlers may look names up, or define them,
+                in whatever environment they are given, so a top-level
+                form that uses one is left unresolved. Read on every
+                resolve, so an evaluator can pass a collection it adds
+                to later.
+        """
+        self.special_forms = special_forms
+
+    def resolve(self, node: ASTNode, scopes: Sequence[Dict[str, int]] = ()) -> ResolvedNode:
+        """Resolve a node.
+
+        Args:
+            node: AST node to resolve.
+            scopes: Slot layouts of the enclosing lambdas, innermost last.
+
+        Returns:
+            The node with its variable references resolved.
+        """
+        if isinstance(node, Symbol):
+            depth = 0
+            for slots in reversed(scopes):
+                index = slots.get(node.name)
+                if index is not None:
+                    return LocalRef(node.name, depth, index, node.offset)
+                depth += 1
+            return GlobalRef(node.name, node.offset, None)
+
+        if not isinstance(node, SExpression) or not node.elements:
+            return node
+        if not scopes and uses_forms([node], self.special_forms, nested=True):
+            return node
+
+        first = node.elements[0]
+        args = node.elements[1:]
+        if isinstance(first, Symbol):
+            if first.name == 'define':
+                return self.resolve_define(node, scopes)
+            if first.name == 'lambda':
+                return self.resolve_lambda(node, scopes)
+            if first.name == 'quote':
+                return node
+            if first.name == 'if' and len(args) != 3:
+                return node
+            if first.name in ('if', 'begin'):
+                return SExpression([first] + [self.resolve(arg, scopes) for arg in args],
+                                   node.offset)
+
+        return SExpression([self.resolve(element, scopes) for element in node.elements],
+                           node.offset)
+
+    def resolve_define(self, node: SExpression, scopes: Sequence[Dict[str, int]]) -> ResolvedNode:
+        """Resolve (define name value)."""
+        args = node.elements[1:]
+        if len(args) != 2 or not isinstance(args[0], Symbol):
+            return node
+
+        value = self.resolve(args[1], scopes)
+        if not scopes:
+            return SExpression([node.elements[0], args[0], value], node.offset)
+        name = args[0].name
+        return LocalDefine(name, scopes[-1][name], value, node.offset)
+
+    def resolve_lambda(self, node: SExpression, scopes: Sequence[Dict[str, int]]) -> ResolvedNode:
+        """Resolve (lambda (params...) body...) and lay out its frame."""
+        params = _lambda_params(node)
+        if params is None:
+            return node
+
+        body = node.elements[2:]
+        # A repeated parameter is bound to its last argument, as with define
+        slots = {name: index for index, name in enumerate(params)}
+        size = len(params)
+        for name in defined_names(body):
+            if name not in slots:
+                slots[name] = size
+                size += 1
+
+        inner = list(scopes) + [slots]
+        return Lambda(params, slots, size, [self.resolve(expr, inner) for expr in body],
+                      node.offset)
+
+
+def _lambda_params(node: SExpression) -> Optional[List[str]]:
+    """Parameter names of a well-formed lambda, or None."""
+    if len(node.elements) < 3 or not isinstance(node.elements[1], SExpression):
+        return None
+    params = node.elements[1].elements
+    if not all(isinstance(param, Symbol) for param in params):
+        return None
+    return [param.name for param in params]
+
+
+def defined_names(body: List[ASTNode]) -> List[str]:
+    """Names that defines in a lambda body bind in its frame, in order."""
+    names: List[str] = []
+    stack = list(reversed(body))
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, SExpression) or not node.elements:
+            continue
+        first = node.elements[0]
+        if isinstance(first, Symbol):
+            if first.name in ('lambda', 'quote'):
+                continue
+            if (first.name == 'define' and len(node.elements) == 3
+                    and isinstance(node.elements[1], Symbol)):
+                names.append(node.elements[1].name)
+                stack.append(node.elements[2])
+                continue
+        stack.extend(reversed(node.elements))
+    return names
+
+
+def creates_closures(body: List[ASTNode]) -> bool:
+    """Whether a lambda body contains a lambda, outside quoted data.
+
+    Only a closure created during a call can keep the call's frame alive
+    after it returns; without one, the frame can't escape.
+    """
+    stack = list(body)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, SExpression) or not node.elements:
+            continue
+        first = node.elements[0]
+        if isinstance(first, Symbol):
+            if first.name == 'lambda':
+                return True
+            if first.name == 'quote':
+                continue
+        stack.extend(node.elements)
+    return False
+
+
+def uses_forms(body: List[ASTNode], names: Collection[str], nested: bool = False) -> bool:
+    """Whether expressions contain a special form with one of the given names.
+
+    Quoted data never counts, and neither do nested lambdas, unless
+    `nested`: a form in a nested lambda runs in that lambda's frame.
+    """
+    if not names:
+        return False
+    stack = list(body)
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, SExpression) or not node.elements:
+            continue
+        first = node.elements[0]
+        if isinstance(first, Symbol):
+            if first.name in names:
+                return True
+            if first.name == 'quote' or (first.name == 'lambda' and not nested):
+                continue
+        stack.extend(node.elements)
+    return False
+
+
+def resolve(node: ASTNode) -> ResolvedNode:
+    """Convenience function to resolve a top-level form."""
+    return Resolver().resolve(node)
@@ -0,0 +1,90 @@
+"""Source maps for Tiny Interpreter.
+
+A source map turns an offset into the source into a (line, column)
+position. Tokens only store offsets; positions are computed when
+something, such as an error message, actually asks for them.
+"""
+
+from bisect import bisect_right
+from typing import List, Tuple
+
+
+class SourceMap:
+    """Maps offsets in a source to line/column positions.
+
+    The source is either a str, or a bytes-like object (bytes, mmap)
+    holding UTF-8; offsets index into it directly. Columns always count
+    characters, so a bytes source reports the same positions as its
+    decoded text.
+
+    Positions are counted from `start`, which sits at (`line`, `column`);
+    this lets a fragment of a larger file report the file's positions.
+    Line starts are indexed lazily and only as far as offsets have been
+    asked for, so a source that never reports a position never pays for
+    it.
+    """
+
+    def __init__(self, source, start: int = 0, line: int = 1, column: int = 1):
+        """Create a source map.
+
+        Args:
+            source: The source code the offsets refer to.
+            start: Offset of the first position tracked.
+            line: Line number at `start`.
+            column: Column number at `start`.
+        """
+        self.source = source
+        self.start = start
+        self.line = line
+        self.column = column
+        self._is_text = isinstance(source, str)
+        self._newline = '\n' if self._is_text else b'\n'
+        self._line_starts: List[int] = [start]
+        self._indexed = False
+        # Most recently resolved line, for sequential lookups
+        self._index = 0
+        self._line_start = 0
+        self._line_end = -1
+        self._line_number = line
+        self._ascii = True
+
+    @property
+    def line_starts(self) -> List[int]:
+        """Offsets at which each line begins."""
+        self._index_through(len(self.source))
+        return self._line_starts
+
+    def _index_through(self, offset: int):
+        """Index line starts until the line holding `offset` is complete."""
+        starts = self._line_starts
+        find = self.source.find
+        while not self._indexed and starts[-1] <= offset:
+            found = find(self._newline, starts[-1])
+            if found < 0:
+                self._indexed = True
+            else:
+                starts.append(found + 1)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Return the 1-based (line, column) of an offset."""
+        if not self._line_start <= offset < self._line_end:
+            self._index_through(offset)
+            starts = self._line_starts
+            index = bisect_right(starts, offset)
+            self._index = index
+            self._line_start = starts[index - 1]
+            self._line_end = starts[index] if index < len(starts) else len(self.source) + 1
+            # One int per line, shared by every position reported on it
+            self._line_number = self.line + index - 1
+            if not self._is_text:
+                self._ascii = self.source[self._line_start:self._line_end].isascii()
+
+        if self._ascii:
+            column = offset - self._line_start + 1
+        else:
+            prefix = self.source[self._line_start:offset].decode('utf-8', 'replace')
+            column = len(prefix) + 1
+
+        if self._index == 1:
+            return self.line, column + self.column - 1
+        return self._line_number, column
@@ -0,0 +1,168 @@
+"""Stack virtual machine for Tiny Interpreter.
+
+The VM runs the CodeObjects of compiler.py in a single dispatch loop.
+Operands and results live on one value stack; a call to a closure saves
+the caller's code, program counter and frame on a call stack and jumps
+to the callee's code instead of recursing in Python, so the depth of
+Lisp recursion is bounded by memory, not by Python's recursion limit.
+
+Call frames are the Frames of the lexical addressing mode: a list of
+slot values, the slot layout and the parent frame or environment.
+"""
+
+from typing import Any, List, Optional
+
+from .compiler import (
+    CONST, LOAD_LOCAL, LOAD_OUTER, LOAD_BOUND, LOAD_GLOBAL, DEFINE_LOCAL, DEFINE_GLOBAL,
+    MAKE_CLOSURE, QUOTE, POP, JUMP, JUMP_IF_FALSE, CALL, RETURN, RAISE, CodeObject)
+from .environment import Cell, Frame, GlobalEnvironment, UNBOUND
+from .evaluator import Closure, EvaluatorError
+
+
+class VM:
+    """Runs compiled code against a global environment.
+
+    Closures made by the VM carry their CodeObject in `code`.
+    """
+
+    def __init__(self, global_env: GlobalEnvironment, globals: List[str], ast_to_value):
+        """Create a virtual machine.
+
+        Args:
+            global_env: Environment global variables live in.
+            globals: Name of each global slot, as the compiler numbers
+                them; the list is shared and grows as forms are compiled.
+            ast_to_value: Converts a quoted AST to its value.
+        """
+        self.global_env = global_env
+        self.globals = globals
+        self.ast_to_value = ast_to_value
+        # Cell of each global slot, looked up the first time it is read
+        self.cells: List[Optional[Cell]] = []
+
+    def run(self, code_object: CodeObject) -> Any:
+        """Run a top-level form's code and return its value."""
+        global_env = self.global_env
+        globals = self.globals
+        cells = self.cells
+        if len(cells) < len(globals):
+            cells.extend([None] * (len(globals) - len(cells)))
+
+        stack: List[Any] = []
+        # (code object, program counter, frame) of each suspended caller
+        calls: List[tuple] = []
+        code = code_object.code
+        constants = code_object.constants
+        frame: Any = global_env
+        pc = 0
+
+        while True:
+            op = code[pc]
+
+            if op == LOAD_LOCAL:
+                stack.append(frame.values[code[pc + 1]])
+                pc += 2
+
+            elif op == LOAD_GLOBAL:
+                slot = code[pc + 1]
+                cell = cells[slot]
+                if cell is None:
+                    cell = cells[slot] = global_env.cell(globals[slot])
+                stack.append(cell.value)
+                pc += 2
+
+            elif op == CONST:
+                stack.append(constants[code[pc + 1]])
+                pc += 2
+
+            elif op == CALL:
+                count = code[pc + 1]
+                pc += 2
+                start = len(stack) - count
+                args = stack[start:]
+                del stack[start:]
+                func = stack.pop()
+
+                if isinstance(func, Closure):
+                    callee = func.code
+                    if count != len(callee.params):
+                        raise EvaluatorError(
+                            f"Function expects {len(callee.params)} arguments, got {count}"
+                        )
+                    if callee.size > count:
+                        args.extend([UNBOUND] * (callee.size - count))
+                    calls.append((code_object, pc, frame))
+                    frame = Frame(args, callee.slots, func.env)
+                    code_object = callee
+                    code = callee.code
+                    constants = callee.constants
+                    pc = 0
+                elif callable(func):
+                    stack.append(func(*args))
+                else:
+                    raise EvaluatorError(f"Not a function: {func}")
+
+            elif op == JUMP_IF_FALSE:
+                if stack.pop():
+                    pc += 2
+                else:
+                    pc = code[pc + 1]
+
+            elif op == RETURN:
+                if not calls:
+                    return stack.pop()
+                code_object, pc, frame = calls.pop()
+                code = code_object.code
+                constants = code_object.constants
+
+            elif op == JUMP:
+                pc = code[pc + 1]
+
+            elif op == LOAD_OUTER:
+                outer = frame
+                for _ in range(code[pc + 1]):
+                    outer = outer.parent
+                stack.append(outer.values[code[pc + 2]])
+                pc += 3
+
+            elif op == LOAD_BOUND:
+                outer = frame
+                for _ in range(code[pc + 1]):
+                    outer = outer.parent
+                value = outer.values[code[pc + 2]]
+                if value is UNBOUND:
+                    # Not defined yet in that frame: look further out by name
+                    value = outer.parent.get(constants[code[pc + 3]])
+                stack.append(value)
+                pc += 4
+
+            elif op == POP:
+                stack.pop()
+                pc += 1
+
+            elif op == DEFINE_LOCAL:
+                frame.values[code[pc + 1]] = stack.pop()
+                stack.append(None)
+                pc += 2
+
+            elif op == DEFINE_GLOBAL:
+                global_env.define(globals[code[pc + 1]], stack.pop())
+                stack.append(None)
+                pc += 2
+
+            elif op == MAKE_CLOSURE:
+                callee = constants[code[pc + 1]]
+                closure = Closure(callee.params, [], frame, callee.slots, callee.size)
+                closure.code = callee
+                stack.append(closure)
+                pc += 2
+
+            elif op == QUOTE:
+                stack.append(self.ast_to_value(constants[code[pc + 1]]))
+                pc += 2
+
+            elif op == RAISE:
+                raise EvaluatorError(constants[code[pc + 1]])
+
+            else:
+                raise EvaluatorError(f"Unknown opcode: {op}")
@@ -0,0 +1,15 @@
+"""Helpers shared by the tests."""
+
+from src.tiny_interpreter.parser import SExpression
+
+
+def flatten(nodes):
+    """Flatten nodes into comparable (repr, offset) tuples."""
+    result = []
+    stack = list(reversed(list(nodes)))
+    while stack:
+        node = stack.pop()
+        result.append((repr(node), node.offset))
+        if isinstance(node, SExpression):
+            stack.extend(reversed(node.elements))
+    return result
@@ -0,0 +1,83 @@
+"""Tests for the closure compiler."""
+
+from operator import attrgetter
+
+import pytest
+from src.tiny_interpreter.analyzer import Scope
+from src.tiny_interpreter.environment import Env1, Env2
+from src.tiny_interpreter.evaluator import Evaluator, EvaluatorError
+
+
+PROGRAMS = [
+    ("(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))\n(fib 12)", 144),
+    ("(define f (lambda (a) (lambda (b) (lambda (c) (list a b c)))))\n(((f 1) 2) 3)", [1, 2, 3]),
+    ("(define f (lambda (x x) x))\n(f 1 2)", 2),
+    ("(define f (lambda (a b c d e) (list e d c b a)))\n(f 1 2 3 4 5)", [5, 4, 3, 2, 1]),
+    # A body define shadows a captured variable only once it has run
+    ("""(define x 1)
+        (define f (lambda (x) (lambda () (begin (define y x) (define x 2) (list y x)))))
+        (list ((f 5)) x)""", [[5, 2], 1]),
+    ("(define x 1)\n(define g (lambda (n) (if (> n 0) (define x n) 0) ((lambda (m) x) 0)))\n(list (g 3) (g 0))",
+     [3, 1]),
+    # Globals defined after a closure is created are still found
+    ("(define h (lambda () later))\n(define later 7)\n(h)", 7),
+    ("(define if 3)\n(define k (lambda (if) (quote if)))\n(list if (k 1))", [3, "if"]),
+    ("(define q (lambda () (quote (1 (2)))))\n(list (q) (begin) ())", [[1, [2]], None, []]),
+    ("(define apply-twice (lambda (f x) (f (f x))))\n(apply-twice (lambda (x) (* x 2)) 5)", 20),
+]
+
+
+@pytest.mark.parametrize("source, expected", PROGRAMS)
+def test_same_results_as_tree_walker(source, expected):
+    """Test that compiled programs behave exactly like the tree walker."""
+    assert Evaluator().run(source) == expected
+    assert Evaluator(engine='closure').run(source) == expected
+    assert Evaluator(engine='closure', small_frames=False).run(source) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "(define f (lambda (x) (+ x y)))\n(f 1)",
+    "(define f (lambda (x) (if x 1)))\n(f 1)",
+    "(define f (lambda (x) (define x)))\n(f 1)",
+    "(define f (lambda (x) (quote)))\n(f 1)",
+    "(define f (lambda (x) (lambda)))\n(f 1)",
+    "(define f (lambda (x) (lambda (1) x)))\n(f 1)",
+    "(define f (lambda (x) x))\n(f 1 2)",
+    "(1 2)",
+])
+def test_same_errors_as_tree_walker(source):
+    """Test that malformed forms raise the same errors, and only when they run."""
+    with pytest.raises((NameError, EvaluatorError)) as expected:
+        Evaluator().run(source)
+    evaluator = Evaluator(engine='closure')
+    # Compiling the definition doesn't raise
+    evaluator.run(source.split("\n")[0] if "\n" in source else "0")
+    with pytest.raises(type(expected.value)) as excinfo:
+        evaluator.run(source)
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_variable_placement():
+    """Test that parameters in small frames are read without a lookup."""
+    evaluator = Evaluator(engine='closure')
+    analyzer = evaluator.analyzer
+    outer = Scope(['a', 'b'], [], True, None)
+    frame = Env1(Env2(evaluator.global_env, ['a', 'b'], [1, 2]), ['c'], [3])
+
+    b = analyzer.analyze_variable('b', Scope(['c'], [], True, outer))
+    assert repr(b) == "operator.attrgetter('parent.value1')" and b(frame) == 2
+    # A define in a frame in between may bind the name at run time
+    b = analyzer.analyze_variable('b', Scope(['c'], ['b'], False, outer))
+    assert not isinstance(b, attrgetter) and b(frame) == 2
+    car = analyzer.analyze_variable('car', Scope(['c'], [], True, outer))
+    assert car(frame) is evaluator.global_env.get('car')
+    with pytest.raises(NameError, match="Undefined variable: d"):
+        analyzer.analyze_variable('d', outer)(frame)
+
+
+def test_invalid_engine_options():
+    """Test that unknown engines and unsupported combinations are rejected."""
+    with pytest.raises(ValueError, match="Unknown engine: jit"):
+        Evaluator(engine='jit')
+    with pytest.raises(ValueError, match="lexical_addressing"):
+        Evaluator(engine='closure', lexical_addressing=True)
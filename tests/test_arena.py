@@ -0,0 +1,69 @@
+"""Tests for the flat AST arena."""
+
+import pytest
+from src.tiny_interpreter.arena import Arena, NodeKind
+from src.tiny_interpreter.evaluator import Evaluator
+from src.tiny_interpreter.lexer import LexerError
+from src.tiny_interpreter.parser import parse, ParserError
+from tests.helpers import flatten
+
+
+SOURCE = """; squares
+(define square (lambda (x) (* x x)))
+(square -12) #t #f
+(list () (quote (a 1 a 1)))
+"""
+
+
+@pytest.mark.parametrize("build", [
+    lambda source: Arena.from_nodes(parse(source)),
+    Arena.from_source,
+])
+def test_round_trip(build):
+    """Test that an arena converts back to the same AST."""
+    arena = build(SOURCE)
+    assert flatten(arena.to_nodes()) == flatten(parse(SOURCE))
+    assert len(arena) == len(flatten(parse(SOURCE)))
+
+
+def test_columns():
+    """Test the columns, tables and index arithmetic of a small arena."""
+    arena = Arena.from_source("(a 7 (a #t))")
+    root = arena.roots[0]
+    assert arena.kinds[root] == NodeKind.SEXPRESSION
+    children = arena.children(root)
+    assert [arena.kinds[i] for i in children] == [NodeKind.SYMBOL, NodeKind.NUMBER, NodeKind.SEXPRESSION]
+    assert [arena.value(i) for i in children[:2]] == ["a", 7]
+    inner = arena.children(children[2])
+    assert [arena.value(i) for i in inner] == ["a", True]
+    # Repeated symbols share one table entry
+    assert arena.symbols == ["a"]
+    # Offsets are relative to the root, which holds its source offset
+    assert arena.offsets[root] == 0 and arena.offsets[inner[1]] == 8
+
+
+@pytest.mark.parametrize("source", ["(+ 1 2", "(+ 1 2))", "(a\n  (b #x))", "(a @)"])
+def test_from_source_errors_match_parse(source):
+    """Test that reading into an arena raises the same errors as parse()."""
+    with pytest.raises((LexerError, ParserError)) as expected:
+        parse(source)
+    with pytest.raises(type(expected.value)) as excinfo:
+        Arena.from_source(source)
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_deep_nesting():
+    """Test converting a deeply nested form without recursion."""
+    depth = 10000
+    source = "(" * depth + "x" + ")" * depth
+    node = Arena.from_source(source).to_nodes()[0]
+    for _ in range(depth):
+        node = node.elements[0]
+    assert node.name == "x"
+
+
+def test_evaluator_runs_arena():
+    """Test evaluating an arena through the evaluator adapter."""
+    arena = Arena.from_source(SOURCE)
+    assert Evaluator().run_arena(arena) == [[], ["a", 1, "a", 1]]
+    assert Evaluator().run_arena(Arena.from_source("(define x 6) (* x 7)")) == 42
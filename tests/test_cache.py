@@ -0,0 +1,229 @@
+"""Tests for the on-disk AST cache and the in-memory parse cache."""
+
+import marshal
+import os
+
+import pytest
+from src.tiny_interpreter import cache, main
+from src.tiny_interpreter.cache import ParseCache
+from src.tiny_interpreter.evaluator import Evaluator
+from src.tiny_interpreter.parser import parse
+from tests.helpers import flatten
+
+
+SOURCE = "; squares\n(define square (lambda (x) (* x x)))\n(square 7)\n"
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.lisp"
+    path.write_text(SOURCE)
+    return str(path)
+
+
+def fail_to_parse():
+    raise AssertionError("parsed although the cache is fresh")
+
+
+def test_cache_path(script):
+    """Test that cache files live in __tlcache__ next to the source."""
+    assert cache.cache_path(script) == os.path.join(
+        os.path.dirname(script), "__tlcache__", "script.lisp.tlc")
+
+
+def test_round_trip(script):
+    """Test that a warm load returns the AST without parsing."""
+    nodes = list(cache.load_or_parse(script, lambda: parse(SOURCE)))
+    assert os.path.exists(cache.cache_path(script))
+    cached = list(cache.load_or_parse(script, fail_to_parse))
+    assert flatten(cached) == flatten(nodes)
+
+
+def test_stale_when_content_changes(script):
+    """Test that an edit with the same size and mtime is still caught."""
+    list(cache.load_or_parse(script, lambda: parse(SOURCE)))
+    stat = os.stat(script)
+    edited = SOURCE.replace("7", "8")
+    with open(script, 'w') as f:
+        f.write(edited)
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert cache.load(script) is None
+    nodes = list(cache.load_or_parse(script, lambda: parse(edited)))
+    assert flatten(cache.load(script)) == flatten(nodes)
+
+
+def test_stale_when_mtime_changes(script):
+    """Test that touching the source invalidates the cache."""
+    list(cache.load_or_parse(script, lambda: parse(SOURCE)))
+    stat = os.stat(script)
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.load(script) is None
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"XXXX" + data[4:],                # magic
+    lambda data: data[:4] + b"\xff\xff" + data[6:],  # version
+    lambda data: data[:cache._HEADER.size + 5],     # truncated body
+    lambda data: data[:10],                         # truncated header
+])
+def test_unreadable_cache_is_ignored(script, damage):
+    """Test that a damaged or foreign cache file is treated as a miss."""
+    list(cache.load_or_parse(script, lambda: parse(SOURCE)))
+    path = cache.cache_path(script)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(damage(data))
+    assert cache.load(script) is None
+
+
+def damage_body(path, record):
+    """Overwrite a cache file's body from a record on, keeping its length."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    start = cache._HEADER.size
+    for _ in range(record):
+        start += len(marshal.dumps(marshal.loads(data[start:])))
+    with open(path, 'wb') as f:
+        f.write(data[:start] + b"\x00" + data[start + 1:])
+
+
+@pytest.mark.parametrize("record", [0, 2])
+def test_corrupt_body_falls_back_to_parsing(script, record):
+    """Test that a body that can't be read, though its length matches, is a miss."""
+    source = "".join(f"(define x{i} {i})\n" for i in range(10)) + "(+ x3 x9)"
+    with open(script, 'w') as f:
+        f.write(source)
+    writer = cache.CacheWriter(script, cache.source_key(script), batch_size=3)
+    for node in parse(source):
+        writer.add(node)
+    assert writer.commit()
+    damage_body(cache.cache_path(script), record)
+
+    # Forms read before the damaged record are not repeated
+    nodes = list(cache.load_or_parse(script, lambda: parse(source)))
+    assert flatten(nodes) == flatten(parse(source))
+    # The cache is written again
+    assert flatten(cache.load(script)) == flatten(parse(source))
+
+
+def test_run_file_with_corrupt_cache(script, capsys):
+    """Test that run_file parses the script when the cache body is corrupt."""
+    main.run_file(script)
+    damage_body(cache.cache_path(script), 0)
+    main.run_file(script)
+    assert capsys.readouterr().out == "49\n49\n"
+
+
+def test_batches(script):
+    """Test writing and reading back a body of several records."""
+    source = "".join(f"(define x{i} {i})\n" for i in range(10)) + "(+ x3 x9)"
+    with open(script, 'w') as f:
+        f.write(source)
+    writer = cache.CacheWriter(script, cache.source_key(script), batch_size=3)
+    for node in parse(source):
+        writer.add(node)
+    assert writer.commit()
+    assert flatten(cache.load(script)) == flatten(parse(source))
+
+
+def test_not_written_when_offsets_overflow(script):
+    """Test that forms too far into a script for the arena are streamed but not cached."""
+    def huge_offsets():
+        for node in parse(SOURCE):
+            node.offset += 2 ** 31
+            yield node
+
+    nodes = list(cache.load_or_parse(script, huge_offsets))
+    assert len(nodes) == 2
+    assert not os.path.exists(cache.cache_path(script))
+    assert os.listdir(os.path.dirname(cache.cache_path(script))) == []
+
+
+def test_not_written_when_stopped_early(script):
+    """Test that a partly consumed stream leaves no cache file behind."""
+    forms = cache.load_or_parse(script, lambda: parse(SOURCE))
+    next(forms)
+    forms.close()
+    assert not os.path.exists(cache.cache_path(script))
+    assert os.listdir(os.path.dirname(cache.cache_path(script))) == []
+
+
+def test_clear(script):
+    """Test removing a cache file."""
+    assert not cache.clear(script)
+    list(cache.load_or_parse(script, lambda: parse(SOURCE)))
+    assert cache.clear(script)
+    assert not os.path.exists(cache.cache_path(script))
+
+
+def test_run_file_warm_skips_parsing(script, capsys, monkeypatch):
+    """Test that a second run_file loads the AST instead of parsing."""
+    main.run_file(script)
+    monkeypatch.setattr(main, "read_stream", lambda *args: fail_to_parse())
+    main.run_file(script)
+    assert capsys.readouterr().out == "49\n49\n"
+
+
+def test_run_file_without_cache(script, capsys):
+    """Test that use_cache=False neither reads nor writes the cache."""
+    main.run_file(script, use_cache=False)
+    assert not os.path.exists(cache.cache_path(script))
+    assert capsys.readouterr().out == "49\n"
+
+
+def test_parse_cache_counters():
+    """Test hits, misses and LRU eviction by entry count."""
+    parse_cache = ParseCache(capacity=2)
+    first = parse_cache.parse("(+ 1 2)")
+    assert parse_cache.parse("(+ 1 2)") is first
+    parse_cache.parse("(* 3 4)")
+    parse_cache.parse("(+ 1 2)")
+    parse_cache.parse("(- 5 6)")          # evicts (* 3 4), the least recently used
+    assert parse_cache.stats() == {"hits": 2, "misses": 3, "evictions": 1,
+                                   "entries": 2, "bytes": parse_cache.size}
+    parse_cache.parse("(* 3 4)")
+    assert (parse_cache.misses, parse_cache.evictions) == (4, 2)
+
+
+def test_parse_cache_byte_limit():
+    """Test eviction by estimated size, and sources too big to cache."""
+    small = ParseCache()
+    small.parse("(a b c)")
+    one_entry = small.size
+
+    parse_cache = ParseCache(max_bytes=one_entry * 2)
+    parse_cache.parse("(a b c)")
+    parse_cache.parse("(d e f)")
+    parse_cache.parse("(g h i)")
+    assert len(parse_cache) == 2 and parse_cache.evictions == 1
+    assert parse_cache.size <= parse_cache.max_bytes
+
+    parse_cache.parse("(" + " x" * 1000 + ")")
+    assert len(parse_cache) == 2 and parse_cache.misses == 4
+
+
+def test_parse_cache_long_sources_keyed_by_digest():
+    """Test that long sources don't keep their text in the cache."""
+    parse_cache = ParseCache()
+    source = "(+ 1 2) " * 100
+    parse_cache.parse(source)
+    assert all(isinstance(key, bytes) for key in parse_cache._entries)
+    parse_cache.parse(source)
+    assert parse_cache.hits == 1
+
+
+def test_evaluator_parse_cache():
+    """Test that cached ASTs are reused safely across evaluations."""
+    parse_cache = ParseCache()
+    first, second = Evaluator(parse_cache=parse_cache), Evaluator(parse_cache=parse_cache)
+    program = "(define f (lambda (x) (* x 2)))\n(f n)"
+    first.run("(define n 4)")
+    second.run("(define n 10)")
+    for _ in range(3):
+        assert first.run(program) == 8
+        assert second.run(program) == 20
+    assert parse_cache.misses == 3 and parse_cache.hits == 5
+    assert Evaluator(parse_cache=True).parse_cache is not None
+    assert Evaluator().parse_cache is None
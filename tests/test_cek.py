@@ -0,0 +1,71 @@
+"""Tests for the explicit-stack evaluator."""
+
+import math
+import tracemalloc
+
+import pytest
+from src.tiny_interpreter.evaluator import Evaluator, EvaluatorError
+
+
+PROGRAMS = [
+    ("(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))\n(fib 12)", 144),
+    ("(define f (lambda (a) (lambda (b) (lambda (c) (list a b c)))))\n(((f 1) 2) 3)", [1, 2, 3]),
+    ("(define f (lambda (x x) x))\n(f 1 2)", 2),
+    ("(define f (lambda (a b c d e) (list e d c b a)))\n(f 1 2 3 4 5)", [5, 4, 3, 2, 1]),
+    ("""(define x 1)
+        (define f (lambda (x) (lambda () (begin (define y x) (define x 2) (list y x)))))
+        (list ((f 5)) x)""", [[5, 2], 1]),
+    ("(define g (lambda (n) (define a n) (define b (+ a 1)) (list a b)))\n(g 1)", [1, 2]),
+    ("(define q (lambda () (quote (1 (2)))))\n(list (q) (begin) () (begin 1 2 3))", [[1, [2]], None, [], 3]),
+    ("((if #t car cdr) (list (+ 1 (* 2 3)) 2))", 7),
+]
+
+
+@pytest.mark.parametrize("source, expected", PROGRAMS)
+def test_same_results_as_tree_walker(source, expected):
+    """Test that the machine computes what the tree walker does."""
+    assert Evaluator().run(source) == expected
+    assert Evaluator(engine='cek').run(source) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "(define f (lambda (x) (+ x y)))\n(f 1)",
+    "(define f (lambda (x) (if x 1)))\n(f 1)",
+    "(define f (lambda (x) (define x)))\n(f 1)",
+    "(define f (lambda (x) (define 1 x)))\n(f 1)",
+    "(define f (lambda (x) (lambda (1) x)))\n(f 1)",
+    "(define f (lambda (x) (quote)))\n(f 1)",
+    "(define f (lambda (x) x))\n(f 1 2)",
+    "(1 2)",
+])
+def test_same_errors_as_tree_walker(source):
+    """Test that errors are raised with the same messages."""
+    with pytest.raises((NameError, EvaluatorError)) as expected:
+        Evaluator().run(source)
+    with pytest.raises(type(expected.value)) as excinfo:
+        Evaluator(engine='cek').run(source)
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_deep_non_tail_recursion():
+    """Test that recursion depth is only limited by memory."""
+    evaluator = Evaluator(engine='cek')
+    with open("examples/factorial.lisp") as f:
+        evaluator.run(f.read())
+    assert evaluator.run("(factorial 5000)") == math.factorial(5000)
+    evaluator.run("(define sum (lambda (n) (if (= n 0) 0 (+ n (sum (- n 1))))))")
+    assert evaluator.run("(sum 50000)") == 50000 * 50001 // 2
+
+
+def test_tail_calls_push_no_frames():
+    """Test that a tail-recursive loop runs in constant space."""
+    evaluator = Evaluator(engine='cek')
+    evaluator.run("(define loop (lambda (i) (if (= i 0) (quote done) (begin 0 (loop (- i 1))))))")
+    tracemalloc.start()
+    try:
+        assert evaluator.run("(loop 50000)") == "done"
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # A continuation frame per iteration would take megabytes
+    assert peak < 100_000
@@ -0,0 +1,74 @@
+"""Tests for the bytecode compiler."""
+
+from src.tiny_interpreter.compiler import (
+    CALL, CONST, DEFINE_GLOBAL, JUMP, JUMP_IF_FALSE, LOAD_BOUND, LOAD_GLOBAL, LOAD_LOCAL,
+    LOAD_OUTER, MAKE_CLOSURE, RAISE, RETURN, CodeObject, Compiler, disassemble)
+from src.tiny_interpreter.parser import parse
+
+
+def compile_source(source):
+    """Compile each form of a source, with the compiler used."""
+    compiler = Compiler()
+    return compiler, [compiler.compile(form) for form in parse(source)]
+
+
+def test_instructions_and_constants():
+    """Test the instruction stream of an if and an application."""
+    compiler, (code,) = compile_source("(if (< x 2) #t 2)")
+    assert code.code.typecode == 'l'
+    assert list(code.code) == [
+        LOAD_GLOBAL, 0, LOAD_GLOBAL, 1, CONST, 0, CALL, 2,
+        JUMP_IF_FALSE, 14, CONST, 1, JUMP, 16, CONST, 0, RETURN]
+    # 2 and #t are different constants, though True == 1
+    assert code.constants == [2, True]
+    assert compiler.globals == ['<', 'x']
+
+
+def test_constants_are_shared_by_value_and_type():
+    """Test that equal literals share one constant, and 1 and #t don't."""
+    _, (code,) = compile_source("(list 1 #t 1 2 #t (quote a) (quote a) (quote (a)) (quote (a)))")
+    assert code.constants[:4] == [1, True, 2, 'a']
+    # Each quoted list is its own constant, a new list each time it runs
+    assert len(code.constants) == 6
+    _, (code,) = compile_source("(list " + " ".join(map(str, range(5000))) + ")")
+    assert code.constants == list(range(5000))
+
+
+def test_local_and_global_slots():
+    """Test that parameters, defined names and globals get their own loads."""
+    compiler, (_, code) = compile_source("""
+        (define g 1)
+        (lambda (a) (define b a) (lambda () (list a b g)))""")
+    (outer,) = code.constants
+    assert isinstance(outer, CodeObject) and outer.slots == {'a': 0, 'b': 1}
+    inner = next(c for c in outer.constants if isinstance(c, CodeObject))
+    assert list(inner.code) == [
+        LOAD_GLOBAL, compiler.global_slots['list'], LOAD_OUTER, 1, 0,
+        LOAD_BOUND, 1, 1, 0, LOAD_GLOBAL, 0, CALL, 3, RETURN]
+    assert compiler.globals[0] == 'g'
+    assert list(outer.code)[:2] == [LOAD_LOCAL, 0]
+
+
+def test_malformed_forms_compile_to_raise():
+    """Test that malformed special forms raise only when they run."""
+    _, (code,) = compile_source("(lambda (x) (if x 1))")
+    (body,) = code.constants
+    assert list(body.code) == [RAISE, 0, RETURN]
+    assert body.constants == ["if expects 3 arguments, got 2"]
+
+
+def test_disassemble():
+    """Test the listing of a form and the lambdas in it."""
+    compiler, (code,) = compile_source("(define f (lambda (n) (f n)))")
+    assert list(code.code) == [MAKE_CLOSURE, 0, DEFINE_GLOBAL, 0, RETURN]
+    assert disassemble(code, compiler.globals) == """\
+<form>:
+     0 MAKE_CLOSURE   0          (<code <lambda ['n']>>)
+     2 DEFINE_GLOBAL  0          (f)
+     4 RETURN
+
+<lambda ['n']>:
+     0 LOAD_GLOBAL    0          (f)
+     2 LOAD_LOCAL     0          (n)
+     4 CALL           1
+     6 RETURN"""
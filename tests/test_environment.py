@@ -0,0 +1,203 @@
+"""Tests for the environment model."""
+
+import pytest
+from src.tiny_interpreter.environment import (
+    Env1, Env2, Environment, FramePool, GlobalEnvironment, SMALL_ENVIRONMENTS)
+from src.tiny_interpreter.evaluator import Evaluator
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "lookup_cache"])
+def lookup_cache(request):
+    """Run a test with and without the lookup cache."""
+    return request.param
+
+
+def chain(depth, lookup_cache=False):
+    """A root environment binding x, and the leaf `depth` frames below it."""
+    root = Environment(lookup_cache=lookup_cache)
+    root.define('x', 1)
+    env = root
+    for _ in range(depth):
+        env = Environment(env)
+    return root, env
+
+
+def test_get_and_set(lookup_cache):
+    """Test lookups and assignment through parent frames."""
+    root, leaf = chain(3, lookup_cache)
+    assert leaf.get('x') == 1
+    leaf.set('x', 2)
+    assert root.bindings['x'] == 2 and leaf.get('x') == 2
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        leaf.get('y')
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        leaf.set('y', 1)
+
+
+def test_long_chain_does_not_recurse(lookup_cache):
+    """Test that lookups walk chains far longer than the recursion limit."""
+    root, leaf = chain(100_000, lookup_cache)
+    assert leaf.get('x') == 1
+    leaf.set('x', 2)
+    assert root.bindings['x'] == 2
+
+
+def test_shadowing_define_invalidates_cache():
+    """Test that a define in a nearer frame wins over a cached ancestor."""
+    root, middle = chain(2, lookup_cache=True)
+    first, second = Environment(middle), Environment(middle)
+    assert first.get('x') == 1
+    assert middle._owners['x'][0] is root
+
+    middle.parent.define('x', 'shadow')
+    assert second.get('x') == 'shadow'
+    middle.define('x', 'nearer')
+    assert first.get('x') == 'nearer'
+    # Rebinding an existing name doesn't move it, and is seen directly
+    root.define('x', 'ignored')
+    middle.define('x', 'rebound')
+    assert second.get('x') == 'rebound'
+
+
+def test_evaluator_lookup_cache():
+    """Test programs whose body defines shadow captured variables."""
+    source = """
+    (define x 1)
+    (define make (lambda () (lambda () x)))
+    (define f (make))
+    (define before (f))
+    (define g (lambda () (begin (define h (lambda () x)) (define y (h)) (define x 2) (list y (h)))))
+    (list before (g) (f))
+    """
+    assert Evaluator().run(source) == [1, [1, 2], 1]
+    assert Evaluator(lookup_cache=True).run(source) == [1, [1, 2], 1]
+
+
+def test_global_cells_follow_define_and_set():
+    """Test that a global's cell is updated in place by define and set."""
+    env = GlobalEnvironment()
+    env.define('x', 1)
+    cell = env.cell('x')
+    env.define('x', 2)
+    assert cell.value == 2 and env.get('x') == 2
+    env.set('x', 3)
+    assert cell.value == 3 and env.cell('x') is cell
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        env.cell('y')
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        env.set('y', 1)
+
+
+def test_set_through_child_updates_global_cell():
+    """Test that setting a global from a child environment updates its cell."""
+    env = GlobalEnvironment()
+    env.define('x', 1)
+    cell = env.cell('x')
+    child = Environment(Environment(env))
+    child.set('x', 2)
+    assert env.get('x') == 2 and cell.value == 2
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        child.set('y', 1)
+
+
+@pytest.mark.parametrize("names", [["a"], ["a", "b"], ["a", "b", "c"], ["a", "a"]])
+def test_small_environments(names):
+    """Test that small frames behave like an Environment with the same bindings."""
+    root = GlobalEnvironment()
+    root.define('x', 'root')
+    values = list(range(len(names)))
+    small = SMALL_ENVIRONMENTS[len(names)](root, names, values)
+    env = Environment(root)
+    for name, value in zip(names, values):
+        env.define(name, value)
+
+    assert small.bindings == env.bindings
+    assert repr(small) == f"{type(small).__name__}({list(env.bindings)})"
+    for name in set(names) | {'x'}:
+        assert small.get(name) == env.get(name)
+    # Lookups from a dict frame below walk through the small frame
+    assert Environment(small).get(names[-1]) == env.get(names[-1])
+    small.set(names[0], 'new')
+    Environment(small).set('x', 'changed')
+    assert small.get(names[0]) == 'new' and root.get('x') == 'changed'
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        small.get('y')
+
+
+def test_deep_chain_of_small_frames():
+    """Test that lookups and sets through thousands of small frames don't recurse per frame."""
+    root = GlobalEnvironment()
+    root.define('x', 1)
+    env = root
+    for i in range(3000):
+        env = Env1(env, [f"p{i}"], [i])
+    assert env.get('x') == 1 and env.get('p0') == 0
+    env.set('p0', 'new')
+    env.set('x', 2)
+    assert env.get('p0') == 'new' and root.cell('x').value == 2
+    with pytest.raises(NameError, match="Undefined variable: y"):
+        env.set('y', 1)
+
+
+def test_lookup_cache_inherited_through_small_frames():
+    """Test that a dict frame below a small frame takes the cache setting from further out."""
+    for lookup_cache in (False, True):
+        root = GlobalEnvironment(lookup_cache=lookup_cache)
+        assert Environment(Env1(root, ['a'], [1])).lookup_cache is lookup_cache
+    evaluator = Evaluator(lookup_cache=True)
+    frame = evaluator.run("((lambda (a) ((lambda (b) (define c b) (lambda () c)) a)) 1)").env
+    assert frame.lookup_cache
+
+
+def test_small_frames_only_without_define():
+    """Test which closures are called with a small frame."""
+    evaluator = Evaluator()
+    evaluator.run("""
+    (define f (lambda (a b) (+ a b)))
+    (define g (lambda (a) (begin (define t a) t)))
+    (define h (lambda (a b c d) a))
+    (define k (lambda (a) (lambda () (define t a))))
+    (list (f 1 2) (g 1) (h 1 2 3 4) ((k 1)))
+    """)
+    frames = {name: evaluator.global_env.get(name).frame_class for name in "fghk"}
+    assert frames == {"f": Env2, "g": Environment, "h": Environment, "k": Env1}
+    assert Evaluator(small_frames=False).frame_class(evaluator.global_env.get('f')) is Environment
+
+
+def test_frame_pool_rebinds_released_frames():
+    """Test that a released frame is handed out again with new bindings."""
+    root = GlobalEnvironment()
+    pool = FramePool(Env2, limit=1)
+    first = pool.acquire(root, ['a', 'b'], [1, 2])
+    second = pool.acquire(root, ['a', 'b'], [3, 4])
+    assert first is not second
+    pool.release(first)
+    pool.release(second)
+    assert pool.free == [first]
+    frame = pool.acquire(first, ['x', 'y'], [5, 6])
+    assert frame is first and frame.parent is first
+    assert frame.bindings == {'x': 5, 'y': 6}
+    assert pool.acquire(root, ['a', 'b'], [1, 2]) is not first
+
+
+def test_frame_pools_only_without_inner_lambda():
+    """Test which closures reuse frames, and that recursion through pooled frames is unaffected."""
+    evaluator = Evaluator()
+    result = evaluator.run("""
+    (define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+    (define tak (lambda (x y z) (if (< y x)
+      (tak (tak (- x 1) y z) (tak (- y 1) z x) (tak (- z 1) x y)) z)))
+    (define adder (lambda (n) (lambda (m) (+ n m))))
+    (define quoted (lambda (n) (quote (lambda (m) n))))
+    (define add3 (adder 3))
+    (list (fib 15) (tak 12 8 4) (add3 (fib 5)) (quoted 1))
+    """)
+    assert result == [610, 5, 8, ["lambda", ["m"], "n"]]
+    pools = {name: evaluator.global_env.get(name).frame_pool
+             for name in ["fib", "tak", "adder", "quoted"]}
+    assert pools["fib"] is evaluator.frame_pools[Env1] and pools["quoted"] is pools["fib"]
+    assert pools["adder"] is None and pools["tak"] is not None
+    # A frame is only kept per level of recursion
+    assert len(pools["fib"].free) <= 15
+    assert Evaluator(frame_pools=False).run(
+        "(define f (lambda (n) n))\n(f 1)\nf").frame_pool is None
@@ -1,75 +1,84 @@
 """Tests for the evaluator."""
 
+import io
+
 import pytest
-from src.tiny_interpreter.evaluator import Evaluator, EvaluatorError
+from src.tiny_interpreter.evaluator import ENGINES, Evaluator, EvaluatorError
+from src.tiny_interpreter.parser import ParserError
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    """Run a test on each engine."""
+    return request.param
 
 
-def test_eval_number():
+def test_eval_number(engine):
     """Test evaluating a number."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     result = evaluator.run("42")
     assert result == 42
 
 
-def test_eval_boolean():
+def test_eval_boolean(engine):
     """Test evaluating a boolean."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     assert evaluator.run("#t") is True
     assert evaluator.run("#f") is False
 
 
-def test_eval_arithmetic():
+def test_eval_arithmetic(engine):
     """Test evaluating arithmetic expressions."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     assert evaluator.run("(+ 1 2)") == 3
     assert evaluator.run("(- 5 3)") == 2
     assert evaluator.run("(* 3 4)") == 12
     assert evaluator.run("(/ 10 2)") == 5
 
 
-def test_eval_nested_arithmetic():
+def test_eval_nested_arithmetic(engine):
     """Test evaluating nested arithmetic."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     assert evaluator.run("(+ (* 2 3) 4)") == 10
     assert evaluator.run("(* (+ 1 2) (- 5 3))") == 6
 
 
-def test_eval_comparison():
+def test_eval_comparison(engine):
     """Test evaluating comparison operations."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     assert evaluator.run("(= 1 1)") is True
     assert evaluator.run("(= 1 2)") is False
     assert evaluator.run("(< 1 2)") is True
     assert evaluator.run("(> 2 1)") is True
 
 
-def test_eval_define():
+def test_eval_define(engine):
     """Test evaluating define."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     evaluator.run("(define x 42)")
     result = evaluator.run("x")
     assert result == 42
 
 
-def test_eval_lambda():
+def test_eval_lambda(engine):
     """Test evaluating lambda."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     evaluator.run("(define square (lambda (x) (* x x)))")
     result = evaluator.run("(square 5)")
     assert result == 25
 
 
-def test_eval_if():
+def test_eval_if(engine):
     """Test evaluating if expressions."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     assert evaluator.run("(if #t 1 2)") == 1
     assert evaluator.run("(if #f 1 2)") == 2
     assert evaluator.run("(if (< 1 2) 10 20)") == 10
 
 
-def test_eval_closure():
+def test_eval_closure(engine):
     """Test evaluating closures."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     evaluator.run("""
         (define make-adder
           (lambda (x)
@@ -81,9 +90,9 @@ def test_eval_closure():
     assert result == 8
 
 
-def test_eval_recursion():
+def test_eval_recursion(engine):
     """Test evaluating recursive functions."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     evaluator.run("""
         (define factorial
           (lambda (n)
@@ -94,42 +103,128 @@ def test_eval_recursion():
     assert evaluator.run("(factorial 5)") == 120
 
 
-def test_eval_list_operations():
+def test_eval_list_operations(engine):
     """Test evaluating list operations."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     evaluator.run("(define lst (list 1 2 3))")
     assert evaluator.run("(car lst)") == 1
     assert evaluator.run("(car (cdr lst))") == 2
 
 
-def test_eval_quote():
+def test_eval_quote(engine):
     """Test evaluating quote."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     result = evaluator.run("(quote (1 2 3))")
     assert result == [1, 2, 3]
 
 
-def test_eval_undefined_variable():
+def test_eval_undefined_variable(engine):
     """Test evaluating undefined variable."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     with pytest.raises(NameError):
         evaluator.run("undefined-var")
 
 
-def test_eval_wrong_number_of_args():
+def test_eval_wrong_number_of_args(engine):
     """Test calling function with wrong number of arguments."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     evaluator.run("(define f (lambda (x) x))")
     with pytest.raises(EvaluatorError):
         evaluator.run("(f 1 2)")
 
 
-def test_eval_multiple_expressions():
+def test_eval_multiple_expressions(engine):
     """Test evaluating multiple expressions."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     result = evaluator.run("""
         (define x 1)
         (define y 2)
         (+ x y)
     """)
     assert result == 3
+
+
+def test_run_stream(engine):
+    """Test streaming evaluation from strings, chunks and files."""
+    source = "(define x 1)\n(define f (lambda (y)\n  (+ x y)))\n(f 2) (f 3)\n"
+    assert list(Evaluator(engine=engine).run_stream(source)) == [None, None, 3, 4]
+    chunks = [source[i:i + 5] for i in range(0, len(source), 5)]
+    assert list(Evaluator(engine=engine).run_stream(chunks)) == [None, None, 3, 4]
+    assert list(Evaluator(engine=engine).run_stream(io.StringIO(source))) == [None, None, 3, 4]
+
+
+def test_run_stream_evaluates_forms_before_an_error(engine):
+    """Test that forms before a syntax error have already run."""
+    evaluator = Evaluator(engine=engine)
+    results = evaluator.run_stream("(define x 41)\n(+ x 1)\n(+ x")
+    assert next(results) is None
+    assert next(results) == 42
+    with pytest.raises(ParserError) as excinfo:
+        next(results)
+    assert (excinfo.value.line, excinfo.value.column) == (3, 5)
+
+
+@pytest.mark.parametrize("options", [{}, {"lexical_addressing": True}, {"small_frames": False}])
+def test_tail_calls_run_in_constant_stack(options):
+    """Test that the tree walker's tail calls through if, begin and closure bodies don't grow the Python stack."""
+    evaluator = Evaluator(**options)
+    evaluator.run("""
+        (define loop (lambda (i acc) (if (= i 0) acc (begin 0 (loop (- i 1) (+ acc 1))))))
+        (define even? (lambda (n) (if (= n 0) #t (odd? (- n 1)))))
+        (define odd? (lambda (n) (if (= n 0) #f (even? (- n 1)))))
+        (define count (lambda (n) (define m (- n 1)) (if (= m 0) 0 (count m))))
+    """)
+    assert evaluator.run("(loop 20000 0)") == 20000
+    assert evaluator.run("(even? 20001)") is False
+    assert evaluator.run("(count 20000)") == 0
+    # Calls in argument position still nest, and still work
+    assert evaluator.run("(+ 1 (loop 10 0))") == 11
+
+
+@pytest.mark.parametrize("options", [{}, {"lexical_addressing": True}, {"engine": "cek"}])
+def test_register_special_form(options):
+    """Test that registered special forms evaluate only the operands they choose, and that tail forms make tail calls."""
+    evaluator = Evaluator(**options)
+
+    def unless(args, env):
+        return None if evaluator.eval(args[0], env) else evaluator.eval(args[1], env)
+
+    def when(args, env):
+        return args[1] if evaluator.eval(args[0], env) else None
+
+    evaluator.register_special_form('unless', unless)
+    evaluator.register_special_form('when', when, tail=True)
+    evaluator.run("(define loop (lambda (i) (when (> i 0) (loop (- i 1)))))")
+    assert evaluator.run("(unless (= 1 2) 7)") == 7
+    # The operand that isn't evaluated would be an error
+    assert evaluator.run("(unless #t undefined)") is None
+    assert evaluator.run("((lambda (x) (when (> x 1) (* x 10))) 3)") == 30
+    assert evaluator.run("(loop 20000)") is None
+
+
+def test_register_special_form_errors():
+    """Test that built-in forms can't be replaced, nor forms added to compiling engines."""
+    with pytest.raises(ValueError):
+        Evaluator().register_special_form('if', lambda args, env: None)
+    for engine in ('closure', 'vm'):
+        with pytest.raises(ValueError):
+            Evaluator(engine=engine).register_special_form('when', lambda args, env: None)
+
+
+@pytest.mark.parametrize("options", [{}, {"lexical_addressing": True}, {"engine": "cek"}])
+def test_registered_form_may_keep_its_environment(options):
+    """Test that a frame a handler keeps isn't reused by a later call."""
+    evaluator = Evaluator(**options)
+    evaluator.register_special_form('delay', lambda args, env: (lambda: evaluator.eval(args[0], env)))
+    evaluator.run("(define mk (lambda (x) (delay x)))")
+    promises = [evaluator.run("(mk 1)"), evaluator.run("(mk 2)")]
+    assert [force() for force in promises] == [1, 2]
+
+
+@pytest.mark.parametrize("options", [{}, {"lexical_addressing": True}, {"engine": "cek"}])
+def test_registered_form_may_define(options):
+    """Test that a handler can define names in the frame of the closure it runs in."""
+    evaluator = Evaluator(**options)
+    evaluator.register_special_form('defx', lambda args, env: env.define(args[0].name, 42))
+    evaluator.run("(define f (lambda (y) (begin (defx z) (+ y z))))")
+    assert evaluator.run("(f 1)") == 43
@@ -0,0 +1,88 @@
+"""Tests for hash-consing of AST subtrees."""
+
+from src.tiny_interpreter.evaluator import Evaluator
+from src.tiny_interpreter.hashcons import HashConser
+from src.tiny_interpreter.parser import node_positions, parse, SExpression
+from src.tiny_interpreter.source_map import SourceMap
+from tests.helpers import flatten
+
+
+def snapshot(nodes):
+    """Record every node reachable from nodes, with its identity and fields."""
+    result = []
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, SExpression):
+            result.append((id(node), id(node.elements), list(map(id, node.elements)),
+                           node.offset))
+            stack.extend(node.elements)
+        else:
+            result.append((id(node), repr(node), node.offset))
+    return result
+
+
+SOURCE = """(define f (lambda (n) (if (= n 0) 0 (+ n (f (- n 1))))))
+(define g (lambda (n) (if (= n 0) 1 (* n (g (- n 1))))))
+(list (f 4) (g 4) 1 #t (quote (1 #t)))"""
+
+
+def test_shares_identical_subtrees():
+    """Test that repeated subexpressions become one node."""
+    f, g, _ = parse(SOURCE, hash_cons=True)
+    f_if = f.elements[2].elements[2]
+    g_if = g.elements[2].elements[2]
+    assert f_if.elements[1] is g_if.elements[1]                  # (= n 0)
+    assert f_if.elements[0] is g_if.elements[0]                  # if
+    assert f.elements[0] is g.elements[0]                        # define
+    assert f.elements[2].elements[1] is g.elements[2].elements[1]  # (n)
+
+
+def test_numbers_and_booleans_stay_distinct():
+    """Test that 1 and #t, equal in Python, are not shared."""
+    last = parse(SOURCE, hash_cons=True)[2]
+    one, true = last.elements[3], last.elements[4]
+    assert repr(one) == "Number(1)" and repr(true) == "Boolean(True)"
+    assert last.elements[5].elements[1].elements == [one, true]
+
+
+def test_same_ast_and_side_table_positions():
+    """Test that sharing keeps the AST and every occurrence's position."""
+    nodes = parse(SOURCE)
+    before = snapshot(nodes)
+    conser = HashConser()
+    shared = conser.share(nodes)
+
+    expected = flatten(nodes)
+    assert [entry[0] for entry in flatten(shared)] == [entry[0] for entry in expected]
+    position = SourceMap(SOURCE).position
+    assert ([position(conser.offset(i)) for i in range(len(expected))]
+            == [(line, column) for _, line, column in node_positions(nodes, SourceMap(SOURCE))])
+    assert len(conser) < len(expected)
+    # The input AST is left untouched
+    assert snapshot(nodes) == before
+
+
+def test_evaluator_does_not_mutate_shared_nodes():
+    """Test that evaluating a shared AST leaves every node unchanged."""
+    nodes = parse(SOURCE, hash_cons=True)
+    before = snapshot(nodes)
+    assert Evaluator().run_ast(nodes) == [10, 24, 1, True, [1, True]]
+    assert snapshot(nodes) == before
+
+
+def test_top_level_forms_not_shared_with_nested_ones():
+    """Test that node_positions places a list that is both a top-level form and nested."""
+    for source in ["(a b)\n(f (a b))", "(f (a b))\n(a b)"]:
+        nodes = parse(source, hash_cons=True)
+        lists = [(repr(node), line, column)
+                 for node, line, column in node_positions(nodes, SourceMap(source))
+                 if isinstance(node, SExpression)]
+        expected = [(repr(node), line, column)
+                    for node, line, column in node_positions(parse(source), SourceMap(source))
+                    if isinstance(node, SExpression)]
+        assert lists == expected
+        # The atoms inside both copies of (a b) are still shared
+        top, nested = nodes if source.startswith("(a") else reversed(nodes)
+        nested = nested.elements[1]
+        assert top is not nested and top.elements[0] is nested.elements[0]
@@ -0,0 +1,120 @@
+"""Tests for incremental re-parsing."""
+
+import random
+
+import pytest
+from src.tiny_interpreter.incremental import Document
+from src.tiny_interpreter.lexer import LexerError
+from src.tiny_interpreter.parser import parse, ParserError
+from tests.helpers import flatten
+
+
+SOURCE = """; counters
+(define a 1)
+(define f (lambda (x) (+ x a)))  (f 2)
+x y
+(if #t
+    (f 3)
+    0)
+"""
+
+
+def test_initial_parse():
+    """Test that a new document matches parse()."""
+    doc = Document(SOURCE)
+    assert flatten(doc.ast) == flatten(parse(SOURCE))
+
+
+def test_edit_reuses_untouched_forms():
+    """Test that only the touched form is re-parsed."""
+    doc = Document(SOURCE)
+    before = doc.ast
+    offset = SOURCE.index("(+ x a)") + 1
+    new = doc.edit(offset, offset + 1, "*")
+    after = doc.ast
+
+    assert len(new) == 1
+    assert after[1] is not before[1]
+    assert all(after[i] is before[i] for i in (0, 2, 3, 4, 5))
+    assert flatten(after) == flatten(parse(doc.source))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_full_parse(seed):
+    """Test that random edits leave the same AST as a full parse."""
+    rng = random.Random(seed)
+    pieces = ["(", ")", " ", "\n", "x", "12", "-", "#t", "; c\n", "(f 1)"]
+    doc = Document(SOURCE)
+    for _ in range(200):
+        start = rng.randint(0, len(doc.source))
+        end = min(len(doc.source), start + rng.choice([0, 0, 1, 3]))
+        text = rng.choice(["", rng.choice(pieces)])
+        old_source = doc.source
+        try:
+            doc.edit(start, end, text)
+            expected = parse(doc.source)
+        except (LexerError, ParserError) as error:
+            with pytest.raises(type(error)) as full:
+                parse(doc.source)
+            assert str(full.value) == str(error)
+            # Undo, so the next edit starts from a valid buffer
+            doc.edit(start, start + len(text), old_source[start:end])
+            continue
+        assert flatten(doc.ast) == flatten(expected)
+
+
+def test_edit_error_matches_parse():
+    """Test that an edit that breaks the source raises parse()'s error."""
+    doc = Document(SOURCE)
+    with pytest.raises(ParserError) as exc:
+        doc.edit(0, 0, "(")
+    assert (exc.value.line, exc.value.column) == (8, 1)
+
+    doc.edit(0, 1, "")
+    assert flatten(doc.ast) == flatten(parse(SOURCE))
+
+
+def test_failed_edit_keeps_starts_and_nodes_in_step():
+    """Test that a form that fails to parse leaves no start behind for later edits to resync on."""
+    source = "(define a 1)\n(define f (lambda (x) x))\n(f 2)\n"
+    doc = Document(source)
+    offset = source.index("lambda") + 3
+    with pytest.raises(ParserError):
+        doc.edit(offset, offset, "\n(")
+    with pytest.raises(ParserError):
+        doc.edit(8, 9, "b")
+    doc.edit(offset, offset + 2, "")
+    assert flatten(doc.ast) == flatten(parse(doc.source))
+
+
+def test_edits_to_a_broken_document():
+    """Test that edits before the error keep raising until the source is repaired."""
+    doc = Document(SOURCE)
+    offset = SOURCE.index("(if")
+    with pytest.raises(ParserError) as first:
+        doc.edit(offset, offset + 1, "")
+    # An edit to an earlier form still leaves the source unparsable
+    with pytest.raises(ParserError) as second:
+        doc.edit(SOURCE.index("1"), SOURCE.index("1") + 1, "2")
+    assert str(second.value) == str(first.value)
+    doc.edit(offset, offset, "(")
+    assert flatten(doc.ast) == flatten(parse(doc.source))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_edits_without_undo(seed):
+    """Test that a document follows parse() through edits that break and repair it."""
+    rng = random.Random(seed)
+    pieces = ["(", ")", " ", "\n", "x", "12", "#t", "#", ";", "\n(", ")\n", "(f 1)"]
+    doc = Document(SOURCE)
+    for _ in range(200):
+        start = rng.randint(0, len(doc.source))
+        end = min(len(doc.source), start + rng.choice([0, 0, 1, 3]))
+        try:
+            doc.edit(start, end, rng.choice(["", rng.choice(pieces)]))
+        except (LexerError, ParserError) as error:
+            with pytest.raises(type(error)) as full:
+                parse(doc.source)
+            assert str(full.value) == str(error)
+            continue
+        assert flatten(doc.ast) == flatten(parse(doc.source))
@@ -1,11 +1,19 @@
 """Integration tests for the interpreter."""
 
-from src.tiny_interpreter.evaluator import Evaluator
+import pytest
+from src.tiny_interpreter.evaluator import ENGINES, Evaluator
+from src.tiny_interpreter.main import run_file
 
 
-def test_factorial_example():
+@pytest.fixture(params=ENGINES)
+def engine(request):
+    """Run a test on each engine."""
+    return request.param
+
+
+def test_factorial_example(engine):
     """Test the factorial example."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     code = """
     (define factorial
       (lambda (n)
@@ -19,9 +27,9 @@ def test_factorial_example():
     assert result == 120
 
 
-def test_closure_example():
+def test_closure_example(engine):
     """Test the closure example."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     code = """
     (define make-adder
       (lambda (x)
@@ -37,9 +45,9 @@ def test_closure_example():
     assert evaluator.run("(add5 10)") == 15
 
 
-def test_higher_order_functions():
+def test_higher_order_functions(engine):
     """Test higher-order functions."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     code = """
     (define apply-twice
       (lambda (f x)
@@ -53,9 +61,9 @@ def test_higher_order_functions():
     assert result == 7
 
 
-def test_list_processing():
+def test_list_processing(engine):
     """Test list processing."""
-    evaluator = Evaluator()
+    evaluator = Evaluator(engine=engine)
     code = """
     (define sum-list
       (lambda (lst)
@@ -67,3 +75,12 @@ def test_list_processing():
     """
     result = evaluator.run(code)
     assert result == 15
+
+
+@pytest.mark.parametrize("options", [{}, {"use_mmap": True}, {"jobs": 2}])
+def test_run_file(tmp_path, capsys, options, engine):
+    """Test running a file through each way of parsing it."""
+    script = tmp_path / "script.lisp"
+    script.write_text("; caf\u00e9\n(define square (lambda (x) (* x x)))\n(square 7)\n")
+    run_file(str(script), engine=engine, **options)
+    assert capsys.readouterr().out == "49\n"
@@ -1,7 +1,7 @@
 """Tests for the lexer."""
 
 import pytest
-from src.tiny_interpreter.lexer import Lexer, TokenType, LexerError
+from src.tiny_interpreter.lexer import Lexer, RegexLexer, BytesLexer, TokenType, LexerError
 
 
 def test_empty_input():
@@ -146,3 +146,69 @@ def test_position_tracking():
     assert tokens[0].column == 1
     assert tokens[2].line == 1
     assert tokens[3].line == 2
+
+
+@pytest.mark.parametrize("source", [
+    "",
+    "(+ 1\n  2)",
+    "(define f (lambda (x) (* x -3))) ; trailing\n(f 4)",
+    "#t #f foo-bar? -42 12abc a-1 - -x",
+    "  ; only a comment\n\n\t",
+])
+def test_regex_lexer_matches_lexer(source):
+    """Test that RegexLexer produces the same tokens as Lexer."""
+    assert RegexLexer(source).tokenize() == Lexer(source).tokenize()
+
+
+@pytest.mark.parametrize("source", ["#x", "(a\n  #", "(+ 1\n   @)"])
+def test_regex_lexer_error_positions(source):
+    """Test that RegexLexer reports errors at the same positions."""
+    with pytest.raises(LexerError) as expected:
+        Lexer(source).tokenize()
+    with pytest.raises(LexerError) as actual:
+        RegexLexer(source).tokenize()
+    assert str(actual.value) == str(expected.value)
+
+
+def test_iter_tokens_is_lazy():
+    """Test that iter_tokens yields tokens before scanning the rest."""
+    tokens = Lexer("(foo @").iter_tokens()
+    assert next(tokens).type == TokenType.LPAREN
+    assert next(tokens).value == "foo"
+    with pytest.raises(LexerError):
+        next(tokens)
+
+
+def test_token_offsets():
+    """Test that tokens store offsets and resolve line/column lazily."""
+    tokens = Lexer("(a\n  bb)").tokenize()
+    assert [t.offset for t in tokens] == [0, 1, 5, 7, 8]
+    assert tokens[2].position == (2, 3)
+    assert (tokens[3].line, tokens[3].column) == (2, 5)
+
+
+def test_symbols_are_interned():
+    """Test that repeated symbols share a single string object."""
+    for lexer_class in (Lexer, RegexLexer):
+        tokens = lexer_class("(f" + "oo foo)").tokenize()
+        assert tokens[1].value is tokens[2].value
+
+
+@pytest.mark.parametrize("source", [
+    "(define f (lambda (x) (* x -3))) ; trailing\n(f 4)",
+    "(caf\u00e9 na\u00efve) ; comment \u2192\n  -1\u0663 a\u00a0b",
+    "#t#f foo-bar? 12abc",
+])
+def test_bytes_lexer_matches_lexer(source):
+    """Test that BytesLexer over UTF-8 matches Lexer over text."""
+    assert BytesLexer(source.encode('utf-8')).tokenize() == Lexer(source).tokenize()
+
+
+@pytest.mark.parametrize("source", ["\u00e9 #\u00e9", "(a\n  \u00e9\u2192)", "\u00e9 @"])
+def test_bytes_lexer_error_positions(source):
+    """Test that BytesLexer reports character-based error positions."""
+    with pytest.raises(LexerError) as expected:
+        Lexer(source).tokenize()
+    with pytest.raises(LexerError) as actual:
+        BytesLexer(source.encode('utf-8')).tokenize()
+    assert str(actual.value) == str(expected.value)
@@ -0,0 +1,82 @@
+"""Tests for parallel parsing."""
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from src.tiny_interpreter.lexer import LexerError
+from src.tiny_interpreter.parallel import parse_parallel, split_forms
+from src.tiny_interpreter.parser import parse, ParserError
+from tests.helpers import flatten
+
+
+SOURCE = """; a comment with parens (((
+(define a 1)
+(define f (lambda (x)
+  ; ) inside a form
+  (+ x a)))  (f 2) x
+y (if #t
+    (f 3)
+    0) ; trailing )
+(f (f (f 4)))"""
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+def test_split_forms_at_top_level():
+    """Test that every boundary falls between top-level forms."""
+    for chunk_size in range(1, len(SOURCE) + 2):
+        boundaries = split_forms(SOURCE, chunk_size)
+        assert boundaries[0] == 0
+        assert boundaries == sorted(set(boundaries))
+        nodes = []
+        for start, end in zip(boundaries, boundaries[1:] + [len(SOURCE)]):
+            nodes.extend(parse(SOURCE[start:end]))
+        assert [repr(node) for node in nodes] == [repr(node) for node in parse(SOURCE)]
+
+
+def test_split_forms_single_line():
+    """Test splitting a source without newlines."""
+    source = "(a) (b (c)) d (e);x\n(f)"
+    assert split_forms(source, 2) == [0, 3, 11, 17]
+
+
+def test_split_forms_stops_at_unbalanced_paren():
+    """Test that nothing after an unmatched ')' is split off."""
+    source = "(a)\n)\n(b)\n(c)\n"
+    assert split_forms(source, 1) == [0, 3, 4]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 30, 1000])
+def test_parse_parallel_matches_parse(executor, chunk_size):
+    """Test that chunks are stitched back with global positions."""
+    nodes = parse_parallel(SOURCE, chunk_size=chunk_size, executor=executor)
+    assert flatten(nodes) == flatten(parse(SOURCE))
+
+
+@pytest.mark.parametrize("source, error, position", [
+    ("(a)\n(b)\n  (c #x)\n(d)", LexerError, (3, 6)),
+    ("(a)\n(b)\n  (c d\n(e)", ParserError, (4, 4)),
+    ("(a)\n(b)\n  c)\n(d)", ParserError, (3, 4)),
+])
+def test_parse_parallel_errors_match_parse(executor, source, error, position):
+    """Test that errors in later chunks report whole-source positions."""
+    with pytest.raises(error) as expected:
+        parse(source)
+    with pytest.raises(error) as excinfo:
+        parse_parallel(source, chunk_size=1, executor=executor)
+    assert (excinfo.value.line, excinfo.value.column) == position
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_errors_pickle():
+    """Test that lexer and parser errors survive a round trip between processes."""
+    for error in (LexerError("Invalid boolean: #x", 3, 6), ParserError("Unexpected EOF", 4, 4)):
+        copy = pickle.loads(pickle.dumps(error))
+        assert type(copy) is type(error)
+        assert (copy.message, copy.line, copy.column) == (error.message, error.line, error.column)
+        assert str(copy) == str(error)
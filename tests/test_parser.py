@@ -1,44 +1,53 @@
 """Tests for the parser."""
 
 import pytest
-from src.tiny_interpreter.parser import parse, Number, Boolean, Symbol, SExpression, ParserError
+from src.tiny_interpreter.lexer import Lexer
+from src.tiny_interpreter.parser import parse, Parser, IterativeParser, Number, Boolean, Symbol, SExpression, ParserError
+from src.tiny_interpreter.parser import node_positions, source_offset
+from src.tiny_interpreter.source_map import SourceMap
 
 
-def test_parse_number():
+@pytest.fixture(params=["tokens", "iterative", "fused"])
+def mode(request):
+    """Run a test against each way parse() can build the AST."""
+    return request.param
+
+
+def test_parse_number(mode):
     """Test parsing a number."""
-    ast = parse("42")
+    ast = parse("42", mode=mode)
     assert len(ast) == 1
     assert isinstance(ast[0], Number)
     assert ast[0].value == 42
 
 
-def test_parse_boolean():
+def test_parse_boolean(mode):
     """Test parsing a boolean."""
-    ast = parse("#t")
+    ast = parse("#t", mode=mode)
     assert len(ast) == 1
     assert isinstance(ast[0], Boolean)
     assert ast[0].value is True
 
 
-def test_parse_symbol():
+def test_parse_symbol(mode):
     """Test parsing a symbol."""
-    ast = parse("foo")
+    ast = parse("foo", mode=mode)
     assert len(ast) == 1
     assert isinstance(ast[0], Symbol)
     assert ast[0].name == "foo"
 
 
-def test_parse_empty_list():
+def test_parse_empty_list(mode):
     """Test parsing an empty list."""
-    ast = parse("()")
+    ast = parse("()", mode=mode)
     assert len(ast) == 1
     assert isinstance(ast[0], SExpression)
     assert len(ast[0].elements) == 0
 
 
-def test_parse_simple_list():
+def test_parse_simple_list(mode):
     """Test parsing a simple list."""
-    ast = parse("(+ 1 2)")
+    ast = parse("(+ 1 2)", mode=mode)
     assert len(ast) == 1
     assert isinstance(ast[0], SExpression)
     assert len(ast[0].elements) == 3
@@ -48,29 +57,84 @@ def test_parse_simple_list():
     assert ast[0].elements[1].value == 1
 
 
-def test_parse_nested_list():
+def test_parse_nested_list(mode):
     """Test parsing a nested list."""
-    ast = parse("(+ (* 2 3) 4)")
+    ast = parse("(+ (* 2 3) 4)", mode=mode)
     assert len(ast) == 1
     assert isinstance(ast[0], SExpression)
     assert isinstance(ast[0].elements[1], SExpression)
 
 
-def test_parse_multiple_expressions():
+def test_parse_multiple_expressions(mode):
     """Test parsing multiple expressions."""
-    ast = parse("1 2 3")
+    ast = parse("1 2 3", mode=mode)
     assert len(ast) == 3
     assert all(isinstance(node, Number) for node in ast)
 
 
-def test_parse_unmatched_paren():
+def test_parse_unmatched_paren(mode):
     """Test parsing with unmatched parenthesis."""
     with pytest.raises(ParserError):
-        parse("(+ 1 2")
+        parse("(+ 1 2", mode=mode)
 
 
-def test_parse_extra_paren():
+def test_parse_extra_paren(mode):
     """Test parsing with extra closing parenthesis."""
     # Extra closing paren should cause an error
     with pytest.raises(ParserError):
-        parse("(+ 1 2))")
+        parse("(+ 1 2))", mode=mode)
+
+
+@pytest.mark.parametrize("parser_class", [Parser, IterativeParser])
+def test_parse_token_stream(parser_class):
+    """Test parsing directly from a lazy token stream."""
+    tokens = Lexer("(+ 1 2) x").iter_tokens()
+    ast = parser_class(tokens).parse()
+    assert len(ast) == 2
+    assert isinstance(ast[0], SExpression)
+    assert ast[1].name == "x"
+
+
+def test_parse_error_positions(mode):
+    """Test that parser errors report the offending token position."""
+    with pytest.raises(ParserError) as exc:
+        parse("(+ 1\n  2", mode=mode)
+    assert (exc.value.line, exc.value.column) == (2, 4)
+
+    with pytest.raises(ParserError) as exc:
+        parse("(+ 1 2)\n  )", mode=mode)
+    assert (exc.value.line, exc.value.column) == (2, 3)
+    assert str(exc.value) == "Unexpected token: RPAREN at line 2, column 3"
+
+
+def test_node_offsets(mode):
+    """Test that forms store source offsets and their nodes form-relative ones."""
+    source = "x\n  (define y\n    (+ 1 2))"
+    x, define = parse(source, mode=mode)
+    assert (x.offset, define.offset) == (0, 4)
+    inner = define.elements[2]
+    assert [node.offset for node in define.elements] == [1, 8, 14]
+    assert [node.offset for node in inner.elements] == [15, 17, 19]
+    assert source[source_offset(define, inner.elements[0])] == "+"
+    assert source_offset(define) == 4
+
+
+def test_node_positions(mode):
+    """Test resolving line and column lazily through a source map."""
+    source = "x\n  (define y\n    (+ 1 2))"
+    positions = [(repr(node), line, column)
+                 for node, line, column in node_positions(parse(source, mode=mode), SourceMap(source))]
+    assert positions[:4] == [("Symbol('x')", 1, 1), ("SExpression([Symbol('define'), Symbol('y'), "
+                             "SExpression([Symbol('+'), Number(1), Number(2)])])", 2, 3),
+                             ("Symbol('define')", 2, 4), ("Symbol('y')", 2, 11)]
+    assert [entry[1:] for entry in positions[4:]] == [(3, 5), (3, 6), (3, 8), (3, 10)]
+
+
+@pytest.mark.parametrize("mode", ["iterative", "fused"])
+def test_parse_deep_nesting(mode):
+    """Test nesting far beyond the recursion limit."""
+    depth = 1_000_000
+    node = parse("(" * depth + "42" + ")" * depth, mode=mode)[0]
+    for _ in range(depth):
+        node = node.elements[0]
+    assert node.value == 42
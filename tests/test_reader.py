@@ -0,0 +1,122 @@
+"""Tests for the fused reader."""
+
+import pytest
+from src.tiny_interpreter.lexer import LexerError
+from src.tiny_interpreter.parser import node_positions, parse, ParserError
+from src.tiny_interpreter.reader import Reader, read, read_stream
+from tests.helpers import flatten
+
+
+@pytest.mark.parametrize("source", [
+    "",
+    "  ; only a comment",
+    "42 -7 - #t #f foo",
+    "(+ 1 (* 2 3)) ()",
+    "(define f\n  (lambda (x) ; comment\n    (if (< x 0) -1 (- x))))\n(f -3)",
+    "(a(b)c)d(e)",
+    "((((((((((x))))))))))",
+])
+def test_read_matches_parse(source):
+    """Test that the reader builds the same AST as Lexer + Parser."""
+    assert flatten(read(source)) == flatten(parse(source))
+
+
+@pytest.mark.parametrize("source", [
+    "(+ 1 2",
+    "(+ 1 2))",
+    ")",
+    "(a\n  (b #x))",
+    "(a\n  (b @))",
+    "(a #",
+    "(a\n  (b\n",
+    "#t ) #x",
+    "(a #x",
+])
+def test_read_errors_match_parse(source):
+    """Test that the reader raises the same errors at the same positions."""
+    with pytest.raises((LexerError, ParserError)) as expected:
+        parse(source)
+    with pytest.raises(type(expected.value)) as excinfo:
+        read(source)
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_read_deep_nesting():
+    """Test that nesting is not limited by the recursion limit."""
+    depth = 10000
+    node = read("(" * depth + "x" + ")" * depth)[0]
+    for _ in range(depth - 1):
+        node = node.elements[0]
+    assert repr(node.elements[0]) == "Symbol('x')"
+
+
+def test_reader_origin():
+    """Test reading a fragment with positions from a larger file."""
+    reader = Reader("(a b)\n(c)", line=5, column=3)
+    nodes = reader.read()
+    positions = [(line, column) for _, line, column in node_positions(nodes, reader.source_map)]
+    assert positions == [(5, 3), (5, 4), (5, 6), (6, 1), (6, 2)]
+
+
+def test_parse_mode():
+    """Test selecting the reader through parse()."""
+    source = "(define x 1)\n(+ x 2)"
+    assert flatten(parse(source, mode="fused")) == flatten(parse(source))
+    with pytest.raises(ValueError):
+        parse(source, mode="bogus")
+
+
+@pytest.mark.parametrize("size", [1, 3, 8, 1000])
+def test_read_stream_matches_parse(size):
+    """Test reading forms from arbitrarily cut chunks."""
+    source = "; header\n(define f\n  (lambda (x) ; (\n    (* x x)))\n12 34\n(f #t) x\n(a (b\n c))"
+    chunks = [source[i:i + size] for i in range(0, len(source), size)]
+    assert flatten(list(read_stream(chunks))) == flatten(parse(source))
+
+
+@pytest.mark.parametrize("source", ["(a)\n(b\n", "(a)\n)\n(b)", "(a)\n(b #x)\n",
+                                    "(a) (b", "(a) ) (b)", "x\n(a) (b) (c #x)"])
+def test_read_stream_errors_match_parse(source):
+    """Test that streamed errors report whole-source positions."""
+    with pytest.raises((LexerError, ParserError)) as expected:
+        parse(source)
+    with pytest.raises(type(expected.value)) as excinfo:
+        list(read_stream(source[i:i + 2] for i in range(0, len(source), 2)))
+    assert str(excinfo.value) == str(expected.value)
+
+
+@pytest.mark.parametrize("size", [1, 3, 8, 1000])
+def test_read_stream_one_line(size):
+    """Test reading forms that share a line, with a comment at its end."""
+    source = "(define f (lambda (x) (* x x))) (f 2) 7 (g (h 1)) ; (\n(f 3) x"
+    chunks = [source[i:i + size] for i in range(0, len(source), size)]
+    assert flatten(list(read_stream(chunks))) == flatten(parse(source))
+
+
+def test_read_stream_one_line_is_lazy():
+    """Test that forms on one long line are yielded as each one closes."""
+    consumed = []
+
+    def chunks():
+        for i in range(100000):
+            consumed.append(i)
+            yield f"(define x{i} {i}) "
+
+    forms = read_stream(chunks())
+    for _ in range(3):
+        next(forms)
+    assert len(consumed) == 3
+
+
+def test_read_stream_is_lazy():
+    """Test that a form is yielded before later chunks are read."""
+    consumed = []
+
+    def chunks():
+        for chunk in ["(a)\n", "(b)\n", ")"]:
+            consumed.append(chunk)
+            yield chunk
+
+    forms = read_stream(chunks())
+    assert repr(next(forms)) == "SExpression([Symbol('a')])"
+    assert consumed == ["(a)\n"]
@@ -0,0 +1,107 @@
+"""Tests for lexical addressing."""
+
+import pytest
+from src.tiny_interpreter.evaluator import Evaluator, EvaluatorError
+from src.tiny_interpreter.parser import parse, SExpression
+from src.tiny_interpreter.resolver import GlobalRef, Lambda, LocalDefine, LocalRef, resolve
+
+
+def test_resolves_frame_depth_and_index():
+    """Test that references name their frame and slot."""
+    outer = resolve(parse("(lambda (a b) (lambda (c) (+ b c)))")[0])
+    assert isinstance(outer, Lambda)
+    assert (outer.params, outer.slots, outer.size) == (["a", "b"], {"a": 0, "b": 1}, 2)
+    inner = outer.body[0]
+    assert isinstance(inner, Lambda)
+    assert [(type(ref), ref.name) for ref in inner.body[0].elements] == [
+        (GlobalRef, "+"), (LocalRef, "b"), (LocalRef, "c")]
+    b, c = inner.body[0].elements[1:]
+    assert (b.depth, b.index) == (1, 1)
+    assert (c.depth, c.index) == (0, 0)
+
+
+def test_body_defines_get_slots():
+    """Test that defines anywhere in a body, but not in nested lambdas, get slots."""
+    node = resolve(parse("""
+        (lambda (x)
+          (if x (define y 1) (begin (define z (define w 2))))
+          (define x 3)
+          (lambda () (define inner 4))
+          (quote (define quoted 5)))""")[0])
+    assert node.slots == {"x": 0, "y": 1, "z": 2, "w": 3}
+    assert node.size == 4
+    assert isinstance(node.body[1], LocalDefine) and node.body[1].index == 0
+
+
+def test_leaves_input_and_malformed_forms_alone():
+    """Test that the AST is not modified and malformed forms are kept as is."""
+    source = "(lambda (x) (define x) (if x 1) (quote y) (lambda (1) x))"
+    node = parse(source)[0]
+    before = repr(node)
+    resolved = resolve(node)
+    assert repr(node) == before
+    assert resolved.body[0] is node.elements[2]
+    assert resolved.body[1] is node.elements[3]
+    assert resolved.body[2] is node.elements[4]
+    assert resolved.body[3] is node.elements[5]
+    assert isinstance(resolve(parse("(define f 1)")[0]), SExpression)
+
+
+PROGRAMS = [
+    ("(define make-adder (lambda (x) (lambda (y) (+ x y))))\n((make-adder 5) 3)", 8),
+    ("(define fact (lambda (n) (if (= n 0) 1 (* n (fact (- n 1))))))\n(fact 10)", 3628800),
+    # A body define shadows a captured variable only once it has run
+    ("""(define make-counter
+          (lambda (init)
+            (lambda ()
+              (begin
+                (define result init)
+                (define init (+ init 1))
+                result))))
+        (define counter (make-counter 0))
+        (list (counter) (counter))""", [0, 0]),
+    ("(define x 1)\n(define f (lambda () (begin (define y x) (define x 2) (list y x))))\n(list (f) x)",
+     [[1, 2], 1]),
+    ("(define f (lambda (x x) x))\n(f 1 2)", 2),
+    ("(define f (lambda (a) (lambda (b) (lambda (c) (list a b c)))))\n(((f 1) 2) 3)", [1, 2, 3]),
+    ("(define g (lambda (n) (if (> n 0) (define r n) (define r 0)) r))\n(list (g 3) (g -1))", [3, 0]),
+    # Globals defined after a closure is created are still found
+    ("(define h (lambda () later))\n(define later 7)\n(h)", 7),
+    ("(define if 3)\n(define k (lambda (if) (quote if)))\n(list if (k 1))", [3, "if"]),
+]
+
+
+@pytest.mark.parametrize("source, expected", PROGRAMS)
+def test_same_results_as_name_lookup(source, expected):
+    """Test that resolved programs behave exactly like the dict-based evaluator."""
+    assert Evaluator().run(source) == expected
+    assert Evaluator(lexical_addressing=True).run(source) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "(define f (lambda (x) (+ x y)))\n(f 1)",
+    "(define f (lambda (x) (begin (define z (+ x z)) z)))\n(f 1)",
+    "(define f (lambda (x) (if x 1)))\n(f 1)",
+    "(define f (lambda (x) (define x)))\n(f 1)",
+    "(define f (lambda (x) x))\n(f 1 2)",
+])
+def test_same_errors_as_name_lookup(source):
+    """Test that resolution doesn't change which errors are raised."""
+    with pytest.raises((NameError, EvaluatorError)) as expected:
+        Evaluator().run(source)
+    with pytest.raises(type(expected.value)) as excinfo:
+        Evaluator(lexical_addressing=True).run(source)
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_global_references_cache_cells():
+    """Test that a global reference binds its cell once and sees redefinitions."""
+    evaluator = Evaluator(lexical_addressing=True)
+    evaluator.run("(define k 1)\n(define f (lambda () k))")
+    assert evaluator.run("(f)") == 1
+    closure = evaluator.global_env.get('f')
+    ref = closure.body[0]
+    assert isinstance(ref, GlobalRef) and ref.cell is evaluator.global_env.cell('k')
+    evaluator.run("(define k 2)")
+    assert evaluator.run("(f)") == 2
+    assert closure.body[0].cell is ref.cell
@@ -0,0 +1,64 @@
+"""Tests for the bytecode virtual machine."""
+
+import pytest
+from src.tiny_interpreter.evaluator import Evaluator, EvaluatorError
+
+
+PROGRAMS = [
+    ("(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))\n(fib 12)", 144),
+    ("(define f (lambda (a) (lambda (b) (lambda (c) (list a b c)))))\n(((f 1) 2) 3)", [1, 2, 3]),
+    ("(define f (lambda (x x) x))\n(f 1 2)", 2),
+    # A body define shadows a captured variable only once it has run
+    ("""(define x 1)
+        (define f (lambda (x) (lambda () (begin (define y x) (define x 2) (list y x)))))
+        (list ((f 5)) x)""", [[5, 2], 1]),
+    ("(define x 1)\n(define g (lambda (n) (if (> n 0) (define x n) 0) ((lambda (m) x) 0)))\n(list (g 3) (g 0))",
+     [3, 1]),
+    ("(define h (lambda () later))\n(define later 7)\n(h)", 7),
+    ("(define if 3)\n(define k (lambda (if) (quote if)))\n(list if (k 1))", [3, "if"]),
+    ("(define q (lambda () (quote (1 (2)))))\n(list (q) (begin) () (quote #t))", [[1, [2]], None, [], True]),
+    ("(if #f (define skipped 1) (define taken 2))\n(list taken (begin (define taken 3) taken))", [2, 3]),
+]
+
+
+@pytest.mark.parametrize("source, expected", PROGRAMS)
+def test_same_results_as_tree_walker(source, expected):
+    """Test that compiled programs behave exactly like the tree walker."""
+    assert Evaluator().run(source) == expected
+    assert Evaluator(engine='vm').run(source) == expected
+
+
+@pytest.mark.parametrize("source", [
+    "(define f (lambda (x) (+ x y)))\n(f 1)",
+    "(define f (lambda (x) (begin (define z (+ x z)) z)))\n(f 1)",
+    "(define f (lambda (x) (define x)))\n(f 1)",
+    "(define f (lambda (x) (lambda (1) x)))\n(f 1)",
+    "(define f (lambda (x) x))\n(f 1 2)",
+    "(1 2)",
+])
+def test_same_errors_as_tree_walker(source):
+    """Test that errors are raised with the same messages."""
+    with pytest.raises((NameError, EvaluatorError)) as expected:
+        Evaluator().run(source)
+    with pytest.raises(type(expected.value)) as excinfo:
+        Evaluator(engine='vm').run(source)
+    assert str(excinfo.value) == str(expected.value)
+
+
+def test_deep_recursion_without_python_recursion():
+    """Test that Lisp recursion depth isn't bounded by Python's recursion limit."""
+    evaluator = Evaluator(engine='vm')
+    evaluator.run("(define sum (lambda (n) (if (= n 0) 0 (+ n (sum (- n 1))))))")
+    assert evaluator.run("(sum 20000)") == 20000 * 20001 // 2
+
+
+def test_errors_leave_the_vm_usable():
+    """Test that a form after a failing one runs from a clean state."""
+    evaluator = Evaluator(engine='vm')
+    evaluator.run("(define f (lambda (n) (if (= n 0) (car 1) (+ 1 (f (- n 1))))))")
+    with pytest.raises(TypeError):
+        evaluator.run("(f 5)")
+    with pytest.raises(NameError, match="Undefined variable: nope"):
+        evaluator.run("nope")
+    evaluator.run("(define nope 4)")
+    assert evaluator.run("(+ nope 1)") == 5
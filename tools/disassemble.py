@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""字节码反汇编工具。
+
+把每个顶层表达式编译成虚拟机字节码（见 compiler.py），并打印指令清单。
+
+运行方式：
+    python tools/disassemble.py "(define square (lambda (x) (* x x)))"
+    python tools/disassemble.py -f examples/factorial.lisp
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.tiny_interpreter.compiler import Compiler, disassemble
+from src.tiny_interpreter.parser import parse
+
+
+def main():
+    """主函数。"""
+    parser = argparse.ArgumentParser(description="字节码反汇编工具")
+    parser.add_argument("source", nargs="?", help="要反汇编的源代码")
+    parser.add_argument("-f", "--file", help="从文件读取源代码")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r') as f:
+            source = f.read()
+    elif args.source:
+        source = args.source
+    else:
+        parser.error("需要源代码或 -f 文件")
+
+    # 同一个编译器编译所有表达式，全局槽位编号在表达式之间保持一致
+    compiler = Compiler()
+    listings = [disassemble(compiler.compile(form), compiler.globals)
+                for form in parse(source)]
+    print("\n\n".join(listings))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from src.tiny_interpreter.lexer import Lexer
 from src.tiny_interpreter.parser import Parser, Number, Boolean, Symbol, SExpression
+from src.tiny_interpreter.arena import Arena, NodeKind
 
 
 def visualize_ast(node, indent=0, prefix="", is_last=True):
@@ -57,6 +58,40 @@ def visualize_ast(node, indent=0, prefix="", is_last=True):
             visualize_ast(child, indent + 1, new_prefix, is_last_child)
 
 
+def visualize_arena_node(arena, index, prefix="", is_last=True):
+    """以树形结构可视化 Arena 中的一个节点，输出与 visualize_ast 相同。
+
+    Args:
+        arena: Arena 对象
+        index: 节点下标
+        prefix: 前缀字符串
+        is_last: 是否是同级的最后一个节点
+    """
+    connector = "└── " if is_last else "├── "
+    kind = arena.kinds[index]
+
+    if kind == NodeKind.NUMBER:
+        node_str = f"Number: {arena.value(index)}"
+    elif kind == NodeKind.BOOLEAN:
+        node_str = f"Boolean: {arena.value(index)}"
+    elif kind == NodeKind.SYMBOL:
+        node_str = f"Symbol: {arena.value(index)}"
+    else:
+        children = arena.children(index)
+        if len(children) > 0 and arena.kinds[children[0]] == NodeKind.SYMBOL:
+            node_str = f"SExp: ({arena.value(children[0])} ...)"
+        else:
+            node_str = f"SExp: ({len(children)} elements)"
+
+    print(f"{prefix}{connector}{node_str}")
+
+    if kind == NodeKind.SEXPRESSION:
+        new_prefix = prefix + ("    " if is_last else "│   ")
+        children = arena.children(index)
+        for child in children:
+            visualize_arena_node(arena, child, new_prefix, child == children[-1])
+
+
 def visualize_tokens(source):
     """可视化 Token 序列。"""
     lexer = Lexer(source)
@@ -69,14 +104,29 @@ def visualize_tokens(source):
     print()
 
 
-def visualize(source, show_tokens=False):
-    """可视化源代码的 AST。"""
+def visualize(source, show_tokens=False, use_arena=False):
+    """可视化源代码的 AST。
+
+    Args:
+        source: 源代码
+        show_tokens: 是否同时显示 Token 序列
+        use_arena: 是否先把源代码读入扁平的 Arena，再从 Arena 绘制
+    """
     print(f"\n源代码: {source}")
     print("=" * 50)
 
     if show_tokens:
         visualize_tokens(source)
 
+    if use_arena:
+        arena = Arena.from_source(source)
+        print("\nAST 结构 (Arena):")
+        print("-" * 40)
+        for i, index in enumerate(arena.roots):
+            visualize_arena_node(arena, index, is_last=(i == len(arena.roots) - 1))
+        print()
+        return
+
     # 解析
     lexer = Lexer(source)
     tokens = lexer.tokenize()
@@ -105,6 +155,7 @@ def main():
   python visualize_ast.py "(define square (lambda (x) (* x x)))"
   python visualize_ast.py -f examples/factorial.lisp
   python visualize_ast.py -t "(+ 1 2)"  # 同时显示 Token
+  python visualize_ast.py -a "(+ 1 2)"  # 从扁平 Arena 绘制
         """
     )
 
@@ -125,6 +176,12 @@ def main():
         help="同时显示 Token 序列"
     )
 
+    parser.add_argument(
+        "-a", "--arena",
+        action="store_true",
+        help="从扁平的 Arena 表示绘制 AST"
+    )
+
     args = parser.parse_args()
 
     # 获取源代码
@@ -143,7 +200,7 @@ def main():
             try:
                 source = input("> ")
                 if source.strip():
-                    visualize(source, args.tokens)
+                    visualize(source, args.tokens, args.arena)
             except EOFError:
                 print("\n再见！")
                 break
@@ -153,7 +210,7 @@ def main():
         return
 
     # 可视化
-    visualize(source, args.tokens)
+    visualize(source, args.tokens, args.arena)
 
 
 if __name__ == "__main__":